@@ -1,27 +1,69 @@
 (function () {
+  // Built by scripts/build_site_data.py: every name substring of up to
+  // gram_size characters maps to the ids of the rows whose names contain it
+  var index = null;
+  var rows = [];      // row element by id
+  var tables = [];    // table element by row id
+  var visible = [];   // current display state by id
+
+  function normalize(text) {
+    return text.toLowerCase().trim().replace(/\s+/g, " ");
+  }
+
+  function matchingRows(q) {
+    // Code points, as Python counts them when building the index
+    var chars = Array.from(q);
+    var size = index.gram_size;
+    if (chars.length <= size) return index.grams[q] || [];
+
+    // Start from the query's rarest n-gram and confirm each candidate
+    var shortest = null;
+    for (var i = 0; i + size <= chars.length; i++) {
+      var ids = index.grams[chars.slice(i, i + size).join("")];
+      if (!ids) return [];
+      if (!shortest || ids.length < shortest.length) shortest = ids;
+    }
+    return shortest.filter(function (id) {
+      return index.names[id].indexOf(q) !== -1;
+    });
+  }
+
   function filterTables(query) {
-    var q = query.toLowerCase().trim();
-    var tables = document.querySelectorAll("table.sortable");
-    tables.forEach(function (table) {
-      var rows = table.querySelectorAll("tbody tr");
-      var visible = 0;
-      rows.forEach(function (row) {
-        var nameCell = row.querySelector("td:first-child");
-        if (!nameCell) return;
-        var match = !q || nameCell.textContent.toLowerCase().indexOf(q) !== -1;
-        row.style.display = match ? "" : "none";
-        if (match) visible++;
-      });
+    var q = normalize(query);
+    var match = rows.map(function () { return !q; });
+    if (q) {
+      matchingRows(q).forEach(function (id) { match[id] = true; });
+    }
+
+    var counts = new Map();
+    rows.forEach(function (row, id) {
+      if (!row) return;
+      if (match[id] !== visible[id]) {
+        row.style.display = match[id] ? "" : "none";
+        visible[id] = match[id];
+      }
+      counts.set(tables[id], (counts.get(tables[id]) || 0) + (match[id] ? 1 : 0));
+    });
+
+    document.querySelectorAll("table.sortable").forEach(function (table) {
       var empty = table.nextElementSibling;
       if (empty && empty.classList.contains("search-empty")) {
-        empty.style.display = visible === 0 && q ? "" : "none";
+        empty.style.display = !counts.get(table) && q ? "" : "none";
       }
     });
   }
 
   document.addEventListener("DOMContentLoaded", function () {
     var input = document.getElementById("vendor-search");
-    if (!input) return;
+    var data = document.getElementById("vendor-search-index");
+    if (!input || !data) return;
+    index = JSON.parse(data.textContent);
+    document.querySelectorAll("table.sortable tbody tr[data-row]").forEach(function (row) {
+      var id = parseInt(row.getAttribute("data-row"), 10);
+      rows[id] = row;
+      tables[id] = row.closest("table");
+      visible[id] = true;
+    });
     input.addEventListener("input", function () {
       filterTables(this.value);
     });
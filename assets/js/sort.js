@@ -12,31 +12,57 @@
     return m ? parseFloat(m[0]) : -Infinity;
   }
 
+  function isNumeric(colIndex) {
+    return colIndex === COL_BASE || colIndex === COL_SSO || colIndex === COL_PCT;
+  }
+
   function cellValue(td, colIndex) {
+    // Prefer the key scripts/build_site_data.py parsed at build time
+    var key = td.getAttribute('data-sort');
+    if (key !== null) {
+      if (!isNumeric(colIndex)) return key;
+      return key === '' ? -Infinity : parseFloat(key);
+    }
     var text = td.textContent.trim();
-    if (colIndex === COL_BASE || colIndex === COL_SSO || colIndex === COL_PCT) {
+    if (isNumeric(colIndex)) {
       return extractNumber(text);
     }
     // Date column is YYYY-MM-DD — lexicographic sort is correct
     return text.toLowerCase();
   }
 
+  // Sort keys by row, read from the DOM once per row and column
+  var keyCache = new WeakMap();
+
+  function rowKey(row, colIndex) {
+    var keys = keyCache.get(row);
+    if (!keys) {
+      keys = [];
+      keyCache.set(row, keys);
+    }
+    if (!(colIndex in keys)) {
+      var cell = row.querySelectorAll('td')[colIndex];
+      keys[colIndex] = cell ? cellValue(cell, colIndex) : null;
+    }
+    return keys[colIndex];
+  }
+
   function sortTable(table, colIndex, ascending) {
     var tbody = table.querySelector('tbody');
     var rows = Array.prototype.slice.call(tbody.querySelectorAll('tr'));
 
     rows.sort(function (a, b) {
-      var aCells = a.querySelectorAll('td');
-      var bCells = b.querySelectorAll('td');
-      if (!aCells[colIndex] || !bCells[colIndex]) return 0;
-      var aVal = cellValue(aCells[colIndex], colIndex);
-      var bVal = cellValue(bCells[colIndex], colIndex);
+      var aVal = rowKey(a, colIndex);
+      var bVal = rowKey(b, colIndex);
+      if (aVal === null || bVal === null) return 0;
       if (aVal < bVal) return ascending ? -1 : 1;
       if (aVal > bVal) return ascending ? 1 : -1;
       return 0;
     });
 
-    rows.forEach(function (row) { tbody.appendChild(row); });
+    var fragment = document.createDocumentFragment();
+    rows.forEach(function (row) { fragment.appendChild(row); });
+    tbody.appendChild(fragment);
   }
 
   function updateIndicators(headers, activeIndex, ascending) {
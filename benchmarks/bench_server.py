@@ -0,0 +1,214 @@
+"""
+Load test: request latency of the validation server (scripts/validate_server.py)
+against running the CLI cold for every submission.
+
+Both validate the same synthetic vendor documents (see corpus.py):
+  - cli:    one `python3 scripts/validate_pricing.py FILE` process per document,
+            run one after another, timed from spawn to exit
+  - server: --requests POSTs of --docs-per-request documents each, sent over
+            --concurrency keep-alive connections, timed per request
+
+Unless --socket or --url points at a running server, one is started for the
+run on a Unix socket with --jobs workers. Reports p50 / p99 / mean latency and
+throughput; --out writes them as JSON.
+
+Run from the repo root:
+  python3 -m benchmarks.bench_server --requests 2000 --concurrency 16 --cli-runs 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.corpus import generate_documents
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SERVER_SCRIPT = os.path.join(REPO_ROOT, 'scripts', 'validate_server.py')
+CLI_SCRIPT = os.path.join(REPO_ROOT, 'scripts', 'validate_pricing.py')
+
+
+def percentile(samples, p):
+    """The p-th percentile of samples by the nearest-rank method, or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(name, latencies, seconds, documents):
+    """Latency percentiles (in milliseconds) and throughput of one scenario."""
+    return {
+        'name': name,
+        'requests': len(latencies),
+        'documents': documents,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'documents_per_second': documents / seconds if seconds else None,
+    }
+
+
+def bench_cli(paths, runs):
+    """Times `runs` cold CLI invocations, one file each. Returns the summary."""
+    latencies = []
+    start = time.perf_counter()
+    for path in (paths * (runs // len(paths) + 1))[:runs]:
+        began = time.perf_counter()
+        subprocess.run([sys.executable, CLI_SCRIPT, path, '--jobs', '1'], stdout=subprocess.DEVNULL, check=False)
+        latencies.append(time.perf_counter() - began)
+    return summarize('cli', latencies, time.perf_counter() - start, runs)
+
+
+async def _open(target):
+    if target.startswith('/'):
+        return await asyncio.open_unix_connection(target)
+    parts = urlsplit(target)
+    return await asyncio.open_connection(parts.hostname, parts.port or 80)
+
+
+async def _post(reader, writer, target, body, content_type):
+    writer.write(
+        f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head[9:12])
+    length = 0
+    for line in head.decode('latin-1').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+def _request_bodies(documents, docs_per_request):
+    # Single documents go as raw YAML; several as the JSON batch form.
+    # Returns [(target, body, content type, documents)]
+    bodies = []
+    for i in range(0, len(documents), docs_per_request):
+        chunk = documents[i:i + docs_per_request]
+        if docs_per_request == 1:
+            filename, content = chunk[0]
+            bodies.append((f"/validate?path={filename}", content.encode('utf-8'), 'application/yaml', 1))
+        else:
+            payload = {'documents': [{'path': filename, 'content': content} for filename, content in chunk]}
+            bodies.append(('/validate', json.dumps(payload).encode('utf-8'), 'application/json', len(chunk)))
+    return bodies
+
+
+async def bench_server(target, documents, requests, concurrency, docs_per_request=1):
+    """
+    Sends `requests` requests to the server at target (a Unix socket path or
+    an http:// URL) over `concurrency` connections. Returns the summary.
+    Raises RuntimeError if any request is not answered 200.
+    """
+    bodies = _request_bodies(documents, docs_per_request)
+    work = [bodies[i % len(bodies)] for i in range(requests)]
+    latencies = []
+    next_request = iter(work)
+
+    async def client():
+        reader, writer = await _open(target)
+        try:
+            for path, body, content_type, _ in next_request:
+                began = time.perf_counter()
+                status = await _post(reader, writer, path, body, content_type)
+                latencies.append(time.perf_counter() - began)
+                if status != 200:
+                    raise RuntimeError(f"server answered {status} for {path}")
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    return summarize('server', latencies, seconds, sum(count for *_, count in work))
+
+
+def start_server(socket_path, jobs, timeout=30.0):
+    """Starts validate_server.py on socket_path and waits until it accepts connections."""
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, '--socket', socket_path, '--jobs', str(jobs)], stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("the validation server did not start")
+        time.sleep(0.05)
+    return process
+
+
+def run_load_test(requests=1000, concurrency=8, docs_per_request=1, cli_runs=20, jobs=1, target=None,
+                  seed=0, log=print):
+    """Runs the cli and server scenarios. Returns [cli summary, server summary]; cli is skipped if cli_runs is 0."""
+    documents = list(generate_documents(max(docs_per_request * 50, cli_runs, 1), seed))
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-server-') as tmpdir:
+        if cli_runs:
+            paths = []
+            for filename, content in documents[:cli_runs]:
+                paths.append(os.path.join(tmpdir, filename))
+                with open(paths[-1], 'w') as f:
+                    f.write(content)
+            results.append(bench_cli(paths, cli_runs))
+
+        process = None
+        if target is None:
+            target = os.path.join(tmpdir, 'validate.sock')
+            process = start_server(target, jobs)
+        try:
+            results.append(asyncio.run(bench_server(target, documents, requests, concurrency, docs_per_request)))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    for result in results:
+        log(f"{result['name']:<7} {result['requests']:>7} requests  p50 {result['p50_ms']:8.1f} ms  "
+            f"p99 {result['p99_ms']:8.1f} ms  {result['documents_per_second']:>9,.0f} docs/s")
+    if len(results) == 2:
+        log(f"p50 speedup: {results[0]['p50_ms'] / results[1]['p50_ms']:.0f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the validation server against the cold CLI.")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests to send to the server (default: 1000).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent connections (default: 8).")
+    parser.add_argument("--docs-per-request", type=int, default=1,
+                        help="Documents per request; more than 1 uses the JSON batch form (default: 1).")
+    parser.add_argument("--cli-runs", type=int, default=20,
+                        help="Cold CLI invocations to time; 0 skips the CLI (default: 20).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Workers for the server started by the benchmark (default: number of CPUs).")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--socket", help="Load-test a server already listening on this Unix socket.")
+    target.add_argument("--url", help="Load-test a server already listening at this http:// URL.")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed (default: 0).")
+    parser.add_argument("--out", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = run_load_test(
+        max(args.requests, 1), max(args.concurrency, 1), max(args.docs_per_request, 1), max(args.cli_runs, 0),
+        args.jobs, args.socket or args.url, args.seed,
+    )
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'docs_per_request': args.docs_per_request,
+                       'results': results}, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
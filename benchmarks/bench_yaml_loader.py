@@ -0,0 +1,81 @@
+"""
+Benchmark: parse time of the duplicate-key-detecting vendor YAML loader.
+
+Compares the previous quadratic pure-Python loader against the current
+linear-time loader, with and without libyaml, on:
+  - large: a long sequence of small vendor-shaped mappings
+  - wide:  a single mapping with thousands of keys
+
+Run from the repo root:
+  python3 benchmarks/bench_yaml_loader.py
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.validate_pricing import _DuplicateKeyLoader, _CDuplicateKeyLoader
+
+
+class _LegacyDuplicateKeyLoader(yaml.SafeLoader):
+    """The original loader: O(n^2) keys.count() scan per mapping."""
+    def construct_mapping(self, node, deep=False):
+        keys = [self.construct_object(key_node, deep=deep) for key_node, _ in node.value]
+        duplicates = {k for k in keys if keys.count(k) > 1}
+        if duplicates:
+            raise yaml.YAMLError(f"Duplicate key(s) in YAML: {', '.join(sorted(duplicates))}")
+        return super().construct_mapping(node, deep=deep)
+
+
+def large_document(count):
+    entry = (
+        "- name: Vendor {i}\n"
+        "  base_pricing: $10 per u/m\n"
+        "  sso_pricing: $25 per u/m\n"
+        "  percent_increase: 150%\n"
+        "  vendor_url: https://vendor{i}.example.com\n"
+        "  pricing_source: https://vendor{i}.example.com/pricing\n"
+        "  updated_at: 2024-01-15\n"
+    )
+    return ''.join(entry.format(i=i) for i in range(count))
+
+
+def wide_document(count):
+    return ''.join(f"key_{i}: value {i}\n" for i in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vendor YAML loaders.")
+    parser.add_argument("--size", type=int, default=2000,
+                        help="Number of mappings (large) and keys (wide) to generate.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the best is reported.")
+    args = parser.parse_args()
+
+    loaders = [
+        ('legacy (pure Python, O(n^2))', _LegacyDuplicateKeyLoader),
+        ('linear (pure Python)', _DuplicateKeyLoader),
+    ]
+    if _CDuplicateKeyLoader is not None:
+        loaders.append(('linear (libyaml)', _CDuplicateKeyLoader))
+    else:
+        print("libyaml is not available; skipping the CSafeLoader variant.")
+
+    documents = [
+        (f'large ({args.size} mappings)', large_document(args.size)),
+        (f'wide ({args.size} keys)', wide_document(args.size)),
+    ]
+    for doc_name, content in documents:
+        print(f"\n{doc_name}")
+        baseline = None
+        for loader_name, loader in loaders:
+            best = min(timeit.repeat(lambda: yaml.load(content, Loader=loader), number=1, repeat=args.repeat))
+            baseline = baseline or best
+            print(f"  {loader_name:<30} {best * 1000:9.1f} ms  ({baseline / best:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Deterministic generator for synthetic vendor YAML corpora.
+
+The same (count, seed) always produces byte-identical files, so benchmark runs
+on different commits measure the same input. The mix roughly follows the real
+_vendors/ directory, plus the shapes that exercise slower paths:
+  - per-user / per-month / per-year pricing, with and without correct percentages
+  - "Call Us" SSO pricing
+  - legacy footnotes / pricing_note fields and [^id] references
+  - pricing_source given as a list of URLs
+  - malformed files (bad YAML, duplicate keys, missing fields, bad dates)
+
+Run from the repo root:
+  python3 -m benchmarks.corpus /tmp/corpus --count 100000
+"""
+
+import argparse
+import os
+import random
+
+_SYLLABLES = [
+    'ac', 'al', 'an', 'ar', 'base', 'bit', 'box', 'cloud', 'co', 'data', 'desk', 'dev',
+    'do', 'flow', 'fly', 'forge', 'go', 'hub', 'io', 'ja', 'ka', 'lab', 'lo', 'ly',
+    'ma', 'mail', 'net', 'no', 'ops', 'pad', 'pay', 'ra', 'sa', 'sign', 'stack', 'ta',
+    'team', 'ti', 'to', 'track', 'va', 'ware', 'works', 'xo', 'zen', 'zu',
+]
+
+_UNITS = ['per u/m', 'per u/m', 'per u/m', 'per month', 'per year', '/mo', 'per device/m', 'per user/month']
+
+_CALL_US = ['Call Us!', 'Call us', 'Contact Sales', 'Custom pricing', 'Call Us! (over $199/month)']
+
+# (weight, kind) — weights sum to 100
+_KINDS = [
+    (55, 'priced'),
+    (10, 'priced-wrong-percent'),
+    (5, 'priced-unit-mismatch'),
+    (15, 'call-us'),
+    (7, 'legacy-footnotes'),
+    (3, 'pricing-source-list'),
+    (5, 'malformed'),
+]
+
+
+def _vendor_name(rng, index):
+    words = []
+    for _ in range(rng.randint(1, 2)):
+        word = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+        words.append(word.capitalize())
+    # Index suffix keeps names (and so filenames) unique across large corpora
+    return f"{' '.join(words)} {index}"
+
+
+def _pick_kind(rng):
+    roll = rng.randrange(100)
+    for weight, kind in _KINDS:
+        if roll < weight:
+            return kind
+        roll -= weight
+    return _KINDS[-1][1]
+
+
+def _malformed(rng, name, slug):
+    variant = rng.randrange(4)
+    if variant == 0:
+        return f"name: {name}\nbase_pricing: [$10 per u/m\n"
+    if variant == 1:
+        return f"name: {name}\nname: {name} Duplicate\nbase_pricing: $10 per u/m\n"
+    if variant == 2:
+        return f"name: {name}\nbase_pricing: $10 per u/m\nupdated_at: 2024-01-15\n"
+    return (
+        f"name: {name}\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\n"
+        f"percent_increase: 100%\nvendor_url: {slug}.example.com\n"
+        f"pricing_source: https://{slug}.example.com/pricing\nupdated_at: 15-01-2024\n"
+    )
+
+
+def vendor_document(rng, index):
+    """Returns (filename, content) for one synthetic vendor."""
+    name = _vendor_name(rng, index)
+    slug = name.lower().replace(' ', '')
+    filename = f"{slug}.yaml"
+    kind = _pick_kind(rng)
+
+    if kind == 'malformed':
+        return filename, _malformed(rng, name, slug)
+
+    base = rng.choice([4, 5, 8, 10, 12.5, 15, 19, 25, 49, 99, 995])
+    multiplier = rng.choice([1.5, 2, 2.5, 3, 4, 5, 10])
+    sso = round(base * multiplier, 2)
+    unit = rng.choice(_UNITS)
+    percent = f"{(sso - base) / base * 100:.0f}%"
+    base_pricing = f"${base:,} {unit}"
+    sso_pricing = f"${sso:,} {unit}"
+    pricing_source = f"https://{slug}.example.com/pricing"
+    extra = ''
+
+    if kind == 'priced-wrong-percent':
+        percent = f"{rng.randint(1, 900)}%"
+    elif kind == 'priced-unit-mismatch':
+        sso_pricing = f"${sso:,} per year"
+    elif kind == 'call-us':
+        sso_pricing = rng.choice(_CALL_US)
+        percent = '???'
+    elif kind == 'legacy-footnotes':
+        sso_pricing += '[^1]'
+        extra = (
+            "footnotes: '[^1]: SSO requires the Enterprise plan, which isn''t sold monthly.'\n"
+            f"pricing_note: {rng.choice(['Quote', 'Quote', 'From a sales call'])}\n"
+        )
+    elif kind == 'pricing-source-list':
+        pricing_source = (
+            f"\n- https://{slug}.example.com/pricing"
+            f"\n- https://docs.{slug}.example.com/sso"
+        )
+
+    if rng.random() < 0.1:
+        extra += f"vendor_note: SSO requires a minimum of {rng.randint(2, 50)} seats.\n"
+
+    content = (
+        "---\n"
+        f"base_pricing: {base_pricing}\n"
+        f"name: {name}\n"
+        f"percent_increase: {percent}\n"
+        f"pricing_source: {pricing_source}\n"
+        f"sso_pricing: {sso_pricing}\n"
+        f"updated_at: 20{rng.randint(19, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n"
+        f"vendor_url: https://{slug}.example.com\n"
+        f"{extra}"
+    )
+    return filename, content
+
+
+def generate_documents(count, seed=0):
+    """Yields (filename, content) for `count` synthetic vendors."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield vendor_document(rng, index)
+
+
+def generate_corpus(directory, count, seed=0):
+    """
+    Writes `count` synthetic vendor files into directory (created if needed).
+    Returns the list of paths written, in generation order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for filename, content in generate_documents(count, seed):
+        path = os.path.join(directory, filename)
+        with open(path, 'w') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic vendor YAML corpus.")
+    parser.add_argument("directory", help="Directory to write vendor files into.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of vendor files (default: 1000).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.directory, args.count, args.seed)
+    print(f"Wrote {len(paths)} vendor files to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark suite for the vendor scripts, run over synthetic corpora.
+
+Measures throughput (items per second, best of --repeat runs) of:
+  - extract_price           over every base/sso pricing string (cold parse cache)
+  - validate_vendor_file    per file
+  - validate_pricing.main   full CLI run over the corpus directory
+  - migrate_file            footnote migration over a fresh copy of the corpus
+  - find_duplicates         cross-file duplicate detection (records read untimed)
+
+Results are written as JSON. Pass --baseline with an earlier results file to
+fail (exit 1) when any benchmark's throughput drops by more than --tolerance.
+
+Run from the repo root:
+  python3 -m benchmarks.run --sizes 1000 10000 --out bench.json
+  python3 -m benchmarks.run --sizes 1000 10000 --baseline bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.corpus import generate_corpus
+from scripts import validate_pricing
+from scripts.duplicates import find_duplicates, read_record
+from scripts.migrate_footnotes import migrate_file
+
+_PRICING_LINE_RE = re.compile(r'^(?:base|sso)_pricing: (.*)$', re.MULTILINE)
+
+
+def _best_of(repeat, func, setup=None):
+    """Returns the fastest wall time of `repeat` calls to func, running setup untimed before each."""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_extract_price(corpus_dir, paths, repeat, jobs):
+    strs = []
+    for path in paths:
+        with open(path) as f:
+            strs.extend(_PRICING_LINE_RE.findall(f.read()))
+
+    def run():
+        for s in strs:
+            validate_pricing.extract_price(s)
+
+    return len(strs), _best_of(repeat, run, setup=validate_pricing.parse_price.cache_clear)
+
+
+def bench_validate_vendor_file(corpus_dir, paths, repeat, jobs):
+    def run():
+        for path in paths:
+            validate_pricing.validate_vendor_file(path)
+
+    return len(paths), _best_of(repeat, run)
+
+
+def bench_main(corpus_dir, paths, repeat, jobs):
+    def run():
+        argv = ['validate_pricing.py', corpus_dir, '--jobs', str(jobs)]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), patch('sys.argv', argv):
+            try:
+                validate_pricing.main()
+            except SystemExit:
+                pass
+
+    return len(paths), _best_of(repeat, run)
+
+
+def bench_migrate_footnotes(corpus_dir, paths, repeat, jobs):
+    work_dir = tempfile.mkdtemp(prefix='bench-migrate-')
+    copy_dir = os.path.join(work_dir, 'vendors')
+
+    def setup():
+        shutil.rmtree(copy_dir, ignore_errors=True)
+        shutil.copytree(corpus_dir, copy_dir)
+
+    def run():
+        for path in paths:
+            migrate_file(os.path.join(copy_dir, os.path.basename(path)))
+
+    try:
+        return len(paths), _best_of(repeat, run, setup=setup)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_find_duplicates(corpus_dir, paths, repeat, jobs):
+    records = [read_record(path) for path in paths]
+    return len(records), _best_of(repeat, lambda: find_duplicates(records))
+
+
+BENCHMARKS = {
+    'extract_price': bench_extract_price,
+    'validate_vendor_file': bench_validate_vendor_file,
+    'validate_pricing.main': bench_main,
+    'migrate_footnotes': bench_migrate_footnotes,
+    'find_duplicates': bench_find_duplicates,
+}
+
+
+def run_benchmarks(sizes, names=None, repeat=3, jobs=1, seed=0, log=print):
+    """Runs the selected benchmarks at each corpus size. Returns a list of result dicts."""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix='bench-corpus-') as tmpdir:
+            corpus_dir = os.path.join(tmpdir, '_vendors')
+            paths = generate_corpus(corpus_dir, size, seed)
+            for name in names or BENCHMARKS:
+                items, seconds = BENCHMARKS[name](corpus_dir, paths, repeat, jobs)
+                result = {
+                    'name': name,
+                    'size': size,
+                    'items': items,
+                    'seconds': seconds,
+                    'items_per_second': items / seconds if seconds else None,
+                }
+                log(f"{name:<24} {size:>9} files  {seconds:9.3f} s  {result['items_per_second']:>12,.0f} items/s")
+                results.append(result)
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    Compares results against a baseline results document.
+    Returns a list of human-readable regression descriptions.
+    """
+    previous = {(r['name'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['size']))
+        if not before or not before.get('items_per_second') or not result['items_per_second']:
+            continue
+        ratio = result['items_per_second'] / before['items_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f"{result['name']} @ {result['size']} files: "
+                f"{result['items_per_second']:,.0f} items/s vs {before['items_per_second']:,.0f} "
+                f"({(1 - ratio) * 100:.0f}% slower)"
+            )
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vendor validation and migration scripts.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000],
+                        help="Corpus sizes (number of vendor files) to benchmark at (default: 1000).")
+    parser.add_argument("--bench", choices=list(BENCHMARKS), action='append',
+                        help="Benchmark to run; repeat to select several (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the best is kept (default: 3).")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to validate_pricing.main (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed (default: 0).")
+    parser.add_argument("--out", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare throughput against.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed fractional throughput drop versus --baseline (default: 0.2).")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.bench, args.repeat, args.jobs, args.seed)
+    document = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'jobs': args.jobs,
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(document, f, indent=2)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nThroughput regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo throughput regressions.")
+
+
+if __name__ == '__main__':
+    main()
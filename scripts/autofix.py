@@ -0,0 +1,234 @@
+"""
+Automatic fixes for vendor files, used by validate_pricing.py --fix.
+
+percent_increase is rewritten (or inserted, if missing) to the value the
+prices imply, for files where a wrong or missing percentage is an error, i.e.
+the prices compare exactly (see validate_pricing.expected_percent_increase).
+Optionally the top-level keys are also sorted, the order most vendor files
+already use.
+
+Files are edited line by line rather than re-dumped from the parsed YAML, so
+quoting, comments and layout elsewhere in the file are untouched and a fix
+shows up as a one-line diff. Every edit is checked by parsing the new text:
+it must hold exactly the same fields and values as before, apart from the new
+percent_increase, or the file is left alone. Files are fixed across a process
+pool and replaced atomically.
+"""
+
+import difflib
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.migrations import atomic_write
+from scripts.validate_pricing import (
+    PERCENT_MARGIN, expected_percent_increase, load_vendor_yaml, map_files, parse_percent,
+)
+
+# Diagnostics --fix can resolve, when they are errors
+FIXABLE_CODES = frozenset({'missing-percent-increase', 'percent-mismatch'})
+
+# changed: whether the file was (or, in a dry run, would be) rewritten
+# percent: the percent_increase written, or None if it was left as it was
+# diff: unified diff text in a dry run, else None
+# error: why the file could not be fixed, or None
+FixResult = namedtuple('FixResult', ['path', 'changed', 'percent', 'diff', 'error'])
+
+# A top-level key; anything else (indented lines, block sequence items,
+# comments, blank lines) belongs to the key before it
+_TOP_LEVEL_KEY_RE = re.compile(r'(?P<key>[A-Za-z_][\w-]*)[ \t]*:(?=[ \t\r\n]|$)')
+
+_COMMENT_RE = re.compile(r'[ \t]+#.*$')
+
+
+def needs_fix(errors):
+    """Whether a file's errors include one --fix resolves."""
+    return any(d.code in FIXABLE_CODES for d in errors)
+
+
+def _line_ending(line):
+    return '\r\n' if line.endswith('\r\n') else '\n'
+
+
+def _blocks(lines):
+    """
+    Splits lines into (head, blocks, tail): the lines before the first
+    top-level key, one (key, lines) block per top-level key with the comments
+    and blank lines just above it, and trailing comments and blank lines.
+    Returns None if the text holds more than one YAML document.
+    """
+    head, blocks, pending = [], [], []
+    for line in lines:
+        stripped = line.strip()
+        if blocks and stripped in ('---', '...'):
+            return None
+        match = _TOP_LEVEL_KEY_RE.match(line)
+        if match:
+            blocks.append((match.group('key'), pending + [line]))
+            pending = []
+        elif not blocks:
+            head.append(line)
+        elif not stripped or stripped.startswith('#'):
+            pending.append(line)
+        else:
+            blocks[-1][1].extend(pending + [line])
+            pending = []
+    return head, blocks, pending
+
+
+def _join(head, blocks, tail):
+    lines = head + [line for _, block in blocks for line in block] + tail
+    # A block moved off the end of the file needs its line ending back
+    for i, line in enumerate(lines[:-1]):
+        if not line.endswith('\n'):
+            lines[i] = line + '\n'
+    return ''.join(lines)
+
+
+def set_percent_increase(text, percent):
+    """
+    Returns text with its top-level percent_increase set to `percent`%,
+    keeping a trailing comment. A missing percent_increase is inserted in
+    key order if the keys are sorted, otherwise after sso_pricing. Returns
+    None if the file's layout can't be edited line by line.
+    """
+    parts = _blocks(text.splitlines(keepends=True))
+    if parts is None:
+        return None
+    head, blocks, tail = parts
+    keys = [key for key, _ in blocks]
+    value = f"{percent}%"
+
+    if 'percent_increase' in keys:
+        index = keys.index('percent_increase')
+        block = blocks[index][1]
+        line_index = next(i for i, line in enumerate(block) if _TOP_LEVEL_KEY_RE.match(line))
+        line = block[line_index]
+        old_value = line.split(':', 1)[1]
+        comment = _COMMENT_RE.search(old_value.rstrip('\r\n'))
+        keep_comment = comment and not any(quote in old_value[:comment.start()] for quote in '\'"')
+        ending = _line_ending(line) if line.endswith('\n') else ''
+        rewritten = f"percent_increase: {value}{comment.group(0) if keep_comment else ''}{ending}"
+        # A value continued onto further lines is replaced as a whole
+        end = line_index + 1
+        while end < len(block) and block[end][:1] in (' ', '\t'):
+            end += 1
+        blocks[index] = ('percent_increase', block[:line_index] + [rewritten] + block[end:])
+        return _join(head, blocks, tail)
+
+    if 'sso_pricing' not in keys:
+        return None
+    newline = _line_ending(blocks[0][1][-1])
+    block = ('percent_increase', [f"percent_increase: {value}{newline}"])
+    if keys == sorted(keys):
+        index = next((i for i, key in enumerate(keys) if key > 'percent_increase'), len(keys))
+    else:
+        index = keys.index('sso_pricing') + 1
+    blocks.insert(index, block)
+    return _join(head, blocks, tail)
+
+
+def sort_top_level_keys(text):
+    """
+    Returns text with its top-level keys in sorted order, each moved with its
+    value and the comments just above it. Returns None if the file's layout
+    can't be edited line by line.
+    """
+    parts = _blocks(text.splitlines(keepends=True))
+    if parts is None:
+        return None
+    head, blocks, tail = parts
+    return _join(head, sorted(blocks, key=lambda block: block[0]), tail)
+
+
+def fix_text(text, sort_keys=False, percent_required=False):
+    """
+    Fixes one file's text. Returns (new_text, percent): new_text is `text`
+    itself if nothing changed, and percent is the percent_increase written
+    (None if it was left alone). Raises ValueError if the file can't be
+    parsed, an edit would change anything but what was fixed, or
+    percent_required is set (the file was reported with a fixable error) but
+    the prices don't imply a percent_increase.
+    """
+    try:
+        data = load_vendor_yaml(text)
+    except Exception as e:
+        raise ValueError(f"cannot parse: {e}") from None
+    if not isinstance(data, dict):
+        raise ValueError("not a mapping of fields")
+
+    fixed = text
+    percent = expected_percent_increase(data)
+    if percent is None and percent_required:
+        raise ValueError("percent_increase can't be worked out exactly from the prices "
+                         "(they differ in currency or units, or can't be compared)")
+    provided = parse_percent(data.get('percent_increase'))
+    if percent is not None and (provided is None or abs(percent - provided) > PERCENT_MARGIN):
+        fixed = set_percent_increase(fixed, percent)
+        if fixed is None:
+            raise ValueError("percent_increase can't be edited in place")
+    else:
+        percent = None
+    if sort_keys:
+        fixed = sort_top_level_keys(fixed)
+        if fixed is None:
+            raise ValueError("keys can't be sorted in place")
+    if fixed == text:
+        return text, None
+
+    expected = dict(data)
+    if percent is not None:
+        expected['percent_increase'] = f"{percent}%"
+    try:
+        result = load_vendor_yaml(fixed)
+    except Exception:
+        result = None
+    if result != expected or (sort_keys and list(result) != sorted(result)):
+        raise ValueError("editing the file in place would change other fields")
+    return fixed, percent
+
+
+def fix_file(path, sort_keys=False, dry_run=False, percent_required=False):
+    """
+    Fixes one file, replacing it atomically if anything changed. Returns a
+    FixResult; in a dry run the file is left alone and the result carries the
+    unified diff instead. See fix_text for percent_required.
+    """
+    try:
+        with open(path, 'r', newline='') as f:
+            original = f.read()
+        fixed, percent = fix_text(original, sort_keys, percent_required)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return FixResult(path, False, None, None, str(e))
+    changed = fixed != original
+    diff = None
+    if changed and dry_run:
+        diff = ''.join(
+            line if line.endswith('\n') else line + '\n\\ No newline at end of file\n'
+            for line in difflib.unified_diff(
+                original.splitlines(keepends=True), fixed.splitlines(keepends=True), fromfile=path, tofile=path,
+            )
+        )
+    elif changed:
+        atomic_write(path, fixed)
+    return FixResult(path, changed, percent, diff, None)
+
+
+def _fix_item(item, sort_keys, dry_run):
+    """Worker: fix_file for a (path, percent_required) pair."""
+    path, percent_required = item
+    return fix_file(path, sort_keys, dry_run, percent_required)
+
+
+def fix_files(filepaths, jobs=1, sort_keys=False, dry_run=False, fixable=()):
+    """
+    Fixes each file across `jobs` worker processes. Files in `fixable` were
+    reported with a fixable error, so leaving their percent_increase alone is
+    an error. Returns FixResults in the same order.
+    """
+    fixable = set(fixable)
+    items = [(path, path in fixable) for path in filepaths]
+    return map_files(partial(_fix_item, sort_keys=sort_keys, dry_run=dry_run), items, jobs)
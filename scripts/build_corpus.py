@@ -0,0 +1,336 @@
+"""
+Compile the vendor YAML files into a single SQLite artifact for downstream
+consumers (site data, dashboards, ad-hoc scripts), with the parsed price
+fields already filled in and each file's validation results attached.
+
+Rebuilds are incremental: a file is only re-parsed if its mtime or size has
+changed and its content hash differs from the stored one. Files that no longer
+exist are dropped. A change to the validator or rule set (see
+validate_pricing.rules_fingerprint) triggers a full rebuild.
+
+Run from the repo root:
+  python3 scripts/build_corpus.py _vendors
+  python3 scripts/build_corpus.py _vendors --out build/vendors.sqlite
+
+Then, from Python:
+  from scripts.build_corpus import load_corpus
+  vendors = load_corpus('build/vendors.sqlite')
+
+Amounts are stored as written; to compare them across vendors, convert a
+whole column at once with currency.convert_many:
+  columns = load_columns('build/vendors.sqlite', ['sso_amount', 'sso_currency_code'])
+  sso_usd = convert_many(columns['sso_amount'], columns['sso_currency_code'], 'USD', default='USD')
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.currency import detect_currency
+from scripts.validate_pricing import (
+    clean_pricing, find_vendor_files, map_files, parse_percent, parse_price, positive_number, rules_fingerprint,
+    validate_vendor_document,
+)
+
+DEFAULT_CORPUS_PATH = os.path.join('build', 'vendors.sqlite')
+
+# Bump when the table layout or the meaning of a column changes.
+ARTIFACT_VERSION = 2
+
+# Column name -> SQLite type. 'path' is the primary key.
+COLUMNS = {
+    'path': 'TEXT PRIMARY KEY',
+    'mtime_ns': 'INTEGER',
+    'size': 'INTEGER',
+    'sha256': 'TEXT',
+    'name': 'TEXT',
+    'vendor_url': 'TEXT',
+    'updated_at': 'TEXT',
+    'base_pricing': 'TEXT',
+    'sso_pricing': 'TEXT',
+    'percent_increase': 'TEXT',
+    'base_currency': 'TEXT',
+    'base_currency_code': 'TEXT',   # ISO 4217, see currency.detect_currency
+    'base_amount': 'REAL',
+    'base_unit': 'TEXT',
+    'base_period': 'TEXT',
+    'sso_currency': 'TEXT',
+    'sso_currency_code': 'TEXT',
+    'sso_amount': 'REAL',
+    'sso_unit': 'TEXT',
+    'sso_period': 'TEXT',
+    'call_us': 'INTEGER',
+    'percent_value': 'REAL',
+    'pricing_source': 'TEXT',       # JSON list of strings
+    'vendor_note': 'TEXT',
+    'pricing_source_info': 'TEXT',
+    'valid': 'INTEGER',
+    'errors': 'TEXT',               # JSON list of diagnostic dicts
+    'warnings': 'TEXT',             # JSON list of diagnostic dicts
+}
+
+_JSON_COLUMNS = ('pricing_source', 'errors', 'warnings')
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def vendor_row(path, raw, stat):
+    """
+    Parses and validates one vendor file's raw bytes.
+    Returns (row, document): a dict keyed by COLUMNS, and the whole parsed YAML
+    document as JSON (None if it could not be parsed).
+    """
+    data, warnings, errors = validate_vendor_document(raw)
+    row = dict.fromkeys(COLUMNS)
+    row.update({
+        'path': path,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'valid': int(not errors),
+        'errors': json.dumps([d.to_dict() for d in errors]),
+        'warnings': json.dumps([d.to_dict() for d in warnings]),
+    })
+    if not isinstance(data, dict):
+        return row, None
+
+    base_pricing = clean_pricing(data.get('base_pricing'))
+    sso_pricing = clean_pricing(data.get('sso_pricing'))
+    base = parse_price(base_pricing) if base_pricing else None
+    sso = parse_price(sso_pricing) if sso_pricing else None
+    pricing_source = data.get('pricing_source')
+    if pricing_source is not None and not isinstance(pricing_source, list):
+        pricing_source = [pricing_source]
+
+    row.update({
+        'name': _text(data.get('name')),
+        'vendor_url': _text(data.get('vendor_url')),
+        'updated_at': _text(data.get('updated_at')),
+        'base_pricing': base_pricing,
+        'sso_pricing': sso_pricing,
+        'percent_increase': _text(data.get('percent_increase')),
+        'call_us': int(bool(sso and sso.call_us)),
+        'percent_value': parse_percent(data.get('percent_increase')),
+        'pricing_source': json.dumps([_text(src) for src in pricing_source]) if pricing_source else None,
+        'vendor_note': _text(data.get('vendor_note')),
+        'pricing_source_info': _text(data.get('pricing_source_info')),
+    })
+    for prefix, price, pricing in (('base', base, base_pricing), ('sso', sso, sso_pricing)):
+        if price is not None:
+            row[f'{prefix}_currency'] = price.currency
+            row[f'{prefix}_currency_code'] = detect_currency(pricing)
+            row[f'{prefix}_amount'] = price.amount
+            row[f'{prefix}_unit'] = price.unit
+            row[f'{prefix}_period'] = price.period
+    return row, json.dumps(data, default=str)
+
+
+def _compile_vendor_file(item):
+    """
+    Worker: (path, stored_sha256) -> ('row', row, document), ('touch', path,
+    mtime_ns, size) if the content is unchanged, or ('gone', path) if the file
+    vanished mid-build.
+    """
+    path, stored_sha = item
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+            stat = os.fstat(f.fileno())
+    except FileNotFoundError:
+        return ('gone', path)
+    if stored_sha is not None and hashlib.sha256(raw).hexdigest() == stored_sha:
+        return ('touch', path, stat.st_mtime_ns, stat.st_size)
+    return ('row', *vendor_row(path, raw, stat))
+
+
+def artifact_fingerprint():
+    """Identifies the validator, rule set and artifact layout the stored rows were built with."""
+    return f"{ARTIFACT_VERSION}:{rules_fingerprint()}"
+
+
+def _create_tables(conn):
+    # WITHOUT ROWID stores rows in path order, so full loads are one sequential
+    # scan. The bulky raw documents live in their own table to keep it narrow.
+    columns = ', '.join(f"{name} {kind}" for name, kind in COLUMNS.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS vendors ({columns}) WITHOUT ROWID")
+    conn.execute("CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, document TEXT) WITHOUT ROWID")
+
+
+def build_corpus(paths, db_path=DEFAULT_CORPUS_PATH, jobs=1):
+    """
+    Brings the artifact at db_path up to date with the vendor files under paths.
+    Returns a dict of counts: added, updated, unchanged, removed, and skipped
+    (paths that were neither vendor files nor directories).
+    """
+    filepaths, skipped = find_vendor_files(paths)
+    filepaths = list(dict.fromkeys(os.path.normpath(p) for p in filepaths))
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'skipped': len(skipped)}
+    try:
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            fingerprint = artifact_fingerprint()
+            stored_fingerprint = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if stored_fingerprint is None or stored_fingerprint[0] != fingerprint:
+                # Built by another validator or layout: start over
+                conn.execute("DROP TABLE IF EXISTS vendors")
+                conn.execute("DROP TABLE IF EXISTS documents")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+            _create_tables(conn)
+
+            stored = {
+                path: (mtime_ns, size, sha)
+                for path, mtime_ns, size, sha in conn.execute("SELECT path, mtime_ns, size, sha256 FROM vendors")
+            }
+
+            pending = []
+            present = set(filepaths)
+            for path in filepaths:
+                previous = stored.get(path)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    # Deleted since discovery; its old row goes below
+                    present.discard(path)
+                    continue
+                if previous and previous[:2] == (st.st_mtime_ns, st.st_size):
+                    stats['unchanged'] += 1
+                else:
+                    pending.append((path, previous[2] if previous else None))
+
+            placeholders = ', '.join('?' for _ in COLUMNS)
+            insert = f"INSERT OR REPLACE INTO vendors ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+            for result in map_files(_compile_vendor_file, pending, jobs):
+                if result[0] == 'row':
+                    _, row, document = result
+                    stats['updated' if row['path'] in stored else 'added'] += 1
+                    conn.execute(insert, [row[name] for name in COLUMNS])
+                    conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?)", (row['path'], document))
+                elif result[0] == 'touch':
+                    _, path, mtime_ns, size = result
+                    stats['unchanged'] += 1
+                    conn.execute("UPDATE vendors SET mtime_ns = ?, size = ? WHERE path = ?", (mtime_ns, size, path))
+                else:
+                    present.discard(result[1])
+
+            removed = [path for path in stored if path not in present]
+            conn.executemany("DELETE FROM vendors WHERE path = ?", [(path,) for path in removed])
+            conn.executemany("DELETE FROM documents WHERE path = ?", [(path,) for path in removed])
+            stats['removed'] = len(removed)
+    finally:
+        conn.close()
+    return stats
+
+
+def _select(db_path, columns):
+    selected = list(columns or COLUMNS)
+    unknown = set(selected) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown corpus column(s): {', '.join(sorted(unknown))}")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return selected, conn.execute(f"SELECT {', '.join(selected)} FROM vendors ORDER BY path").fetchall()
+    finally:
+        conn.close()
+
+def load_columns(db_path=DEFAULT_CORPUS_PATH, columns=None):
+    """
+    Loads vendors from an artifact column-wise: {column: [value, ...]}, ordered
+    by path. JSON columns are left as JSON text. This is the fastest way to read
+    a few fields across the whole corpus.
+    """
+    selected, rows = _select(db_path, columns)
+    if not rows:
+        return {name: [] for name in selected}
+    return dict(zip(selected, map(list, zip(*rows))))
+
+def load_documents(db_path=DEFAULT_CORPUS_PATH):
+    """Returns {path: parsed YAML document} for every vendor that parsed."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT path, document FROM documents WHERE document IS NOT NULL").fetchall()
+    finally:
+        conn.close()
+    return {path: json.loads(document) for path, document in rows}
+
+def load_corpus(db_path=DEFAULT_CORPUS_PATH, columns=None):
+    """
+    Loads vendors from an artifact as a list of dicts, ordered by path.
+    JSON columns are decoded. Pass `columns` to fetch only some of them.
+    """
+    selected, rows = _select(db_path, columns)
+    decode = [(i, name) for i, name in enumerate(selected) if name in _JSON_COLUMNS]
+    vendors = []
+    for values in rows:
+        vendor = dict(zip(selected, values))
+        for i, name in decode:
+            if values[i] is not None:
+                vendor[name] = json.loads(values[i])
+        vendors.append(vendor)
+    return vendors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile vendor YAML files into a SQLite corpus artifact.")
+    parser.add_argument("paths", nargs='+', help="Vendor YAML files or directories containing them.")
+    parser.add_argument("--out", default=DEFAULT_CORPUS_PATH,
+                        help=f"Artifact path (default: {DEFAULT_CORPUS_PATH}).")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to parse changed files with (default: number of CPUs).")
+    parser.add_argument("--stats", action="store_true",
+                        help="After compiling, print corpus-wide statistics: SSO markup distribution, "
+                             "Call Us share, staleness of updated_at and outlying percentages. Needs numpy.")
+    parser.add_argument("--stats-out", metavar="PATH",
+                        help="With --stats, also export the per-vendor columns to PATH "
+                             "(.csv, .npz, or .parquet with pyarrow installed).")
+    parser.add_argument("--stats-format", choices=['text', 'json'], default='text',
+                        help="With --stats, print the statistics as text (default) or JSON.")
+    args = parser.parse_args()
+
+    if (args.stats_out or args.stats_format != 'text') and not args.stats:
+        parser.error("--stats-out and --stats-format require --stats")
+    if args.stats:
+        try:
+            from scripts import corpus_stats
+        except ImportError as e:
+            parser.error(f"--stats needs numpy ({e})")
+        extension = os.path.splitext(args.stats_out or '')[1].lower()
+        if args.stats_out and extension not in corpus_stats.EXPORT_FORMATS:
+            parser.error(f"--stats-out must end in one of {', '.join(corpus_stats.EXPORT_FORMATS)}")
+        if extension == '.parquet' and importlib.util.find_spec('pyarrow') is None:
+            parser.error("--stats-out: writing Parquet needs pyarrow; use .csv or .npz instead")
+
+    # Keep stdout parseable when it carries JSON statistics
+    log = sys.stderr if args.stats_format == 'json' else sys.stdout
+    stats = build_corpus(args.paths, args.out, jobs=args.jobs)
+    print(
+        f"Compiled {args.out}: {stats['added']} added, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed.", file=log,
+    )
+    if stats['skipped']:
+        print(f"Skipped {stats['skipped']} path(s) that are not vendor files or directories.", file=log)
+
+    if args.stats:
+        arrays = corpus_stats.load_arrays(args.out)
+        report = corpus_stats.corpus_stats(arrays)
+        if args.stats_format == 'json':
+            print(json.dumps(report, indent=2))
+        else:
+            print()
+            corpus_stats.print_stats(report)
+        if args.stats_out:
+            corpus_stats.export_arrays(arrays, args.stats_out)
+            print(f"Exported per-vendor columns to {args.stats_out}", file=log)
+
+if __name__ == '__main__':
+    main()
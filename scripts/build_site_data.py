@@ -0,0 +1,162 @@
+"""
+Generate _data/vendors.json for the Jekyll site.
+
+Vendors are classified into the priced table ("vendors") and the "Quotes
+Required" table ("call_us") with the same is_call_us rule the validator uses,
+sorted by name, and given numeric base/SSO/increase fields, so index.md only
+has to iterate. The numbers become the tables' data-sort keys, and a name
+search index (see search_index) is built alongside, so sort.js and search.js
+never parse cell text. Parsing goes through the incremental corpus artifact (see
+build_corpus.py), so only changed vendor files are re-read. Files the
+validator rejects (e.g. duplicate keys) are still published the way Jekyll
+would read them, last key winning.
+
+Run from the repo root before building the site:
+  python3 scripts/build_site_data.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.build_corpus import DEFAULT_CORPUS_PATH, build_corpus, load_columns, load_documents
+from scripts.validate_pricing import clean_pricing, is_call_us, parse_percent, parse_price, positive_number
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+VENDORS_DIR = os.path.join(REPO_ROOT, '_vendors')
+DEFAULT_SITE_DATA_PATH = os.path.join(REPO_ROOT, '_data', 'vendors.json')
+
+# Fields index.md renders, copied verbatim from the YAML
+DISPLAY_FIELDS = (
+    'name', 'vendor_url', 'vendor_note', 'base_pricing', 'sso_pricing',
+    'percent_increase', 'pricing_source_info', 'updated_at',
+)
+
+# Longest name substring the search index holds; longer queries are looked up
+# by their rarest substring of this length and confirmed against the name
+SEARCH_GRAM_SIZE = 3
+
+
+def _natural_key(vendor):
+    # Matches Liquid's sort_natural: case-insensitive, missing names last
+    name = vendor.get('name')
+    return (name is None, str(name).lower() if name is not None else '')
+
+
+def _amount(value):
+    value = clean_pricing(value)
+    return parse_price(value).amount if value else None
+
+
+def search_name(name):
+    """Normalizes a vendor name the way search.js normalizes queries."""
+    return ' '.join(str(name).lower().split()) if name is not None else ''
+
+
+def _lenient_document(path):
+    # What Jekyll renders for files the strict loader rejects
+    try:
+        with open(path) as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def site_vendor(document):
+    """Builds the record index.md renders for one vendor."""
+    vendor = {field: document.get(field) for field in DISPLAY_FIELDS}
+    pricing_source = document.get('pricing_source')
+    if pricing_source is None:
+        vendor['pricing_source'] = []
+    elif isinstance(pricing_source, list):
+        vendor['pricing_source'] = pricing_source
+    else:
+        vendor['pricing_source'] = [pricing_source]
+    vendor['base_amount'] = _amount(document.get('base_pricing'))
+    vendor['sso_amount'] = _amount(document.get('sso_pricing'))
+    vendor['percent_value'] = parse_percent(document.get('percent_increase'))
+    vendor['search_name'] = search_name(vendor['name'])
+    return vendor
+
+
+def search_index(vendors):
+    """
+    Returns the index search.js filters rows with: each row's search_name, and
+    every substring of up to SEARCH_GRAM_SIZE characters mapped to the
+    ascending ids of the rows whose names contain it. A row's id is its
+    position in `vendors`.
+    """
+    names = [vendor['search_name'] for vendor in vendors]
+    grams = {}
+    for row, name in enumerate(names):
+        substrings = {
+            name[start:start + size]
+            for size in range(1, SEARCH_GRAM_SIZE + 1)
+            for start in range(len(name) - size + 1)
+        }
+        for gram in substrings:
+            grams.setdefault(gram, []).append(row)
+    return {'gram_size': SEARCH_GRAM_SIZE, 'names': names, 'grams': dict(sorted(grams.items()))}
+
+
+def site_data(corpus_path):
+    """
+    Returns {'vendors': [...], 'call_us': [...], 'search': {...}} from a corpus
+    artifact. Search row ids number the priced table's rows first, then the
+    "Quotes Required" table's.
+    """
+    documents = load_documents(corpus_path)
+    data = {'vendors': [], 'call_us': []}
+    for path in load_columns(corpus_path, ['path'])['path']:
+        document = documents.get(path) or _lenient_document(path)
+        if document is None:
+            # Not valid YAML at all; Jekyll could not render it either
+            continue
+        sso_pricing = clean_pricing(document.get('sso_pricing'))
+        table = 'call_us' if sso_pricing and is_call_us(sso_pricing) else 'vendors'
+        data[table].append(site_vendor(document))
+    for vendors in data.values():
+        vendors.sort(key=_natural_key)
+    data['search'] = search_index(data['vendors'] + data['call_us'])
+    return data
+
+
+def write_site_data(data, out_path):
+    """Writes the site data atomically, so a concurrent `jekyll serve` never reads half a file."""
+    directory = os.path.dirname(out_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.vendors.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate _data/vendors.json for the Jekyll site.")
+    parser.add_argument("--vendors", default=VENDORS_DIR, help="Vendor YAML directory (default: _vendors).")
+    parser.add_argument("--corpus", default=os.path.join(REPO_ROOT, DEFAULT_CORPUS_PATH),
+                        help=f"Corpus artifact to update and read (default: {DEFAULT_CORPUS_PATH}).")
+    parser.add_argument("--out", default=DEFAULT_SITE_DATA_PATH,
+                        help="Output path (default: _data/vendors.json).")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to parse changed files with (default: number of CPUs).")
+    args = parser.parse_args()
+
+    build_corpus([args.vendors], args.corpus, jobs=args.jobs)
+    data = site_data(args.corpus)
+    write_site_data(data, args.out)
+    print(f"Wrote {args.out}: {len(data['vendors'])} priced vendors, {len(data['call_us'])} quotes required.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,547 @@
+"""
+Check that every vendor_url and pricing_source link in the vendor files still
+resolves.
+
+URLs are collected from all vendor files and deduplicated (fragments
+ignored), then checked concurrently with asyncio over a small HTTP/1.1 client
+built on the standard library:
+  - connections are kept alive and pooled per host, with a per-host limit on
+    concurrent requests as well as a global one
+  - each URL is tried with HEAD first, falling back to GET when the server
+    rejects HEAD; redirects are followed
+  - timeouts, connection failures, 429 and 5xx responses are retried with
+    exponential backoff (honouring Retry-After). A host that asks to slow down
+    is paused for all of its requests, not just the one that was refused
+  - with --cache, ETag / Last-Modified validators from earlier runs are sent
+    as If-None-Match / If-Modified-Since, so unchanged pages answer 304
+
+Failures are reported as diagnostics on every vendor file that uses the link,
+in the same text and jsonl formats as validate_pricing.py. A 404 or 410 is an
+error; anything else (other HTTP errors, timeouts, DNS or TLS failures) is a
+warning, since it is often temporary.
+
+Run from the repo root:
+  python3 scripts/check_links.py
+  python3 scripts/check_links.py _vendors --cache --format jsonl
+  python3 scripts/check_links.py _vendors --cache --cache-path /tmp/links.json
+"""
+
+import argparse
+import asyncio
+import http
+import json
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urldefrag, urljoin, urlsplit
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    _SafeLoader = yaml.SafeLoader
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.validate_pricing import (
+    Diagnostic, exit_code, find_vendor_files, positive_number, print_jsonl_report, print_text_report,
+)
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'check_links.json')
+
+# Bump when the shape of cache entries changes.
+CACHE_FORMAT_VERSION = 1
+
+LINK_FIELDS = ('vendor_url', 'pricing_source')
+
+USER_AGENT = 'sso-wall-of-shame-link-checker/1.0 (+https://sso.tax)'
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_PER_HOST = 2
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 1.0
+
+# Longest Retry-After we are willing to wait, in seconds
+MAX_RETRY_AFTER = 60.0
+
+MAX_REDIRECTS = 5
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BROKEN_STATUSES = {404, 410}
+
+# Response bodies up to this size are read off the wire so the connection can
+# be reused; bigger or unsized ones are abandoned with their connection
+_MAX_DRAIN = 64 * 1024
+
+# status: final HTTP status (304 if the cached validators still matched), or
+#         None if no response was received
+# final_url: URL after redirects; error: why the check failed, or None
+# from_cache: True if the server answered 304 Not Modified
+LinkResult = namedtuple('LinkResult', ['url', 'status', 'final_url', 'error', 'from_cache'])
+
+
+class HTTPProtocolError(Exception):
+    """Raised when a server's response is not valid HTTP/1.x."""
+
+
+def _load_links(path):
+    try:
+        with open(path, 'rb') as f:
+            data = yaml.load(f, Loader=_SafeLoader)
+    except (OSError, yaml.YAMLError):
+        return []
+    if not isinstance(data, dict):
+        return []
+    links = []
+    for field in LINK_FIELDS:
+        values = data.get(field)
+        for value in values if isinstance(values, list) else [values]:
+            if isinstance(value, str) and value.strip().lower().startswith(('http://', 'https://')):
+                links.append((field, value.strip()))
+    return links
+
+
+def collect_links(filepaths):
+    """
+    Returns {url: [(path, field), ...]} for every http(s) link in the given
+    vendor files, each URL once (fragments dropped), in first-seen order.
+    """
+    links = {}
+    for path in filepaths:
+        for field, url in _load_links(path):
+            uses = links.setdefault(urldefrag(url).url, [])
+            if (path, field) not in uses:
+                uses.append((path, field))
+    return links
+
+
+class LinkCache:
+    """
+    Persistent {url: validators} from earlier runs, stored as JSON: the ETag
+    and Last-Modified of the last successful response, and when it was seen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(stored, dict) and stored.get('version') == CACHE_FORMAT_VERSION:
+            self.entries = stored.get('entries') or {}
+
+    def conditional_headers(self, url):
+        """Returns the If-None-Match / If-Modified-Since headers to revalidate url with."""
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def update(self, url, result, headers):
+        if result.error is not None:
+            self.entries.pop(url, None)
+        elif result.status != 304:
+            etag, last_modified = headers.get('etag'), headers.get('last-modified')
+            if etag or last_modified:
+                self.entries[url] = {
+                    'etag': etag, 'last_modified': last_modified,
+                    'status': result.status, 'checked_at': int(time.time()),
+                }
+            else:
+                self.entries.pop(url, None)
+        elif url in self.entries:
+            self.entries[url]['checked_at'] = int(time.time())
+
+    def save(self):
+        """Writes the cache atomically so an interrupted run never leaves a torn file."""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.check_links_cache.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class _Connection:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class HostPool:
+    """Keep-alive connections to one (scheme, host, port), at most `limit` in use at once."""
+
+    def __init__(self, scheme, host, port, limit, ssl_context=None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.limit = limit
+        self.ssl_context = ssl_context
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = []
+        self.opened = 0
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        """Holds back every request to this host for `seconds` (backoff)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def wait_turn(self):
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def connect(self, fresh=False):
+        """Returns (connection, reused)."""
+        while self.idle and not fresh:
+            connection = self.idle.pop()
+            if not connection.reader.at_eof():
+                return connection, True
+            connection.close()
+        if self.scheme == 'https':
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl_context or ssl.create_default_context(),
+                server_hostname=self.host,
+            )
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.opened += 1
+        return _Connection(reader, writer), False
+
+    def release(self, connection, reusable):
+        if reusable and len(self.idle) < self.limit:
+            self.idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+        self.idle = []
+
+
+def _parse_head(head):
+    lines = head.decode('latin-1').split('\r\n')
+    version, _, rest = lines[0].partition(' ')
+    if not version.startswith('HTTP/1.'):
+        raise HTTPProtocolError(f"bad status line {lines[0][:80]!r}")
+    try:
+        status = int(rest[:3])
+    except ValueError:
+        raise HTTPProtocolError(f"bad status line {lines[0][:80]!r}") from None
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            name = name.strip().lower()
+            headers[name] = f"{headers[name]}, {value.strip()}" if name in headers else value.strip()
+    return version, status, headers
+
+
+def _retry_after(headers):
+    value = headers.get('retry-after')
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class LinkChecker:
+    """
+    Checks URLs concurrently over pooled connections. Use as an async context
+    manager so pooled connections are closed:
+
+      async with LinkChecker(cache=LinkCache(path)) as checker:
+          results = await checker.check_all(urls)
+    """
+
+    def __init__(self, cache=None, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, ssl_context=None):
+        self.cache = cache
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.ssl_context = ssl_context
+        self.pools = {}
+        self._concurrency = concurrency
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    def _pool(self, parts):
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = HostPool(parts.scheme, parts.hostname, port, self.per_host, self.ssl_context)
+        return pool
+
+    async def _exchange(self, connection, method, target, host_header, headers):
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host_header}", f"User-Agent: {USER_AGENT}",
+                 "Accept: */*", "Accept-Encoding: identity", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        connection.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await connection.writer.drain()
+
+        while True:
+            try:
+                head = await connection.reader.readuntil(b'\r\n\r\n')
+            except asyncio.LimitOverrunError:
+                raise HTTPProtocolError("response headers too long") from None
+            version, status, response_headers = _parse_head(head)
+            if not 100 <= status < 200:
+                break
+
+        reusable = version == 'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if method != 'HEAD' and status not in (204, 304):
+            length = response_headers.get('content-length', '')
+            if 'transfer-encoding' not in response_headers and length.isdigit() and int(length) <= _MAX_DRAIN:
+                await connection.reader.readexactly(int(length))
+            else:
+                reusable = False
+        return status, response_headers, reusable
+
+    async def _request(self, method, url, headers):
+        """Sends one request. Returns (status, headers); raises on network or protocol failure."""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HTTPProtocolError(f"unsupported URL {url!r}")
+        target = quote(parts.path or '/', safe="/%:@!$&'()*+,;=~") + (
+            '?' + quote(parts.query, safe="/%:@!$&'()*+,;=~?") if parts.query else ''
+        )
+        host_header = parts.netloc.rpartition('@')[2].encode('idna').decode('ascii')
+        pool = self._pool(parts)
+
+        async def attempt():
+            # A kept-alive connection may have been closed by the server while
+            # idle; retry once on a fresh connection before giving up
+            for fresh in (False, True):
+                connection, reused = await pool.connect(fresh)
+                try:
+                    status, response_headers, reusable = await self._exchange(
+                        connection, method, target, host_header, headers,
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    connection.close()
+                    raise
+                pool.release(connection, reusable)
+                return status, response_headers
+
+        async with pool.semaphore:
+            await pool.wait_turn()
+            # Time spent queueing for the host doesn't count against the timeout
+            return await asyncio.wait_for(attempt(), self.timeout)
+
+    async def _request_with_retries(self, method, url, headers):
+        pool = self._pool(urlsplit(url))
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                status, response_headers = await self._request(method, url, headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HTTPProtocolError) as e:
+                # Unknown hosts, TLS failures and bad responses won't fix themselves
+                if attempt == self.retries or isinstance(e, (HTTPProtocolError, ssl.SSLError, socket.gaierror)):
+                    raise
+            else:
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    return status, response_headers
+                delay = max(delay, _retry_after(response_headers))
+            pool.pause(delay)
+
+    async def _fetch(self, method, url, headers):
+        """Follows redirects. Returns (status, headers, final_url)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers = await self._request_with_retries(method, url, headers)
+            location = response_headers.get('location')
+            if status not in REDIRECT_STATUSES or not location:
+                return status, response_headers, url
+            url = urldefrag(urljoin(url, location)).url
+        raise HTTPProtocolError(f"more than {MAX_REDIRECTS} redirects")
+
+    async def check(self, url):
+        """Checks one URL. Never raises for network failures; they are reported in the LinkResult."""
+        headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+        response_headers = {}
+        try:
+            status, response_headers, final_url = await self._fetch('HEAD', url, headers)
+            if status >= 400 and status not in RETRY_STATUSES:
+                # Plenty of servers refuse or mishandle HEAD; ask again properly
+                status, response_headers, final_url = await self._fetch('GET', url, headers)
+            error = None if status < 400 else f"HTTP {status} ({_reason(status)})"
+            result = LinkResult(url, status, final_url, error, status == 304)
+        except asyncio.TimeoutError:
+            result = LinkResult(url, None, None, f"timed out after {self.timeout:g}s", False)
+        except (OSError, asyncio.IncompleteReadError, HTTPProtocolError, UnicodeError) as e:
+            result = LinkResult(url, None, None, _describe(e), False)
+        if self.cache is not None:
+            if result.from_cache and url not in self.cache.entries:
+                # 304 to validators we never sent: treat as a plain success
+                result = result._replace(from_cache=False)
+            self.cache.update(url, result, response_headers)
+        return result
+
+    async def check_all(self, urls):
+        """Checks urls concurrently. Returns {url: LinkResult} in input order."""
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def limited(url):
+            async with self._semaphore:
+                return await self.check(url)
+
+        results = await asyncio.gather(*(limited(url) for url in urls))
+        return dict(zip(urls, results))
+
+
+def _reason(status):
+    try:
+        return http.HTTPStatus(status).phrase
+    except ValueError:
+        return 'unknown status'
+
+
+def _describe(error):
+    if isinstance(error, asyncio.IncompleteReadError):
+        return "connection closed mid-response"
+    if isinstance(error, ssl.SSLError):
+        return f"TLS error: {error.reason or error}"
+    if isinstance(error, socket.gaierror):
+        return "host name could not be resolved"
+    return str(error) or error.__class__.__name__
+
+
+def link_diagnostics(links, link_results, filepaths):
+    """
+    Turns link results into {path: (errors, warnings)} for every vendor file,
+    ready for validate_pricing's report printers.
+    """
+    results = {path: ([], []) for path in filepaths}
+    for url, uses in links.items():
+        result = link_results[url]
+        if result.error is None:
+            continue
+        broken = result.status in BROKEN_STATUSES
+        for path, field in uses:
+            errors, warnings = results[path]
+            message = f"{field} link {url} is broken: {result.error}." if broken else \
+                f"{field} link {url} could not be checked: {result.error}."
+            if broken:
+                errors.append(Diagnostic(message, 'broken-link', 'error', field))
+            else:
+                warnings.append(Diagnostic(message, 'link-check-failed', 'warning', field))
+    return results
+
+
+def check_links(paths, cache=None, **options):
+    """
+    Checks every link in the vendor files under paths. Returns (results,
+    link_results, skipped): diagnostics per file, LinkResult per URL, and the
+    paths that were neither vendor files nor directories.
+    """
+    filepaths, skipped = find_vendor_files(paths)
+    links = collect_links(filepaths)
+
+    async def run():
+        async with LinkChecker(cache=cache, **options) as checker:
+            return await checker.check_all(list(links))
+
+    link_results = asyncio.run(run())
+    return link_diagnostics(links, link_results, filepaths), link_results, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check vendor_url and pricing_source links in vendor files.")
+    parser.add_argument("paths", nargs='*', default=['_vendors'],
+                        help="Vendor YAML files or directories containing them (default: _vendors).")
+    parser.add_argument("--cache", action="store_true",
+                        help="Remember ETag / Last-Modified validators between runs and revalidate "
+                             "with conditional requests.")
+    parser.add_argument("--cache-path", metavar="PATH",
+                        help=f"With --cache, where to store the validators (default: {DEFAULT_CACHE_PATH}).")
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text',
+                        help="Output format: human-readable text (default) or one JSON object per line.")
+    parser.add_argument("--fail-on-warnings", action="store_true",
+                        help="Exit with error code if any link could not be checked.")
+    parser.add_argument("--concurrency", type=positive_number(int), default=DEFAULT_CONCURRENCY,
+                        help=f"Requests in flight across all hosts (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--per-host", type=positive_number(int), default=DEFAULT_PER_HOST,
+                        help=f"Requests in flight, and pooled connections, per host (default: {DEFAULT_PER_HOST}).")
+    parser.add_argument("--timeout", type=positive_number(float), default=DEFAULT_TIMEOUT,
+                        help=f"Seconds to wait for each response (default: {DEFAULT_TIMEOUT:g}).")
+    parser.add_argument("--retries", type=positive_number(int, allow_zero=True), default=DEFAULT_RETRIES,
+                        help=f"Retries after a timeout, connection failure, 429 or 5xx (default: {DEFAULT_RETRIES}).")
+    args = parser.parse_args()
+    if args.cache_path and not args.cache:
+        parser.error("--cache-path requires --cache")
+
+    cache = LinkCache(args.cache_path or DEFAULT_CACHE_PATH) if args.cache else None
+    start = time.perf_counter()
+    results, link_results, skipped = check_links(
+        args.paths, cache, concurrency=args.concurrency, per_host=args.per_host,
+        timeout=args.timeout, retries=args.retries,
+    )
+    seconds = time.perf_counter() - start
+    if cache is not None:
+        cache.save()
+
+    # Keep stdout parseable in jsonl mode
+    log = sys.stderr if args.format == 'jsonl' else sys.stdout
+    for path in skipped:
+        print(f"Skipping invalid path: {path}", file=log)
+    if args.format == 'jsonl':
+        print_jsonl_report(results)
+    else:
+        print_text_report(results)
+    failed = sum(1 for r in link_results.values() if r.error is not None)
+    not_modified = sum(1 for r in link_results.values() if r.from_cache)
+    print(f"Links: {len(link_results)} checked in {seconds:.1f} s, {not_modified} not modified, {failed} failed",
+          file=log)
+
+    code = exit_code(results, args.fail_on_warnings)
+    if code:
+        sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
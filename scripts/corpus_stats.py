@@ -0,0 +1,285 @@
+"""
+Corpus-wide statistics over the compiled vendor artifact (see build_corpus.py).
+
+The parsed vendor fields are loaded once into NumPy columns, and every
+aggregate is computed from them with array operations; nothing walks the
+vendors one dict at a time. Reported:
+  - SSO markup computed from the prices (both converted to USD, see
+    currency.py): count, mean, percentiles and a histogram
+  - the share of "Call Us" vendors
+  - staleness: age of updated_at in days
+  - outliers: vendors whose percent_increase is far from the rest, by the
+    modified z-score of log(1 + percent/100) (markups are multiplicative)
+
+The per-vendor columns can be exported as CSV, NPZ or (with pyarrow
+installed) Parquet. NumPy is required; the rest of scripts/ works without it.
+
+Run from the repo root:
+  python3 scripts/build_corpus.py _vendors --stats
+  python3 scripts/build_corpus.py _vendors --stats --stats-out build/stats.npz
+"""
+
+import csv
+import os
+import sys
+import tempfile
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.build_corpus import DEFAULT_CORPUS_PATH, load_columns
+from scripts.currency import convert_many
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+# Markup histogram bin edges, in percent
+MARKUP_BINS = (-np.inf, 0, 25, 50, 100, 200, 500, 1000, np.inf)
+
+# Iglewicz and Hoaglin's cut-off for the modified z-score
+DEFAULT_OUTLIER_Z = 3.5
+
+STALE_DAYS = (365, 730)
+
+EXPORT_FORMATS = ('.csv', '.npz', '.parquet')
+
+_SOURCE_COLUMNS = [
+    'path', 'name', 'base_amount', 'base_currency_code', 'sso_amount', 'sso_currency_code',
+    'percent_value', 'call_us', 'valid', 'updated_at',
+]
+
+_NAT = np.datetime64('NaT', 'D').astype(np.int64)
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day_number(value, memo):
+    try:
+        day = (date.fromisoformat(value[:10]) - _EPOCH).days
+    except (TypeError, ValueError):
+        day = _NAT
+    memo[value] = day
+    return day
+
+
+def _dates(values):
+    """datetime64[D] column from updated_at text; NaT where it isn't a date."""
+    # Few distinct dates recur across the corpus, so each is parsed once
+    memo = {None: _NAT}
+    days = np.fromiter((memo[v] if v in memo else _day_number(v, memo) for v in values), np.int64, len(values))
+    return days.view('datetime64[D]')
+
+
+def load_arrays(db_path=DEFAULT_CORPUS_PATH, today=None):
+    """
+    Loads the corpus artifact into {column: numpy array}, one entry per vendor
+    in path order, with the derived columns the statistics are built from:
+      base_usd, sso_usd: prices in USD (NaN if unparsed or in an unknown currency)
+      markup:            (sso_usd - base_usd) / base_usd in percent, NaN unless priced
+      age_days:          days since updated_at (NaN if undated)
+    A price without a currency is taken to be in the other price's currency,
+    and in USD if neither names one.
+    """
+    columns = load_columns(db_path, _SOURCE_COLUMNS)
+    base_codes = np.array(columns['base_currency_code'], dtype=object)
+    sso_codes = np.array(columns['sso_currency_code'], dtype=object)
+    base_codes, sso_codes = (
+        np.where(np.equal(base_codes, None), sso_codes, base_codes),
+        np.where(np.equal(sso_codes, None), base_codes, sso_codes),
+    )
+    arrays = {
+        'path': np.array(columns['path'], dtype=object),
+        'name': np.array(columns['name'], dtype=object),
+        'base_usd': convert_many(np.array(columns['base_amount'], dtype=float), base_codes, 'USD', default='USD'),
+        'sso_usd': convert_many(np.array(columns['sso_amount'], dtype=float), sso_codes, 'USD', default='USD'),
+        'percent_value': np.array(columns['percent_value'], dtype=float),
+        'call_us': np.array(columns['call_us'], dtype=bool),
+        'valid': np.array(columns['valid'], dtype=bool),
+        'updated_at': _dates(columns['updated_at']),
+    }
+
+    base, sso = arrays['base_usd'], arrays['sso_usd']
+    priced = ~arrays['call_us'] & (base > 0) & np.isfinite(sso)
+    markup = np.full(len(base), np.nan)
+    markup[priced] = (sso[priced] - base[priced]) / base[priced] * 100
+    arrays['markup'] = markup
+
+    today = np.datetime64(today or date.today(), 'D')
+    dated = ~np.isnat(arrays['updated_at'])
+    age = np.full(len(base), np.nan)
+    age[dated] = (today - arrays['updated_at'][dated]).astype(float)
+    arrays['age_days'] = age
+    return arrays
+
+
+def outlier_scores(percent_values):
+    """
+    Modified z-scores (0.6745 * (x - median) / MAD) of log(1 + percent/100),
+    NaN where percent is missing or at most -100. All zeros if the MAD is 0.
+    """
+    scores = np.full(len(percent_values), np.nan)
+    usable = np.isfinite(percent_values) & (percent_values > -100)
+    if not usable.any():
+        return scores
+    x = np.log1p(percent_values[usable] / 100)
+    median = np.median(x)
+    mad = np.median(np.abs(x - median))
+    scores[usable] = 0.0 if mad == 0 else 0.6745 * (x - median) / mad
+    return scores
+
+
+def _summary(values):
+    if not len(values):
+        return {'count': 0}
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        'count': int(len(values)),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def corpus_stats(arrays, outlier_z=DEFAULT_OUTLIER_Z):
+    """
+    Computes the report from load_arrays' columns. Returns a JSON-serialisable
+    dict; outliers are listed most extreme first. Also adds an
+    'outlier_score' column to arrays.
+    """
+    vendors = len(arrays['path'])
+    markup = arrays['markup'][np.isfinite(arrays['markup'])]
+    counts, _ = np.histogram(markup, bins=MARKUP_BINS)
+    age = arrays['age_days'][np.isfinite(arrays['age_days'])]
+    scores = arrays['outlier_score'] = outlier_scores(arrays['percent_value'])
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(scores)) > outlier_z)
+    flagged = flagged[np.argsort(-np.abs(scores[flagged]), kind='stable')]
+    call_us = int(arrays['call_us'].sum())
+
+    return {
+        'vendors': vendors,
+        'valid': int(arrays['valid'].sum()),
+        'call_us': {'count': call_us, 'share': call_us / vendors if vendors else 0.0},
+        'markup': {
+            **_summary(markup),
+            'histogram': [
+                {'from': float(lo), 'to': float(hi), 'count': int(n)}
+                for lo, hi, n in zip(MARKUP_BINS[:-1], MARKUP_BINS[1:], counts)
+            ],
+        },
+        'staleness': {
+            'dated': int(len(age)),
+            'undated': vendors - int(len(age)),
+            **{f'{k}_days': v for k, v in _summary(age).items() if k != 'count'},
+            **{f'older_than_{days}_days': int((age > days).sum()) for days in STALE_DAYS},
+        },
+        'outliers': [
+            {
+                'path': arrays['path'][i],
+                'name': arrays['name'][i],
+                'percent_increase': float(arrays['percent_value'][i]),
+                'score': float(scores[i]),
+            }
+            for i in flagged
+        ],
+    }
+
+
+def _fmt(value, suffix=''):
+    return f"{value:,.1f}{suffix}"
+
+
+def print_stats(stats, top=10, file=None):
+    """Prints the report as text. Lists at most `top` outliers."""
+    file = file or sys.stdout
+    print(f"Vendors: {stats['vendors']} ({stats['valid']} valid)", file=file)
+    call_us = stats['call_us']
+    print(f"Call Us: {call_us['count']} ({call_us['share'] * 100:.1f}%)", file=file)
+
+    markup = stats['markup']
+    print(f"\nSSO markup over {markup['count']} priced vendors:", file=file)
+    if markup['count']:
+        print(f"  mean {_fmt(markup['mean'], '%')}, min {_fmt(markup['min'], '%')}, max {_fmt(markup['max'], '%')}",
+              file=file)
+        print('  ' + ', '.join(f"{p} {_fmt(v, '%')}" for p, v in markup['percentiles'].items()), file=file)
+        for bucket in markup['histogram']:
+            if bucket['from'] == -np.inf:
+                label = f"below {bucket['to']:g}%"
+            elif bucket['to'] == np.inf:
+                label = f"{bucket['from']:g}% and up"
+            else:
+                label = f"{bucket['from']:g}% to {bucket['to']:g}%"
+            print(f"  {label:>18}: {bucket['count']}", file=file)
+
+    staleness = stats['staleness']
+    print(f"\nStaleness of updated_at ({staleness['dated']} dated, {staleness['undated']} undated):", file=file)
+    if staleness['dated']:
+        print(f"  median {_fmt(staleness['percentiles_days']['p50'])} days, "
+              f"p90 {_fmt(staleness['percentiles_days']['p90'])} days, max {_fmt(staleness['max_days'])} days",
+              file=file)
+        print('  ' + ', '.join(f"{staleness[f'older_than_{d}_days']} older than {d} days" for d in STALE_DAYS),
+              file=file)
+
+    outliers = stats['outliers']
+    print(f"\nOutlying percent_increase: {len(outliers)}", file=file)
+    for outlier in outliers[:top]:
+        print(f"  {os.path.basename(outlier['path'])}: {outlier['percent_increase']:g}% "
+              f"(score {outlier['score']:.1f})", file=file)
+    if len(outliers) > top:
+        print(f"  ... and {len(outliers) - top} more", file=file)
+
+
+def _export_columns(arrays):
+    return {
+        'path': np.array([p or '' for p in arrays['path']], dtype=str),
+        'name': np.array(['' if n is None else str(n) for n in arrays['name']], dtype=str),
+        'updated_at': arrays['updated_at'],
+        **{name: arrays[name] for name in (
+            'base_usd', 'sso_usd', 'markup', 'percent_value', 'call_us', 'valid', 'age_days', 'outlier_score',
+        )},
+    }
+
+
+def export_arrays(arrays, out_path):
+    """
+    Writes the per-vendor columns to out_path, as CSV, NPZ or Parquet by its
+    extension, replacing it atomically. Call corpus_stats first so the
+    outlier scores are included. Raises ValueError for another extension and
+    ImportError for Parquet without pyarrow.
+    """
+    extension = os.path.splitext(out_path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"unsupported export format '{extension}' (use {', '.join(EXPORT_FORMATS)})")
+    columns = _export_columns(arrays)
+    directory = os.path.dirname(out_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    if extension == '.parquet':
+        # Fail before creating the temp file
+        import pyarrow
+        import pyarrow.parquet
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.corpus_stats.', suffix=extension)
+    try:
+        if extension == '.parquet':
+            os.close(fd)
+            pyarrow.parquet.write_table(pyarrow.table(columns), tmp_path)
+        elif extension == '.npz':
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **columns)
+        else:
+            # Missing values are empty cells
+            text = {
+                name: np.where(
+                    np.isnat(values) if values.dtype.kind == 'M'
+                    else np.isnan(values) if values.dtype.kind == 'f' else False,
+                    '', values.astype(str),
+                )
+                for name, values in columns.items()
+            }
+            with os.fdopen(fd, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(text)
+                writer.writerows(zip(*text.values()))
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
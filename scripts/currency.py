@@ -0,0 +1,162 @@
+"""
+Offline currency detection and conversion for pricing strings.
+
+Rates come from a versioned JSON table checked in next to this module
+(fx_rates.json); nothing is ever fetched from the network, so results only
+change when the table does. Rates are approximate and only used to put two
+prices in the same currency before comparing them.
+
+  detect_currency('4.99€ / device')      -> 'EUR'
+  detect_currency('A$15 per user')       -> 'AUD'
+  convert(10, 'EUR', 'USD')              -> 10.869...
+  convert_many([10, 20], ['EUR', None])  -> [10.869..., 20.0]
+"""
+
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+DEFAULT_FX_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fx_rates.json')
+
+# version: date the rates were taken; base: the currency rates are quoted
+# against; rates: {ISO 4217 code: units of that currency per 1 base unit}
+FxTable = namedtuple('FxTable', ['version', 'base', 'rates'])
+
+# Symbols, most specific first. A bare '$' is taken to be USD and '¥' JPY.
+CURRENCY_SYMBOLS = {
+    'US$': 'USD', 'AU$': 'AUD', 'A$': 'AUD', 'CA$': 'CAD', 'C$': 'CAD', 'NZ$': 'NZD',
+    'HK$': 'HKD', 'S$': 'SGD', 'R$': 'BRL', 'CHF': 'CHF',
+    '$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR',
+}
+
+# Symbols that name a currency on their own, without guessing
+_QUALIFIED_SYMBOLS = {symbol for symbol in CURRENCY_SYMBOLS if len(symbol) > 1}
+
+
+@lru_cache(maxsize=None)
+def load_fx_table(path=DEFAULT_FX_RATES_PATH):
+    """Loads and checks an FX rate table. Raises ValueError if it is malformed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    try:
+        version, base, rates = data['version'], data['base'], data['rates']
+    except (KeyError, TypeError):
+        raise ValueError(f"{path}: an FX table needs 'version', 'base' and 'rates'") from None
+    if rates.get(base) != 1:
+        raise ValueError(f"{path}: the base currency {base} must have a rate of 1")
+    for code, rate in rates.items():
+        if not re.fullmatch(r'[A-Z]{3}', code) or not isinstance(rate, (int, float)) or rate <= 0:
+            raise ValueError(f"{path}: bad rate {code}: {rate!r}")
+    return FxTable(str(version), base, {code: float(rate) for code, rate in rates.items()})
+
+
+def _currency_pattern(codes):
+    # Codes and letter-prefixed symbols must not be part of a longer word
+    # (e.g. "EURO" or "PLUS$")
+    symbols = sorted(CURRENCY_SYMBOLS, key=len, reverse=True)
+    alternatives = [re.escape(s) if not s[0].isalpha() else rf'(?<![A-Za-z]){re.escape(s)}' for s in symbols]
+    alternatives.append(rf"(?<![A-Za-z])(?:{'|'.join(sorted(codes))})(?![A-Za-z])")
+    return '|'.join(alternatives)
+
+
+@lru_cache(maxsize=None)
+def _currency_re(codes):
+    return re.compile(_currency_pattern(codes))
+
+
+@lru_cache(maxsize=65536)
+def _detect_currency(text, codes):
+    found = None
+    for m in _currency_re(codes).finditer(text):
+        token = m.group(0)
+        if token in _QUALIFIED_SYMBOLS or token in codes:
+            return CURRENCY_SYMBOLS.get(token, token)
+        found = found or CURRENCY_SYMBOLS[token]
+    return found
+
+
+def detect_currency(text, table=None):
+    """
+    Returns the ISO 4217 code of the currency a pricing string is written in,
+    or None if it names none. An explicit code or qualified symbol ('EUR',
+    'A$') wins over a bare symbol ('$'); otherwise the first symbol counts.
+    Only codes in the FX table are recognised.
+    """
+    if not isinstance(text, str):
+        return None
+    table = table or load_fx_table()
+    return _detect_currency(text, frozenset(table.rates))
+
+
+@lru_cache(maxsize=None)
+def _currency_words_re(codes):
+    # Units are lower-cased, so match codes and symbols in any case
+    return re.compile(_currency_pattern(codes), re.IGNORECASE)
+
+
+def strip_currency(unit, table=None):
+    """
+    Removes currency symbols and codes from a unit suffix (see
+    validate_pricing.extract_unit), so '€ / device' and '/ device' compare equal.
+    """
+    table = table or load_fx_table()
+    return ' '.join(_currency_words_re(frozenset(table.rates)).sub(' ', unit).split())
+
+
+def rate_factor(from_code, to_code, table=None):
+    """Returns what one unit of from_code is worth in to_code, or None if either is unknown."""
+    table = table or load_fx_table()
+    from_rate = table.rates.get(from_code)
+    to_rate = table.rates.get(to_code)
+    if from_rate is None or to_rate is None:
+        return None
+    return to_rate / from_rate
+
+
+def convert(amount, from_code, to_code, table=None):
+    """Converts amount between currencies. Returns None if amount or either currency is unknown."""
+    if amount is None:
+        return None
+    if from_code == to_code:
+        return amount
+    factor = rate_factor(from_code, to_code, table)
+    return None if factor is None else amount * factor
+
+
+def convert_many(amounts, currencies, to_code=None, default=None, table=None):
+    """
+    Converts a whole column of amounts to to_code (the table's base currency
+    by default) in one pass. currencies holds a code (or None) per amount;
+    None is read as `default`, and an amount whose currency is None or not
+    in the table converts to None.
+
+    Rates are looked up once per distinct currency. If amounts is a numpy
+    array the conversion is a single vectorized multiply and a float array
+    comes back, with NaN for the amounts that could not be converted;
+    otherwise a list is returned.
+    """
+    table = table or load_fx_table()
+    to_code = to_code or table.base
+    factors = {}
+
+    def factor(code):
+        code = code or default
+        if code not in factors:
+            factors[code] = rate_factor(code, to_code, table) if code else None
+        return factors[code]
+
+    # numpy is optional and slow to import; an ndarray means it already is
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(amounts, np.ndarray):
+        scales = {}
+        for code in set(currencies):
+            scale = factor(code)
+            scales[code] = np.nan if scale is None else scale
+        return amounts.astype(float) * np.fromiter(map(scales.__getitem__, currencies), float, len(amounts))
+    return [
+        None if amount is None or factor(code) is None else amount * factor(code)
+        for amount, code in zip(amounts, currencies)
+    ]
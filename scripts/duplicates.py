@@ -0,0 +1,234 @@
+"""
+Find vendors that appear more than once in the corpus under different files.
+
+Three checks, all close to linear in the number of vendors:
+  - exact: the same normalized name (case, spacing and punctuation ignored),
+    via a hash index
+  - exact: the same vendor_url host (ignoring "www."), via a hash index
+  - near: names whose character trigram sets have a Jaccard similarity of at
+    least a threshold. Candidate pairs come from MinHash signatures split into
+    LSH bands (names sharing any whole band), and each candidate is then
+    checked against the exact Jaccard similarity, so there are no false
+    positives. Pairs at the default threshold are found ~94% of the time,
+    pairs at 0.7 and above >99.5%; nothing is ever compared all-pairs.
+
+Known false positives (hosts shared by different vendors, similar names of
+different vendors) are listed in duplicate_allowlist.json next to this module.
+
+  records = [VendorRecord(path, name, vendor_url), ...]
+  for i, matches in find_duplicates(records, allowlist=load_allowlist()).items():
+      for match in matches:
+          print(records[i].path, match.kind, records[match.other].path)
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    _SafeLoader = yaml.SafeLoader
+
+# Default minimum trigram Jaccard similarity for two names to count as near
+# duplicates. "HubSpot" / "HubSpot CRM" is 0.62; unrelated names in the
+# real corpus stay below 0.5.
+DEFAULT_NAME_THRESHOLD = 0.6
+
+DEFAULT_ALLOWLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'duplicate_allowlist.json')
+
+# hosts: vendor_url hosts that never count as duplicates; names: frozensets of
+# two normalized names that never count as similar
+Allowlist = namedtuple('Allowlist', ['hosts', 'names'])
+
+# path identifies the underlying vendor file: two records with the same path
+# are versions of one file and never duplicates of each other
+VendorRecord = namedtuple('VendorRecord', ['path', 'name', 'vendor_url'])
+
+# kind: 'name', 'host' or 'similar-name'; other: index of the other record;
+# similarity: trigram Jaccard similarity of the names (1.0 for exact matches)
+Match = namedtuple('Match', ['kind', 'other', 'similarity'])
+
+# 20 bands of 4 rows: the LSH S-curve crosses 50% at a similarity of ~0.47
+DEFAULT_BANDS = 20
+DEFAULT_ROWS = 4
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name):
+    """Case-folds, strips accents and drops everything but letters and digits."""
+    if name is None:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return _NON_ALNUM_RE.sub('', decomposed.lower())
+
+
+def vendor_host(url):
+    """Returns the lower-cased host of url without a leading "www.", or None."""
+    if not isinstance(url, str):
+        return None
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith('www.') else host
+
+
+def trigrams(normalized):
+    """Character trigrams of a normalized name; names shorter than 3 are their own token."""
+    if len(normalized) < 3:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def read_record(path, raw=None):
+    """
+    Reads the name and vendor_url of a vendor file (from raw bytes if given).
+    Parsing is lenient, last duplicate key winning, since files the validator
+    rejects can still duplicate others. Unreadable files give empty fields.
+    """
+    try:
+        if raw is None:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        data = yaml.load(raw, Loader=_SafeLoader)
+    except (OSError, yaml.YAMLError):
+        data = None
+    if not isinstance(data, dict):
+        return VendorRecord(path, None, None)
+    return VendorRecord(path, data.get('name'), data.get('vendor_url'))
+
+
+@lru_cache(maxsize=None)
+def load_allowlist(path=DEFAULT_ALLOWLIST_PATH):
+    """Loads and checks a duplicate allowlist. Raises ValueError if it is malformed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    try:
+        hosts, names = data['hosts'], data['names']
+    except (KeyError, TypeError):
+        raise ValueError(f"{path}: an allowlist needs 'hosts' and 'names'") from None
+    if not all(isinstance(host, str) for host in hosts):
+        raise ValueError(f"{path}: 'hosts' must be a list of host names")
+    if not all(isinstance(pair, list) and len(pair) == 2 and all(isinstance(n, str) for n in pair) for pair in names):
+        raise ValueError(f"{path}: 'names' must be a list of [name, name] pairs")
+    return Allowlist(
+        frozenset(vendor_host(f"https://{host}") for host in hosts),
+        frozenset(frozenset(map(normalize_name, pair)) for pair in names),
+    )
+
+
+def _exact_matches(keys, kind, matches, paths):
+    index = defaultdict(list)
+    for i, key in enumerate(keys):
+        if key:
+            index[key].append(i)
+    for group in index.values():
+        if len(group) > 1:
+            for i in group:
+                for j in group:
+                    if paths[i] != paths[j]:
+                        matches[i].append(Match(kind, j, 1.0))
+
+
+class MinHasher:
+    """
+    MinHash signatures over string tokens, using num_perm seeded universal
+    hashes. Each distinct token is hashed once and cached, so signing a large
+    corpus of short names costs one min() per hash per name.
+    """
+
+    def __init__(self, num_perm, seed=0):
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME)) for _ in range(num_perm)]
+        self._token_hashes = {}
+
+    def _hashes(self, token):
+        hashes = self._token_hashes.get(token)
+        if hashes is None:
+            x = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+            hashes = self._token_hashes[token] = [(a * x + b) % _MERSENNE_PRIME for a, b in self._coefficients]
+        return hashes
+
+    def signature(self, tokens):
+        """Returns the signature of a non-empty set of tokens as a list of num_perm ints."""
+        return list(map(min, zip(*[self._hashes(token) for token in tokens])))
+
+
+def similar_name_pairs(names, threshold=DEFAULT_NAME_THRESHOLD, bands=DEFAULT_BANDS, rows=DEFAULT_ROWS, seed=0):
+    """
+    Returns (i, j, similarity) for pairs of distinct normalized names whose
+    trigram Jaccard similarity is at least threshold, i < j, in order.
+    Candidates are the names that share an LSH band of their MinHash
+    signatures; see the module docstring for the recall this gives.
+    """
+    token_sets = [trigrams(name) for name in names]
+    hasher = MinHasher(bands * rows, seed)
+    buckets = defaultdict(list)
+    for i, tokens in enumerate(token_sets):
+        if tokens:
+            signature = hasher.signature(tokens)
+            for band in range(bands):
+                buckets[(band, *signature[band * rows:(band + 1) * rows])].append(i)
+
+    candidates = set()
+    for ids in buckets.values():
+        for x in range(1, len(ids)):
+            for y in range(x):
+                candidates.add((ids[y], ids[x]))
+
+    pairs = []
+    for i, j in candidates:
+        overlap = len(token_sets[i] & token_sets[j])
+        similarity = overlap / (len(token_sets[i]) + len(token_sets[j]) - overlap)
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+    return sorted(pairs)
+
+
+def find_duplicates(records, name_threshold=DEFAULT_NAME_THRESHOLD, allowlist=None):
+    """
+    Finds duplicate vendors among records (VendorRecords), leaving out the
+    hosts and name pairs in allowlist (an Allowlist) if given.
+    Returns {index: [Match, ...]} for every record that collides with another,
+    matches ordered by kind, then by the other record's index.
+    """
+    allowed_hosts, allowed_names = allowlist or (frozenset(), frozenset())
+    paths = [record.path for record in records]
+    names = [normalize_name(record.name) for record in records]
+    matches = defaultdict(list)
+    _exact_matches(names, 'name', matches, paths)
+    hosts = [vendor_host(record.vendor_url) for record in records]
+    _exact_matches([host if host not in allowed_hosts else None for host in hosts], 'host', matches, paths)
+
+    # Near duplicates are found between distinct names only; records sharing a
+    # name are already exact matches
+    by_name = defaultdict(list)
+    for i, name in enumerate(names):
+        if name:
+            by_name[name].append(i)
+    distinct = list(by_name)
+    for a, b, similarity in similar_name_pairs(distinct, name_threshold):
+        if frozenset((distinct[a], distinct[b])) in allowed_names:
+            continue
+        for i in by_name[distinct[a]]:
+            for j in by_name[distinct[b]]:
+                if paths[i] != paths[j]:
+                    matches[i].append(Match('similar-name', j, similarity))
+                    matches[j].append(Match('similar-name', i, similarity))
+
+    order = {'name': 0, 'host': 1, 'similar-name': 2}
+    return {i: sorted(found, key=lambda m: (order[m.kind], m.other)) for i, found in sorted(matches.items())}
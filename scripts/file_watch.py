@@ -0,0 +1,188 @@
+"""
+Wait for vendor files to change.
+
+On Linux an InotifyWatcher (inotify through ctypes, no extra dependencies) is
+woken by the kernel as soon as a file is written, renamed into place or
+deleted. Everywhere else a PollingWatcher compares mtimes and sizes on an
+interval. open_watcher picks the best one available.
+
+  watcher = open_watcher(['_vendors'])
+  while True:
+      changed = watcher.wait()   # set of paths, or None: rescan everything
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+VENDOR_SUFFIXES = ('.yml', '.yaml')
+
+# How long to keep collecting events after the first one, so an editor's
+# write-then-rename or a multi-file checkout arrives as one batch
+DEFAULT_SETTLE = 0.02
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+class PollingWatcher:
+    """Detects changes by re-listing the directories and comparing (mtime, size)."""
+
+    def __init__(self, directories, suffixes=VENDOR_SUFFIXES, interval=DEFAULT_POLL_INTERVAL):
+        self.directories = list(directories)
+        self.suffixes = suffixes
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.endswith(self.suffixes):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[os.path.join(directory, entry.name)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """
+        Blocks until a file is added, modified or removed, or until timeout
+        seconds pass. Returns the set of changed paths (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+
+# From <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+# Content is complete on close-after-write or rename-into-place; IN_MODIFY
+# alone would catch half-written files
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("libc has no inotify support")
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+
+class InotifyWatcher:
+    """Wakes on kernel inotify events for the directories' vendor files."""
+
+    def __init__(self, directories, suffixes=VENDOR_SUFFIXES, settle=DEFAULT_SETTLE):
+        libc = _load_libc()
+        self.suffixes = suffixes
+        self.settle = settle
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        self._directories = {}
+        try:
+            for directory in directories:
+                wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+                if wd < 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(errno, f"inotify_add_watch {directory}: {os.strerror(errno)}")
+                self._directories[wd] = directory
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _read_events(self):
+        """Returns the changed paths from the pending events, or None after a queue overflow."""
+        changed = set()
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                elif wd in self._directories and name:
+                    filename = os.fsdecode(name)
+                    if filename.endswith(self.suffixes):
+                        changed.add(os.path.join(self._directories[wd], filename))
+        return None if overflow else changed
+
+    def wait(self, timeout=None):
+        """
+        Blocks until a file is written, renamed or removed, or until timeout
+        seconds pass. Returns the set of changed paths (empty on timeout), or
+        None if the kernel dropped events and the caller should rescan.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read_events()
+            # Let the rest of a burst arrive before reporting
+            while changed is not None and select.select([self._fd], [], [], self.settle)[0]:
+                more = self._read_events()
+                changed = None if more is None else changed | more
+            if changed is None or changed:
+                return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_watcher(directories, suffixes=VENDOR_SUFFIXES, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Returns an InotifyWatcher where inotify is available, otherwise a PollingWatcher."""
+    try:
+        return InotifyWatcher(directories, suffixes)
+    except OSError:
+        return PollingWatcher(directories, suffixes, poll_interval)
@@ -0,0 +1,208 @@
+"""
+Read vendor files straight from the git object store, without a checkout.
+
+A CatFileBatch keeps one `git cat-file --batch` process open and streams blobs
+through it, so reading hundreds of files costs one process spawn rather than
+one per file. changed_vendor_entries lists what a commit range touched under
+_vendors/, including file modes, so symlinks can be rejected without ever being
+written to disk. vendor_log streams the same entries commit by commit, for
+walking the history of _vendors/ in one pass.
+
+  with CatFileBatch() as objects:
+      for entry in changed_vendor_entries('origin/main', 'HEAD'):
+          raw = objects.read(entry.oid)
+"""
+
+import subprocess
+from collections import namedtuple
+
+VENDORS_PATHSPEC = '_vendors/'
+
+REGULAR_FILE_MODES = ('100644', '100755')
+
+# mode is the git file mode in the new tree (e.g. '100644', '120000')
+ChangedEntry = namedtuple('ChangedEntry', ['path', 'mode', 'oid', 'status'])
+
+# committed_at is the committer timestamp in seconds since the epoch
+LogCommit = namedtuple('LogCommit', ['oid', 'committed_at', 'entries'])
+
+
+class GitError(Exception):
+    """A git command failed or returned something unexpected."""
+
+
+def _git(args, repo='.'):
+    try:
+        result = subprocess.run(['git', *args], cwd=repo, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode('utf-8', 'replace').strip() or f"exit status {e.returncode}"
+        raise GitError(f"git {' '.join(args)}: {message}")
+    return result.stdout
+
+
+def resolve_commit(rev, repo='.'):
+    """Returns the full object id of the commit `rev` names."""
+    try:
+        out = _git(['rev-parse', '--verify', '--quiet', '--end-of-options', f'{rev}^{{commit}}'], repo)
+    except GitError:
+        raise GitError(f"unknown commit '{rev}'")
+    return out.decode().strip()
+
+
+def split_range(commit_range):
+    """
+    Splits 'BASE..HEAD' or 'BASE...HEAD' at the operator, without resolving
+    either end. Returns (base, head, symmetric); symmetric is True for '...'.
+    Raises ValueError for anything that is not a two-ended range.
+    """
+    if '...' in commit_range:
+        base, head = commit_range.split('...', 1)
+        symmetric = True
+    elif '..' in commit_range:
+        base, head = commit_range.split('..', 1)
+        symmetric = False
+    else:
+        raise ValueError(f"expected BASE..HEAD or BASE...HEAD, got '{commit_range}'")
+    if not base or not head:
+        raise ValueError(f"expected BASE..HEAD or BASE...HEAD, got '{commit_range}'")
+    return base, head, symmetric
+
+
+def parse_range(commit_range, repo='.'):
+    """
+    Resolves 'BASE..HEAD' to (base, head) commit ids. 'BASE...HEAD' diffs from
+    the merge base instead, like `git diff BASE...HEAD`.
+    Raises ValueError for anything that is not a two-ended range.
+    """
+    base, head, symmetric = split_range(commit_range)
+    base, head = resolve_commit(base, repo), resolve_commit(head, repo)
+    if symmetric:
+        base = _git(['merge-base', base, head], repo).decode().strip()
+    return base, head
+
+
+def is_ancestor(ancestor, descendant, repo='.'):
+    """Whether commit `ancestor` is reachable from commit `descendant` (or is it)."""
+    result = subprocess.run(
+        ['git', 'merge-base', '--is-ancestor', ancestor, descendant], cwd=repo, capture_output=True,
+    )
+    if result.returncode not in (0, 1):
+        raise GitError(f"git merge-base: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.returncode == 0
+
+
+def _raw_entry(record, path):
+    # ":<old mode> <new mode> <old oid> <new oid> <status>" and its path
+    _, mode, _, oid, status = record.decode().lstrip(':').split(' ')
+    return ChangedEntry(path.decode('utf-8', 'surrogateescape'), mode, oid, status)
+
+
+def changed_vendor_entries(base, head, repo='.', pathspec=VENDORS_PATHSPEC):
+    """
+    Lists the entries under pathspec that were added, modified or changed type
+    between two commits, as ChangedEntry tuples in path order. Renames show up
+    as additions. Entries of every mode are returned; callers decide what to
+    do with symlinks and submodules.
+    """
+    out = _git(
+        ['diff', '--raw', '-z', '--no-abbrev', '--no-renames', '--diff-filter=ACMT', base, head, '--', pathspec],
+        repo,
+    )
+    fields = out.split(b'\0')
+    # Each record is ":<old mode> <new mode> <old oid> <new oid> <status>" NUL "<path>" NUL
+    return [_raw_entry(fields[i], fields[i + 1]) for i in range(0, len(fields) - 1, 2)]
+
+
+def vendor_log(revisions, repo='.', pathspec=VENDORS_PATHSPEC):
+    """
+    Streams the commits in `revisions` (e.g. ['HEAD'] or ['OLD..HEAD']) that
+    touched pathspec, oldest first, as LogCommit tuples. History is followed
+    along first parents, and each commit's entries are its changes against
+    its first parent (deletions included, renames as a deletion and an
+    addition), so applying them in order replays the branch. The log is read
+    as git writes it rather than buffered whole.
+    """
+    try:
+        proc = subprocess.Popen(
+            ['git', 'log', '-z', '--raw', '--no-abbrev', '--no-renames', '--first-parent',
+             '--diff-merges=first-parent', '--reverse', '--format=commit %H %ct', *revisions, '--', pathspec],
+            cwd=repo, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+
+    def tokens():
+        pending = b''
+        while chunk := proc.stdout.read(65536):
+            *complete, pending = (pending + chunk).split(b'\0')
+            yield from complete
+        if pending:
+            yield pending
+
+    try:
+        commit = None
+        stream = tokens()
+        for token in stream:
+            token = token.lstrip(b'\n')
+            if token.startswith(b'commit '):
+                if commit:
+                    yield commit
+                _, oid, committed_at = token.decode().split()
+                commit = LogCommit(oid, int(committed_at), [])
+            elif token.startswith(b':') and commit:
+                commit.entries.append(_raw_entry(token, next(stream)))
+        if commit:
+            yield commit
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        if proc.wait() not in (0, -13):
+            message = stderr.decode('utf-8', 'replace').strip() or f"exit status {proc.returncode}"
+            raise GitError(f"git log: {message}")
+
+
+class CatFileBatch:
+    """A long-lived `git cat-file --batch` process for reading objects by id."""
+
+    def __init__(self, repo='.'):
+        try:
+            self._proc = subprocess.Popen(
+                ['git', 'cat-file', '--batch'], cwd=repo, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise GitError("git is not installed")
+
+    def read(self, object_name):
+        """Returns the contents of the blob (or other object) `object_name` as bytes."""
+        if '\n' in object_name:
+            raise ValueError(f"invalid object name: {object_name!r}")
+        self._proc.stdin.write(object_name.encode() + b'\n')
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline()
+        if not header:
+            raise GitError("git cat-file exited unexpectedly")
+        parts = header.split()
+        if len(parts) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            raise GitError(f"git cat-file: {header.decode('utf-8', 'replace').strip()}")
+        size = int(parts[2])
+        data = self._proc.stdout.read(size)
+        self._proc.stdout.read(1)  # trailing newline
+        if len(data) != size:
+            raise GitError("git cat-file exited unexpectedly")
+        return data
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+        self._proc.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
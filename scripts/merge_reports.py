@@ -0,0 +1,98 @@
+"""
+Merge the --report-out files of a sharded validation run into one report.
+
+Each CI node validates one shard of the vendor files:
+  python3 scripts/validate_pricing.py _vendors --shard 2/4 --report-out shard-2.json
+
+and a final step combines them:
+  python3 scripts/merge_reports.py shard-*.json
+
+The merged output (text or jsonl, the per-file diagnostics, CATEGORY: markers,
+summary and exit code) is identical to running validate_pricing.py once over
+the same paths. Merging fails if a shard is missing or repeated, or if the
+shards were validated with different rules or inputs.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.validate_pricing import (
+    CacheCounts, exit_code, print_jsonl_report, print_text_report, read_report,
+)
+
+
+def merge_reports(reports):
+    """
+    Combines reports (as returned by read_report) from every shard of one run.
+    Returns (results, skipped, cache): results in the order of an unsharded
+    run, and summed cache counts (None unless every shard used a cache).
+    Raises ValueError if the reports don't make up exactly one whole run.
+    """
+    if not reports:
+        raise ValueError("no reports to merge")
+    reports = sorted(reports, key=lambda report: report['shard'])
+    if len({report['rules'] for report in reports}) > 1:
+        raise ValueError("the shards were validated with different versions of the rules")
+    counts = {count for _, count in (report['shard'] for report in reports)}
+    if len(counts) > 1:
+        raise ValueError(f"the reports come from runs split {' and '.join(map(str, sorted(counts)))} ways")
+    count = counts.pop()
+    indexes = [index for index, _ in (report['shard'] for report in reports)]
+    repeated = sorted({index for index in indexes if indexes.count(index) > 1})
+    if repeated:
+        raise ValueError(f"shard {', '.join(map(str, repeated))} of {count} given more than once")
+    missing = sorted(set(range(1, count + 1)) - set(indexes))
+    if missing:
+        raise ValueError(f"missing shard {', '.join(map(str, missing))} of {count}")
+
+    # Nodes may list a directory in different orders; the first shard's is used
+    order = reports[0]['order']
+    if any(set(report['order']) != set(order) for report in reports[1:]):
+        raise ValueError("the shards were given different vendor files")
+    combined = {}
+    for report in reports:
+        for key, outcome in report['results'].items():
+            if key in combined:
+                raise ValueError(f"{key} was validated by more than one shard")
+            combined[key] = outcome
+    if combined.keys() != set(order):
+        raise ValueError("the shards' results don't match the vendor files they were given")
+
+    caches = [report['cache'] for report in reports]
+    cache = None
+    if all(c is not None for c in caches):
+        cache = CacheCounts(sum(c.hits for c in caches), sum(c.misses for c in caches))
+    return {key: combined[key] for key in order}, reports[0]['skipped'], cache
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge the --report-out files of a sharded validate_pricing.py run into one report.")
+    parser.add_argument("reports", nargs='+', help="Report files, one per shard.")
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text',
+                        help="Output format: human-readable text (default) or one JSON object per line.")
+    parser.add_argument("--fail-on-warnings", action="store_true", help="Exit with error code if there are warnings.")
+    args = parser.parse_args()
+
+    try:
+        results, skipped, cache = merge_reports([read_report(path) for path in args.reports])
+    except ValueError as e:
+        parser.error(str(e))
+
+    for path in skipped:
+        # Keep stdout parseable in jsonl mode
+        print(f"Skipping invalid path: {path}", file=sys.stderr if args.format == 'jsonl' else sys.stdout)
+    if args.format == 'jsonl':
+        print_jsonl_report(results, cache)
+    else:
+        print_text_report(results, cache)
+
+    code = exit_code(results, args.fail_on_warnings)
+    if code:
+        sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
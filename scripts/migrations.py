@@ -0,0 +1,213 @@
+r"""
+Framework for line-level migrations of the vendor YAML files.
+
+A Migration is a set of rules, each keyed on a regex that must match at the
+start of a line (usually a field name). All of a migration's patterns are
+compiled into one alternation, so every line costs a single regex match no
+matter how many rules there are; the matching rule is found from the name of
+the group that matched.
+
+A rule is called as rule(match, lines, i) and returns (replacement_lines,
+next_i) to rewrite lines[i:next_i], or None to leave the line as it is. Rules
+may consume several lines (e.g. a multi-line YAML value).
+
+  migration = Migration('example')
+
+  @migration.rule(r'old_field:\s*')
+  def rename_old_field(match, lines, i):
+      return ['new_field: ' + lines[i][match.end():]], i + 1
+
+  migration_main(migration, "Rename old_field.")
+
+Files are migrated across a process pool, written atomically (temp file +
+rename), and can be previewed as a unified diff with --dry-run.
+"""
+
+import argparse
+import difflib
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.validate_pricing import find_vendor_files, map_files, positive_number
+
+VENDORS_DIR = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+
+# changed: whether the file was (or, in a dry run, would be) rewritten
+# diff: unified diff text in a dry run, else None
+# rule_matches / rule_counts / rule_seconds: {rule name: lines matched / rewrites / seconds spent}
+MigrationResult = namedtuple(
+    'MigrationResult', ['path', 'changed', 'diff', 'lines', 'rule_matches', 'rule_counts', 'rule_seconds'],
+)
+
+
+class Migration:
+    """A named, ordered set of line-level rules applied in a single pass."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rules = []
+        self._matcher = None
+
+    def rule(self, pattern, name=None):
+        """Decorator registering func as the rule for lines starting with pattern."""
+        def register(func):
+            self.rules.append((name or func.__name__, re.compile(pattern).pattern, func))
+            self._matcher = None
+            return func
+        return register
+
+    @property
+    def matcher(self):
+        # One group per rule, named by position; earlier rules win on overlap
+        if self._matcher is None:
+            self._matcher = re.compile('|'.join(f'(?P<r{i}>{pattern})' for i, (_, pattern, _) in enumerate(self.rules)))
+        return self._matcher
+
+    def __getstate__(self):
+        # Compiled patterns are rebuilt in each worker rather than pickled
+        return {**self.__dict__, '_matcher': None}
+
+    def apply(self, text, stats=None):
+        """
+        Migrates the text of one file. Returns the new text, which is `text`
+        itself if no rule changed anything. If stats is given, it is a
+        (matches, rewrites, seconds) triple of dicts that per-rule counts and
+        time are accumulated into.
+        """
+        lines = text.splitlines(keepends=True)
+        match_line = self.matcher.match
+        rules = self.rules
+        out = []
+        changed = False
+        i = 0
+        while i < len(lines):
+            m = match_line(lines[i])
+            if m is None:
+                out.append(lines[i])
+                i += 1
+                continue
+            name, _, func = rules[int(m.lastgroup[1:])]
+            start = time.perf_counter()
+            result = func(m, lines, i)
+            if stats is not None:
+                matches, rewrites, seconds = stats
+                matches[name] = matches.get(name, 0) + 1
+                seconds[name] = seconds.get(name, 0.0) + time.perf_counter() - start
+                if result is not None:
+                    rewrites[name] = rewrites.get(name, 0) + 1
+            if result is None:
+                out.append(lines[i])
+                i += 1
+                continue
+            replacement, i = result
+            out.extend(replacement)
+            changed = True
+        return ''.join(out) if changed else text
+
+    def migrate_file(self, path, dry_run=False):
+        """
+        Migrates one file, replacing it atomically if anything changed.
+        Returns a MigrationResult; in a dry run the file is left alone and the
+        result carries the unified diff instead.
+        """
+        with open(path, 'r') as f:
+            original = f.read()
+        stats = ({}, {}, {})
+        migrated = self.apply(original, stats)
+        changed = migrated is not original
+        diff = None
+        if changed and dry_run:
+            diff = ''.join(difflib.unified_diff(
+                original.splitlines(keepends=True), migrated.splitlines(keepends=True),
+                fromfile=path, tofile=path,
+            ))
+        elif changed:
+            atomic_write(path, migrated)
+        return MigrationResult(path, changed, diff, original.count('\n'), *stats)
+
+
+def atomic_write(path, text):
+    """Replaces path with text so readers see either the old or the new file, never a partial one."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.migrate-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _migrate_path(migration, dry_run, path):
+    return migration.migrate_file(path, dry_run)
+
+
+def run_migration(migration, paths, jobs=1, dry_run=False):
+    """
+    Migrates every vendor file under paths across `jobs` worker processes.
+    Returns (results, skipped): MigrationResults in sorted path order, and the
+    paths that were neither vendor files nor directories.
+    """
+    filepaths, skipped = find_vendor_files(paths)
+    filepaths.sort()
+    return map_files(partial(_migrate_path, migration, dry_run), filepaths, jobs), skipped
+
+
+def print_rule_summary(migration, results, seconds, file=None):
+    """
+    Prints, per rule, the lines it matched and rewrote, the files it changed,
+    its time and throughput (matched lines per second), then overall throughput.
+    """
+    file = file or sys.stdout
+    lines = sum(r.lines for r in results)
+    print(f"\n{'rule':<32} {'matched':>8} {'rewrites':>9} {'files':>7} {'seconds':>9} {'lines/s':>11}", file=file)
+    for name, _, _ in migration.rules:
+        matched = sum(r.rule_matches.get(name, 0) for r in results)
+        rewrites = sum(r.rule_counts.get(name, 0) for r in results)
+        files = sum(1 for r in results if r.rule_counts.get(name))
+        rule_time = sum(r.rule_seconds.get(name, 0.0) for r in results)
+        rate = f"{matched / rule_time:,.0f}" if rule_time and matched else '-'
+        print(f"{name:<32} {matched:>8} {rewrites:>9} {files:>7} {rule_time:>9.4f} {rate:>11}", file=file)
+    rate = len(results) / seconds if seconds else 0.0
+    print(f"\n{len(results)} files, {lines} lines in {seconds:.3f} s ({rate:,.0f} files/s)", file=file)
+
+
+def migration_main(migration, description):
+    """Command-line entry point shared by migration scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("paths", nargs='*', default=[os.path.abspath(VENDORS_DIR)],
+                        help="Vendor YAML files or directories containing them (default: _vendors).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print a unified diff of the changes instead of writing them.")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to migrate with (default: number of CPUs).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results, skipped = run_migration(migration, args.paths, jobs=args.jobs, dry_run=args.dry_run)
+    seconds = time.perf_counter() - start
+    for path in skipped:
+        print(f"Skipping invalid path: {path}", file=sys.stderr)
+
+    migrated = 0
+    for result in results:
+        if result.changed:
+            migrated += 1
+            if args.dry_run:
+                sys.stdout.write(result.diff)
+            else:
+                print(f'  migrated: {os.path.basename(result.path)}')
+
+    if args.dry_run:
+        print(f'\nDry run. {migrated}/{len(results)} files would be updated.')
+    else:
+        print(f'\nDone. {migrated}/{len(results)} files updated.')
+    print_rule_summary(migration, results, seconds)
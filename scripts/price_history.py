@@ -0,0 +1,332 @@
+"""
+Build a price history for every vendor from the git history of _vendors/, and
+query it.
+
+The history of _vendors/ is streamed once with `git log --raw` (see
+git_objects.vendor_log), each changed file is read through one long-lived
+`git cat-file --batch` process and parsed with the validator's price helpers,
+and a point is appended to a SQLite store whenever a vendor's prices change.
+Commits that only touch other fields add nothing. The store remembers the
+last commit it indexed, so later runs only read newer commits; it is rebuilt
+from scratch if that commit is no longer in the branch's history, or if the
+price helpers change (see validate_pricing.rules_fingerprint).
+
+Points are stored clustered by vendor, so one vendor's history is a single
+index range scan.
+
+Run from the repo root:
+  python3 scripts/price_history.py _vendors/slack.yaml
+  python3 scripts/price_history.py slack --format jsonl
+
+Then, from Python:
+  from scripts.price_history import update_history, vendor_history
+  update_history()
+  for point in vendor_history('slack'): ...
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from fnmatch import fnmatchcase
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.currency import detect_currency
+from scripts.git_objects import (
+    REGULAR_FILE_MODES, VENDORS_PATHSPEC, CatFileBatch, GitError, is_ancestor, resolve_commit, vendor_log,
+)
+from scripts.validate_pricing import (
+    DEFAULT_INCLUDE, clean_pricing, load_vendor_yaml, parse_percent, parse_price, rules_fingerprint,
+)
+
+DEFAULT_HISTORY_PATH = os.path.join('build', 'price_history.sqlite')
+
+# Bump when the table layout or the meaning of a column changes.
+HISTORY_VERSION = 1
+
+# Price fields recorded per point, with their SQLite types. A point is only
+# appended when one of these differs from the vendor's previous point.
+PRICE_COLUMNS = {
+    'name': 'TEXT',
+    'base_pricing': 'TEXT',
+    'sso_pricing': 'TEXT',
+    'base_amount': 'REAL',
+    'base_currency_code': 'TEXT',
+    'sso_amount': 'REAL',
+    'sso_currency_code': 'TEXT',
+    'call_us': 'INTEGER',
+    'percent_value': 'REAL',
+}
+
+# One change to a vendor's prices. status is 'A' when the file appears (or
+# reappears), 'M' when its prices change and 'D' when it is removed, in which
+# case the price fields are all None.
+HistoryPoint = namedtuple('HistoryPoint', ['path', 'commit', 'committed_at', 'status', *PRICE_COLUMNS])
+
+
+def _point_to_dict(self):
+    """Returns the point as a JSON-serializable dict."""
+    return self._asdict()
+
+HistoryPoint.to_dict = _point_to_dict
+
+
+def price_fields(raw):
+    """
+    Parses one revision of a vendor file's raw bytes into a tuple of
+    PRICE_COLUMNS values, or None if it isn't a YAML mapping. Files the
+    validator rejects for duplicate keys are read the way Jekyll published
+    them, last key winning.
+    """
+    try:
+        data = load_vendor_yaml(raw)
+    except yaml.YAMLError:
+        try:
+            data = yaml.safe_load(raw)
+        except yaml.YAMLError:
+            return None
+    if not isinstance(data, dict):
+        return None
+
+    fields = dict.fromkeys(PRICE_COLUMNS)
+    name = data.get('name')
+    fields['name'] = None if name is None else str(name)
+    for prefix in ('base', 'sso'):
+        pricing = clean_pricing(data.get(f'{prefix}_pricing'))
+        fields[f'{prefix}_pricing'] = pricing
+        if pricing:
+            price = parse_price(pricing)
+            fields[f'{prefix}_amount'] = price.amount
+            fields[f'{prefix}_currency_code'] = detect_currency(pricing)
+            if prefix == 'sso':
+                fields['call_us'] = int(price.call_us)
+    fields['percent_value'] = parse_percent(data.get('percent_increase'))
+    return tuple(fields.values())
+
+
+def history_fingerprint():
+    """Identifies the price helpers and store layout the stored points were built with."""
+    return f"{HISTORY_VERSION}:{rules_fingerprint()}"
+
+
+def _create_tables(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    # seq numbers commits in the order they were indexed, oldest first
+    conn.execute("CREATE TABLE IF NOT EXISTS commits (seq INTEGER PRIMARY KEY, oid TEXT UNIQUE, committed_at INTEGER)")
+    conn.execute("CREATE TABLE IF NOT EXISTS vendors (id INTEGER PRIMARY KEY, path TEXT UNIQUE, stem TEXT)")
+    conn.execute("CREATE INDEX IF NOT EXISTS vendors_stem ON vendors (stem)")
+    columns = ', '.join(f"{name} {kind}" for name, kind in PRICE_COLUMNS.items())
+    # WITHOUT ROWID keeps each vendor's points together, in commit order
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS points (vendor INTEGER, seq INTEGER, status TEXT, {columns}, "
+        f"PRIMARY KEY (vendor, seq)) WITHOUT ROWID"
+    )
+
+
+def _meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _is_vendor_file(path, pathspec):
+    return path.startswith(pathspec) and any(fnmatchcase(path.rpartition('/')[2], p) for p in DEFAULT_INCLUDE)
+
+
+def update_history(db_path=DEFAULT_HISTORY_PATH, repo='.', rev='HEAD', pathspec=VENDORS_PATHSPEC):
+    """
+    Brings the store at db_path up to date with the history of `rev`.
+    Returns a dict of counts: commits (newly indexed), points (appended),
+    unparsed (revisions that were not a YAML mapping and were skipped) and
+    rebuilt (1 if the store was started over, else 0).
+    Raises GitError if repo is not a git repository or rev is unknown.
+    """
+    head = resolve_commit(rev, repo)
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stats = {'commits': 0, 'points': 0, 'unparsed': 0, 'rebuilt': 0}
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            _create_tables(conn)
+            indexed = _meta(conn, 'head')
+            if _meta(conn, 'fingerprint') != history_fingerprint() or _meta(conn, 'pathspec') != pathspec or (
+                indexed and not is_ancestor(indexed, head, repo)
+            ):
+                # Built by other price helpers, or history was rewritten: start over
+                for table in ('meta', 'commits', 'vendors', 'points'):
+                    conn.execute(f"DROP TABLE {table}")
+                _create_tables(conn)
+                conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                                 [('fingerprint', history_fingerprint()), ('pathspec', pathspec)])
+                stats['rebuilt'] = int(indexed is not None)
+                indexed = None
+            if indexed == head:
+                return stats
+
+            vendor_ids = dict(conn.execute("SELECT path, id FROM vendors"))
+            # The latest point per vendor: (status, price fields)
+            latest = {
+                vendor: (status, tuple(values))
+                for vendor, status, *values in conn.execute(
+                    f"SELECT vendor, status, {', '.join(PRICE_COLUMNS)} FROM points "
+                    f"WHERE (vendor, seq) IN (SELECT vendor, MAX(seq) FROM points GROUP BY vendor)"
+                )
+            }
+            removed = (None,) * len(PRICE_COLUMNS)
+            insert = (f"INSERT INTO points (vendor, seq, status, {', '.join(PRICE_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' for _ in range(len(PRICE_COLUMNS) + 3))})")
+            # The same blob recurs across reverts and renames
+            parsed = {}
+
+            with CatFileBatch(repo) as objects:
+                for commit in vendor_log([f'{indexed}..{head}' if indexed else head], repo, pathspec):
+                    seq = conn.execute("INSERT INTO commits (oid, committed_at) VALUES (?, ?)",
+                                       (commit.oid, commit.committed_at)).lastrowid
+                    stats['commits'] += 1
+                    for entry in commit.entries:
+                        if not _is_vendor_file(entry.path, pathspec):
+                            continue
+                        if entry.status == 'D' or entry.mode not in REGULAR_FILE_MODES:
+                            # Gone, or replaced by a symlink or submodule
+                            fields = removed
+                        else:
+                            if entry.oid not in parsed:
+                                parsed[entry.oid] = price_fields(objects.read(entry.oid))
+                            fields = parsed[entry.oid]
+                            if fields is None:
+                                stats['unparsed'] += 1
+                                continue
+
+                        if entry.path not in vendor_ids:
+                            vendor_ids[entry.path] = conn.execute(
+                                "INSERT INTO vendors (path, stem) VALUES (?, ?)", (entry.path, _stem(entry.path)),
+                            ).lastrowid
+                        vendor = vendor_ids[entry.path]
+                        previous = latest.get(vendor)
+                        if fields is removed:
+                            if previous is None or previous[0] == 'D':
+                                continue
+                            status = 'D'
+                        elif previous is None or previous[0] == 'D':
+                            status = 'A'
+                        elif previous[1] == fields:
+                            continue
+                        else:
+                            status = 'M'
+                        conn.execute(insert, (vendor, seq, status, *fields))
+                        latest[vendor] = (status, fields)
+                        stats['points'] += 1
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('head', ?)", (head,))
+    finally:
+        conn.close()
+    return stats
+
+
+def _stem(path):
+    return os.path.splitext(path.rpartition('/')[2])[0]
+
+
+def _vendor_id(conn, vendor):
+    # A path as git shows it, or a file name with or without its extension
+    vendor = vendor.replace(os.sep, '/')
+    row = conn.execute("SELECT id, path FROM vendors WHERE path = ?", (vendor,)).fetchone()
+    if row:
+        return row
+    rows = conn.execute("SELECT id, path FROM vendors WHERE stem = ?", (_stem(vendor),)).fetchall()
+    if len(rows) > 1:
+        raise ValueError(f"'{vendor}' matches several vendors: {', '.join(path for _, path in rows)}")
+    return rows[0] if rows else None
+
+
+def vendor_history(vendor, db_path=DEFAULT_HISTORY_PATH):
+    """
+    Returns a vendor's price history as a list of HistoryPoint, oldest first.
+    `vendor` is the file's path in the repository (e.g. '_vendors/slack.yaml')
+    or just its file name, with or without the extension. Returns [] if the
+    store has no such vendor, and raises ValueError if a file name matches
+    more than one.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        found = _vendor_id(conn, vendor)
+        if found is None:
+            return []
+        vendor_id, path = found
+        rows = conn.execute(
+            f"SELECT c.oid, c.committed_at, p.status, {', '.join('p.' + c for c in PRICE_COLUMNS)} "
+            f"FROM points p JOIN commits c ON c.seq = p.seq WHERE p.vendor = ? ORDER BY p.seq",
+            (vendor_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [HistoryPoint(path, *row) for row in rows]
+
+
+def format_point(point):
+    """One line of text describing a point."""
+    date = time.strftime('%Y-%m-%d', time.gmtime(point.committed_at))
+    if point.status == 'D':
+        return f"{date}  {point.commit[:7]}  D  removed"
+    percent = '?' if point.percent_value is None else f"{point.percent_value:g}%"
+    return (f"{date}  {point.commit[:7]}  {point.status}  base: {point.base_pricing or '-'}  "
+            f"sso: {point.sso_pricing or '-'}  increase: {percent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index the price history of the vendor files from git history, and print it per vendor.")
+    parser.add_argument("vendors", nargs='*',
+                        help="Vendors to print the history of: a path such as _vendors/slack.yaml, or a file name.")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH,
+                        help=f"History store path (default: {DEFAULT_HISTORY_PATH}).")
+    parser.add_argument("--repo", default='.', help="Git repository to read (default: current directory).")
+    parser.add_argument("--rev", default='HEAD', help="Branch or commit whose history is indexed (default: HEAD).")
+    parser.add_argument("--no-update", action="store_true",
+                        help="Query the store as it is, without indexing new commits first.")
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text',
+                        help="Output format: human-readable text (default) or one JSON object per line.")
+    args = parser.parse_args()
+
+    if args.no_update and not os.path.exists(args.db):
+        parser.error(f"--no-update: no history store at {args.db}")
+    # Keep stdout parseable in jsonl mode
+    log = sys.stderr if args.format == 'jsonl' else sys.stdout
+    if not args.no_update:
+        try:
+            stats = update_history(args.db, args.repo, args.rev)
+        except GitError as e:
+            parser.error(str(e))
+        rebuilt = " (rebuilt)" if stats['rebuilt'] else ""
+        print(f"Indexed {stats['commits']} new commit(s), {stats['points']} price change(s){rebuilt}.", file=log)
+        if stats['unparsed']:
+            print(f"Skipped {stats['unparsed']} revision(s) that were not valid YAML.", file=log)
+
+    missing = False
+    for vendor in args.vendors:
+        try:
+            points = vendor_history(vendor, args.db)
+        except ValueError as e:
+            parser.error(str(e))
+        if not points:
+            print(f"No history for {vendor}", file=sys.stderr)
+            missing = True
+            continue
+        if args.format == 'jsonl':
+            for point in points:
+                print(json.dumps(point.to_dict()))
+        else:
+            print(points[0].path)
+            for point in points:
+                print(f"  {format_point(point)}")
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
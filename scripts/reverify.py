@@ -0,0 +1,288 @@
+"""
+Pick which vendors to re-verify next, oldest first.
+
+A persistent index orders every vendor by when its pricing was last looked at:
+the later of its updated_at and the date the scheduler last handed it out for
+re-verification. Each run:
+  1. brings the corpus artifact up to date (see build_corpus.py) and syncs the
+     index with it: only vendors whose content changed are re-keyed, and
+     removed vendors are dropped
+  2. pops the most overdue vendors off a heap into a batch, skipping (for this
+     run) vendors whose host has no tokens left in its token bucket, so one
+     site never gets a whole batch of requests
+  3. records the batch as verified today, which moves those vendors to the
+     back of the queue
+
+The heap is stored with the index, so a run costs O(changed + batch * log n)
+heap work instead of a sort of the whole corpus. Entries made stale by a
+change are skipped when popped (lazy deletion) and compacted away once they
+outnumber the live ones.
+
+Run from the repo root:
+  python3 scripts/reverify.py --batch 25
+  python3 scripts/reverify.py --batch 25 --format jsonl --dry-run
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.build_corpus import DEFAULT_CORPUS_PATH, build_corpus, load_columns
+from scripts.duplicates import vendor_host
+from scripts.validate_pricing import positive_number
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+VENDORS_DIR = os.path.join(REPO_ROOT, '_vendors')
+DEFAULT_STATE_PATH = os.path.join('.cache', 'reverify.json')
+
+# Bump when the layout of the state file changes.
+STATE_VERSION = 1
+
+DEFAULT_BATCH = 25
+# Per-host token bucket: at most HOST_BURST vendors of one host in a batch,
+# refilled at HOST_RATE vendors per day
+DEFAULT_HOST_RATE = 1.0
+DEFAULT_HOST_BURST = 2.0
+
+# How many overdue vendors one batch may pass over for rate-limited hosts
+# before giving up, per vendor requested
+_SCAN_FACTOR = 20
+
+# due: the later of updated_at and last_verified ('' if neither is known)
+ScheduledVendor = namedtuple('ScheduledVendor', ['path', 'host', 'updated_at', 'last_verified', 'due'])
+
+
+def _due(entry):
+    return max(entry['updated_at'] or '', entry['last_verified'] or '')
+
+
+def _date_text(value):
+    # Dates compare correctly as ISO text; anything else sorts as oldest
+    if isinstance(value, str) and len(value) >= 10 and value[4] == '-' and value[7] == '-':
+        return value[:10]
+    return None
+
+
+class TokenBucket:
+    """Allows `burst` takes at once, refilled continuously at `rate` per day."""
+
+    def __init__(self, rate, burst, tokens=None, updated=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst if tokens is None else tokens
+        self.updated = updated
+
+    def take(self, now):
+        """Takes a token at time `now` (seconds since the epoch). Returns False if none is left."""
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / 86400 * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ReverifyIndex:
+    """
+    The scheduler state: an entry per vendor path, a heap of
+    [due, updated_at, path, seq] ordered oldest first, and the hosts' token
+    buckets. An entry's seq is bumped whenever it is re-keyed; heap items with
+    an older seq are stale.
+    """
+
+    def __init__(self, entries=None, heap=None, buckets=None, host_rate=DEFAULT_HOST_RATE,
+                 host_burst=DEFAULT_HOST_BURST):
+        self.entries = entries or {}
+        self.heap = heap or []
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.buckets = {
+            host: TokenBucket(host_rate, host_burst, tokens, updated)
+            for host, (tokens, updated) in (buckets or {}).items()
+        }
+        self._seq = max((entry['seq'] for entry in self.entries.values()), default=0)
+
+    @classmethod
+    def load(cls, path, **options):
+        """Loads the state at path, or returns an empty index if there is none (or it is outdated)."""
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return cls(**options)
+        if not isinstance(stored, dict) or stored.get('version') != STATE_VERSION:
+            return cls(**options)
+        return cls(stored['entries'], stored['heap'], stored['buckets'], **options)
+
+    def save(self, path):
+        """Writes the state atomically."""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.reverify.')
+        state = {
+            'version': STATE_VERSION,
+            'entries': self.entries,
+            'heap': self.heap,
+            'buckets': {host: [b.tokens, b.updated] for host, b in self.buckets.items()},
+        }
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _push(self, path):
+        entry = self.entries[path]
+        self._seq += 1
+        entry['seq'] = self._seq
+        heapq.heappush(self.heap, [_due(entry), entry['updated_at'] or '', path, self._seq])
+
+    def _compact(self):
+        # Drop stale heap items once they outnumber the live ones
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.heap = [item for item in self.heap if self._live(item)]
+            heapq.heapify(self.heap)
+
+    def _live(self, item):
+        entry = self.entries.get(item[2])
+        return entry is not None and entry['seq'] == item[3]
+
+    def sync(self, vendors):
+        """
+        Updates the index from {path: (sha256, updated_at, host)} describing the
+        whole corpus. Only new and changed vendors are re-keyed. Returns a dict
+        of counts: added, updated, removed.
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        for path in [p for p in self.entries if p not in vendors]:
+            del self.entries[path]
+            counts['removed'] += 1
+        for path, (sha256, updated_at, host) in vendors.items():
+            entry = self.entries.get(path)
+            if entry is not None and entry['sha256'] == sha256:
+                continue
+            counts['updated' if entry is not None else 'added'] += 1
+            self.entries[path] = {
+                'sha256': sha256,
+                'updated_at': _date_text(updated_at),
+                'last_verified': entry['last_verified'] if entry is not None else None,
+                'host': host,
+                'seq': 0,
+            }
+            self._push(path)
+        self._compact()
+        return counts
+
+    def _bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return bucket
+
+    def next_batch(self, size, today=None, now=None):
+        """
+        Returns up to `size` ScheduledVendors, most overdue first, and marks
+        them verified on `today` (default: the current date). Vendors whose
+        host's bucket is empty are passed over and keep their place.
+        """
+        today = (today or date.today()).isoformat()
+        now = time.time() if now is None else now
+        batch, passed_over = [], []
+        scan_limit = size * _SCAN_FACTOR
+        while self.heap and len(batch) < size and len(passed_over) < scan_limit:
+            item = heapq.heappop(self.heap)
+            if not self._live(item):
+                continue
+            entry = self.entries[item[2]]
+            # Vendors without a host can't overload anyone
+            if entry['host'] is not None and not self._bucket(entry['host']).take(now):
+                passed_over.append(item)
+                continue
+            batch.append(ScheduledVendor(item[2], entry['host'], entry['updated_at'], entry['last_verified'], item[0]))
+        for item in passed_over:
+            heapq.heappush(self.heap, item)
+        for vendor in batch:
+            self.entries[vendor.path]['last_verified'] = today
+            self._push(vendor.path)
+        return batch
+
+
+def _verification_host(vendor_url, pricing_source):
+    # Re-verifying means reading the pricing page, so rate-limit its host
+    try:
+        sources = json.loads(pricing_source) if pricing_source else []
+    except ValueError:
+        sources = []
+    for source in sources:
+        host = vendor_host(source) if isinstance(source, str) and source.startswith(('http://', 'https://')) else None
+        if host:
+            return host
+    return vendor_host(vendor_url)
+
+
+def corpus_vendors(corpus_path):
+    """Reads {path: (sha256, updated_at, host)} for every vendor from a corpus artifact."""
+    columns = load_columns(corpus_path, ['path', 'sha256', 'updated_at', 'vendor_url', 'pricing_source'])
+    return {
+        path: (sha256, updated_at, _verification_host(vendor_url, pricing_source))
+        for path, sha256, updated_at, vendor_url, pricing_source in zip(
+            columns['path'], columns['sha256'], columns['updated_at'], columns['vendor_url'],
+            columns['pricing_source'],
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the next batch of vendors to re-verify, oldest first.")
+    parser.add_argument("--vendors", default=VENDORS_DIR, help="Vendor YAML directory (default: _vendors).")
+    parser.add_argument("--corpus", default=os.path.join(REPO_ROOT, DEFAULT_CORPUS_PATH),
+                        help=f"Corpus artifact to update and read (default: {DEFAULT_CORPUS_PATH}).")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH,
+                        help=f"Scheduler state file (default: {DEFAULT_STATE_PATH}).")
+    parser.add_argument("--batch", type=positive_number(int), default=DEFAULT_BATCH,
+                        help=f"Vendors to schedule (default: {DEFAULT_BATCH}).")
+    parser.add_argument("--host-rate", type=positive_number(float), default=DEFAULT_HOST_RATE,
+                        help=f"Vendors per host per day the bucket refills by (default: {DEFAULT_HOST_RATE:g}).")
+    parser.add_argument("--host-burst", type=positive_number(float), default=DEFAULT_HOST_BURST,
+                        help=f"Most vendors of one host in a batch (default: {DEFAULT_HOST_BURST:g}).")
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text',
+                        help="Output format: a table (default) or one JSON object per vendor.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show the batch without recording it as verified.")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to parse changed files with (default: number of CPUs).")
+    args = parser.parse_args()
+
+    build_corpus([args.vendors], args.corpus, jobs=args.jobs)
+    index = ReverifyIndex.load(args.state, host_rate=args.host_rate, host_burst=args.host_burst)
+    counts = index.sync(corpus_vendors(args.corpus))
+    batch = index.next_batch(args.batch)
+    if not args.dry_run:
+        index.save(args.state)
+
+    if args.format == 'jsonl':
+        for vendor in batch:
+            print(json.dumps({'type': 'vendor', **vendor._asdict()}))
+        return
+    print(f"Index: {len(index.entries)} vendors ({counts['added']} added, {counts['updated']} updated, "
+          f"{counts['removed']} removed)")
+    print(f"\n{'vendor':<32} {'updated_at':<11} {'verified':<11} host")
+    for vendor in batch:
+        print(f"{os.path.basename(vendor.path):<32} {vendor.updated_at or '-':<11} "
+              f"{vendor.last_verified or '-':<11} {vendor.host or '-'}")
+    if args.dry_run:
+        print(f"\nDry run: {len(batch)} vendors not recorded as verified.")
+
+
+if __name__ == '__main__':
+    main()
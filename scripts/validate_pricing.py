@@ -1,9 +1,31 @@
 import os
+import io
+import copy
 import re
+import json
 import yaml
+import hashlib
 import argparse
 import sys
+import tempfile
+import time
+import cProfile
+import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import currency
+from scripts.currency import (
+    CURRENCY_SYMBOLS, DEFAULT_FX_RATES_PATH, convert, detect_currency, load_fx_table, strip_currency,
+)
+from scripts.duplicates import find_duplicates, load_allowlist, read_record, vendor_host
+from scripts.file_watch import InotifyWatcher, open_watcher
+from scripts.git_objects import (
+    REGULAR_FILE_MODES, CatFileBatch, GitError, changed_vendor_entries, parse_range, split_range,
+)
 
 REQUIRED_FIELDS = ['name', 'base_pricing', 'sso_pricing', 'vendor_url', 'pricing_source', 'updated_at']
 
@@ -28,52 +50,268 @@ DEPRECATED_FIELDS = {
     ),
 }
 
-class _DuplicateKeyLoader(yaml.SafeLoader):
-    """SafeLoader that raises an error on duplicate YAML keys."""
+FormatCheck = namedtuple('FormatCheck', ['format', 'many', 'code', 'severity', 'message'])
+FormatCheck.__doc__ = """
+How one field's value must be written.
+  format:   a key of FORMATS, e.g. 'date' or 'url'
+  many:     the value may also be a list, each entry checked on its own
+  code, severity, message: the diagnostic for a value that doesn't match;
+            message is a str.format template given the offending value
+"""
+
+# Format checks, run in this order on fields that are present and non-empty
+FIELD_FORMATS = {
+    'updated_at': FormatCheck(
+        'date', False, 'invalid-date', 'error', "'updated_at' value '{value}' is not a valid YYYY-MM-DD date.",
+    ),
+    'vendor_url': FormatCheck(
+        'url', False, 'invalid-url', 'error', "'vendor_url' does not look like a valid URL: '{value}'.",
+    ),
+    # Non-URL values are a warning rather than an error — maintainers may approve
+    # exceptions where a direct URL is not available (e.g. pricing via sales quote).
+    'pricing_source': FormatCheck(
+        'url', True, 'pricing-source-not-url', 'warning',
+        "'pricing_source' does not look like a valid URL: '{value}'. "
+        "Please provide a direct link to the pricing page wherever possible; "
+        "maintainers may approve exceptions where no URL is available.",
+    ),
+}
+
+# The fields validate_prices reads
+PRICING_FIELDS = ('base_pricing', 'sso_pricing', 'percent_increase')
+
+# Stable diagnostic codes, mapped to the group ('schema', 'pricing' or 'links',
+# the last from check_links.py) each belongs to. A diagnostic's category is its
+# group plus its severity, e.g. 'schema-error'. Codes are part of the
+# machine-readable output: never rename one.
+DIAGNOSTIC_GROUPS = {
+    'read-failed': 'schema',
+    'not-a-regular-file': 'schema',
+    'yaml-invalid': 'schema',
+    'duplicate-key': 'schema',
+    'empty-file': 'schema',
+    'not-a-mapping': 'schema',
+    'missing-field': 'schema',
+    'unknown-field': 'schema',
+    'deprecated-field': 'schema',
+    'invalid-date': 'schema',
+    'invalid-url': 'schema',
+    'pricing-source-not-url': 'schema',
+    'duplicate-name': 'schema',
+    'duplicate-vendor-url': 'schema',
+    'similar-name': 'schema',
+    'call-us-with-percent': 'pricing',
+    'unparseable-price': 'pricing',
+    'unit-mismatch': 'pricing',
+    'currency-mismatch': 'pricing',
+    'zero-base-price': 'pricing',
+    'missing-percent-increase': 'pricing',
+    'percent-mismatch': 'pricing',
+    'broken-link': 'links',
+    'link-check-failed': 'links',
+}
+
+# Bump when the shape of cached results changes.
+CACHE_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'validate_pricing.json')
+
+class Diagnostic(str):
+    """
+    A validation message carrying a stable, machine-readable code.
+    It is the message string itself, so code that prints or searches errors
+    and warnings as text keeps working.
+      code:     stable identifier from DIAGNOSTIC_GROUPS, e.g. 'missing-field'
+      severity: 'error' or 'warning'
+      field:    the vendor field concerned, or None for file-level problems
+    """
+
+    def __new__(cls, message, code, severity, field=None):
+        self = super().__new__(cls, message)
+        self.code = code
+        self.severity = severity
+        self.field = field
+        return self
+
+    @property
+    def message(self):
+        return str(self)
+
+    @property
+    def category(self):
+        return f"{DIAGNOSTIC_GROUPS[self.code]}-{self.severity}"
+
+    def __reduce__(self):
+        return (Diagnostic, (str(self), self.code, self.severity, self.field))
+
+    def to_dict(self):
+        return {
+            'severity': self.severity,
+            'code': self.code,
+            'category': self.category,
+            'field': self.field,
+            'message': str(self),
+        }
+
+def _error(errors, code, message, field=None):
+    errors.append(Diagnostic(message, code, 'error', field))
+
+def _warning(warnings, code, message, field=None):
+    warnings.append(Diagnostic(message, code, 'warning', field))
+
+class DuplicateKeyError(yaml.YAMLError):
+    """Raised by the vendor YAML loaders when a mapping repeats a key."""
+
+class _DuplicateKeyMixin:
+    """Loader mixin that raises an error on duplicate YAML keys."""
     def construct_mapping(self, node, deep=False):
         keys = [self.construct_object(key_node, deep=deep) for key_node, _ in node.value]
-        duplicates = {k for k in keys if keys.count(k) > 1}
+        seen = set()
+        duplicates = set()
+        try:
+            for k in keys:
+                if k in seen:
+                    duplicates.add(k)
+                else:
+                    seen.add(k)
+        except TypeError:
+            # Unhashable key (e.g. a list): fall back to equality scanning so
+            # the outcome matches what it has always been for these documents.
+            duplicates = {k for k in keys if keys.count(k) > 1}
         if duplicates:
-            raise yaml.YAMLError(f"Duplicate key(s) in YAML: {', '.join(sorted(duplicates))}")
+            raise DuplicateKeyError(f"Duplicate key(s) in YAML: {', '.join(sorted(duplicates))}")
         return super().construct_mapping(node, deep=deep)
 
+class _DuplicateKeyLoader(_DuplicateKeyMixin, yaml.SafeLoader):
+    """SafeLoader that raises an error on duplicate YAML keys."""
+
+# libyaml's parser is much faster, but only available when PyYAML was built against it.
+if getattr(yaml, '__with_libyaml__', False):
+    class _CDuplicateKeyLoader(_DuplicateKeyMixin, yaml.CSafeLoader):
+        """CSafeLoader that raises an error on duplicate YAML keys."""
+else:
+    _CDuplicateKeyLoader = None
 
-def extract_price(price_str):
+def load_vendor_yaml(content):
     """
-    Extracts the first valid monetary amount from a string.
-    Returns a float if found, otherwise returns None.
+    Parses a vendor YAML document, raising DuplicateKeyError on duplicate keys.
+    Uses libyaml when it is installed. libyaml describes syntax errors
+    differently, so a document it rejects is re-parsed with the pure-Python
+    loader to keep error messages identical either way.
     """
-    if not isinstance(price_str, str):
-        price_str = str(price_str)
+    if _CDuplicateKeyLoader is None:
+        return yaml.load(content, Loader=_DuplicateKeyLoader)
+    try:
+        return yaml.load(content, Loader=_CDuplicateKeyLoader)
+    except yaml.YAMLError:
+        return yaml.load(content, Loader=_DuplicateKeyLoader)
+
+
+CALL_US_KEYWORDS = ('call', 'custom', 'quote', 'contact')
+
+# Legacy footnote references (e.g. "[^id]") left in old-format pricing fields
+_FOOTNOTE_REF_RE = re.compile(r'\[\^[^\]]+\]')
+
+def _price_head_re(codes):
+    # An optional leading ISO code ('CHF 10', 'USD $10'), then leading currency
+    # symbols, including letter-prefixed ones ('US$10'), any whitespace after
+    # them, then an optional leading amount
+    qualified = sorted((s for s in CURRENCY_SYMBOLS if s[0].isalpha() and s not in codes), key=len, reverse=True)
+    return re.compile(
+        rf"^(?:(?:{'|'.join(sorted(codes))})(?![A-Za-z])\s*)?"
+        rf"(?P<currency>(?:{'|'.join(map(re.escape, qualified))})?[\$€£¥]*)\s*(?P<amount>\d+(?:\.\d+)?)?"
+    )
 
+_PRICE_HEAD_RE = _price_head_re(frozenset(load_fx_table().rates))
+
+# First monetary amount anywhere in the string
+_AMOUNT_RE = re.compile(r'\d+(?:\.\d+)?')
+
+_CURRENCY_SYMBOLS = '$€£¥'
+
+# Billing period written into the unit, e.g. 'per u/m', '/mo', 'per host-month', 'per year'
+_PERIOD_RE = re.compile(
+    r'(?:/|\bper\s+|-)\s*(?:(?P<month>m|mo|mth|month)|(?P<year>y|yr|year))\b'
+    r'|\b(?:(?P<monthly>monthly)|(?P<yearly>annual|annually|yearly))\b'
+)
+
+PriceInfo = namedtuple('PriceInfo', ['currency', 'amount', 'unit', 'period', 'call_us'])
+PriceInfo.__doc__ = """
+Parsed form of a pricing string.
+  currency: leading currency symbol(s) (after any ISO code), or the symbol directly after the amount; None if absent
+  amount:   first monetary amount as a float (see extract_price); None if absent
+  unit:     normalised unit suffix (see extract_unit)
+  period:   'month' or 'year' if the unit names a billing period, else None
+  call_us:  True if the string implies "Call Us" / custom pricing (see is_call_us)
+"""
+
+def _parse_price(price_str, call_us):
     # Remove commas that might be used as thousand separators
     clean_str = price_str.replace(',', '')
+    head = _PRICE_HEAD_RE.match(clean_str)
+    amount = head.group('amount')
+    if amount is None:
+        # No amount straight after the currency; take the first one anywhere.
+        # Only a currency code, symbols and whitespace precede this point, so searching
+        # from here finds the same amount as searching the whole string.
+        found = _AMOUNT_RE.search(clean_str, head.end())
+        amount = found.group(0) if found else None
+    unit = clean_str[head.end():].strip().lower()
 
-    # Match the first sequence of digits and optional decimals
-    match = re.search(r'(\d+(?:\.\d+)?)', clean_str)
-    if match:
-        return float(match.group(1))
-    return None
+    currency = head.group('currency') or None
+    if currency is None and head.group('amount') is not None and unit and unit[0] in _CURRENCY_SYMBOLS:
+        currency = unit[0]
+
+    period = None
+    found = _PERIOD_RE.search(unit)
+    if found:
+        period = 'month' if (found.group('month') or found.group('monthly')) else 'year'
+
+    return PriceInfo(currency, float(amount) if amount is not None else None, unit, period, call_us)
+
+@lru_cache(maxsize=65536)
+def _parse_price_str(price_str):
+    lower_str = price_str.lower()
+    return _parse_price(price_str, any(keyword in lower_str for keyword in CALL_US_KEYWORDS))
+
+def parse_price(price_str):
+    """
+    Parses a pricing string in a single pass into a PriceInfo record.
+    Results for string inputs are memoized, since the same few pricing strings
+    recur across the whole corpus. Non-string values (e.g. a bare YAML number)
+    are parsed via str() and are never treated as "Call Us".
+    """
+    if isinstance(price_str, str):
+        return _parse_price_str(price_str)
+    return _parse_price(str(price_str), False)
+
+# Lets benchmarks and tests measure cold parsing
+parse_price.cache_clear = _parse_price_str.cache_clear
+
+def parse_prices(price_strs):
+    """Batch form of parse_price. Returns a list of PriceInfo in input order."""
+    return [parse_price(price_str) for price_str in price_strs]
+
+def extract_price(price_str):
+    """
+    Extracts the first valid monetary amount from a string.
+    Returns a float if found, otherwise returns None.
+    """
+    return parse_price(price_str).amount
 
 def extract_unit(price_str):
     """
     Extracts the unit suffix from a pricing string by stripping the leading
-    currency symbol(s) and numeric value. Returns a normalised lowercase string,
+    currency code, currency symbol(s) and numeric value. Returns a normalised lowercase string,
     or empty string if nothing remains (e.g. bare '$10').
 
     Examples:
       '$10 per u/m'  -> 'per u/m'
       '4.99€ / device' -> '€ / device'  (currency attached to number, kept)
+      'CHF 10 / user' -> '/ user'
       '$2,500'       -> ''
     """
-    if not isinstance(price_str, str):
-        price_str = str(price_str)
-    clean_str = price_str.replace(',', '')
-    # Strip leading currency symbols before the number
-    clean_str = re.sub(r'^[\$€£¥]+', '', clean_str).strip()
-    # Remove the first number (including decimals)
-    unit = re.sub(r'^\d+(?:\.\d+)?', '', clean_str).strip()
-    return unit.lower()
+    return parse_price(price_str).unit
 
 def is_call_us(pricing_str):
     """
@@ -81,59 +319,175 @@ def is_call_us(pricing_str):
     """
     if not isinstance(pricing_str, str):
         return False
-    lower_str = pricing_str.lower()
-    return any(keyword in lower_str for keyword in ['call', 'custom', 'quote', 'contact'])
+    return parse_price(pricing_str).call_us
+
+def clean_pricing(value):
+    """
+    Returns a pricing field value as a string with legacy footnote references
+    (e.g. "[^id]") stripped, or None if nothing is left. Stripping them means
+    old-format PRs don't generate spurious percentage warnings on top of the
+    deprecation warning issued by validate_schema.
+    """
+    return _FOOTNOTE_REF_RE.sub('', str(value or '')).strip() or None
+
+def parse_percent(value):
+    """
+    Parses a percent_increase value such as 150, '150%' or '33.3 %'.
+    Returns a float, or None if it isn't numeric (e.g. "???" or "N/A").
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # Remove '%' and parse
+        try:
+            return float(value.replace('%', '').strip())
+        except ValueError:
+            pass
+    return None
 
 def _is_valid_url(value):
     """Returns True if value looks like a valid http/https URL."""
     return isinstance(value, str) and re.match(r'https?://', value) is not None
 
-def validate_schema(data, warnings, errors):
+def _is_valid_date(value):
+    """Returns True if value is (or reads as) a YYYY-MM-DD date."""
+    try:
+        datetime.strptime(str(value), '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+# Format name (see FormatCheck) -> predicate a valid value satisfies
+FORMATS = {'date': _is_valid_date, 'url': _is_valid_url}
+
+Rules = namedtuple('Rules', ['required_fields', 'known_fields', 'deprecated_fields', 'field_formats'])
+Rules.__doc__ = """
+A snapshot of the field rules validate_schema applies.
+  required_fields:   tuple of field names, in the order they are reported
+  known_fields:      frozenset of every accepted field name
+  deprecated_fields: tuple of (field, message) pairs
+  field_formats:     tuple of (field, FormatCheck) pairs, in the order they are checked
+"""
+
+def current_rules():
     """
-    Validates required fields, known fields, date format, and URL format.
-    Mutates warnings and errors in place.
+    Returns the rules as REQUIRED_FIELDS, KNOWN_FIELDS, DEPRECATED_FIELDS and
+    FIELD_FORMATS define them right now.
     """
-    # Required fields
-    for field in REQUIRED_FIELDS:
+    return Rules(
+        tuple(REQUIRED_FIELDS), frozenset(KNOWN_FIELDS), tuple(DEPRECATED_FIELDS.items()),
+        tuple(FIELD_FORMATS.items()),
+    )
+
+SchemaRule = namedtuple('SchemaRule', ['name', 'group', 'reads', 'check'])
+SchemaRule.__doc__ = """
+One check compiled from a Rules snapshot.
+  name:  identifies the check, e.g. 'required:name' or 'format:vendor_url'
+  group: 'schema' (run by validate_schema) or 'pricing' (validate_prices)
+  reads: frozenset of the fields whose values or presence the check looks
+         at, or None for the unknown-field check, which reads every field
+         outside known_fields
+  check: check(data, warnings, errors), appending what it finds
+"""
+
+def _required_check(field):
+    message = f"Missing required field: '{field}'."
+
+    def check(data, warnings, errors):
         if not data.get(field):
-            errors.append(f"Missing required field: '{field}'.")
+            _error(errors, 'missing-field', message, field)
+    return check
 
-    # Unknown fields (typo detection)
-    unknown = set(data.keys()) - KNOWN_FIELDS
-    if unknown:
-        warnings.append(f"Unknown field(s): {', '.join(sorted(unknown))}. Check for typos.")
+def _unknown_check(known_fields):
+    def check(data, warnings, errors):
+        unknown = data.keys() - known_fields
+        if unknown:
+            _warning(warnings, 'unknown-field', f"Unknown field(s): {', '.join(sorted(unknown))}. Check for typos.")
+    return check
 
-    # Deprecated fields
-    for field, message in DEPRECATED_FIELDS.items():
+def _deprecated_check(field, message):
+    def check(data, warnings, errors):
         if field in data:
-            warnings.append(message)
-
-    # updated_at must be a parseable date
-    updated_at = data.get('updated_at')
-    if updated_at:
-        try:
-            datetime.strptime(str(updated_at), '%Y-%m-%d')
-        except ValueError:
-            errors.append(f"'updated_at' value '{updated_at}' is not a valid YYYY-MM-DD date.")
+            _warning(warnings, 'deprecated-field', message, field)
+    return check
 
-    # vendor_url must look like a URL
-    vendor_url = data.get('vendor_url')
-    if vendor_url and not _is_valid_url(vendor_url):
-        errors.append(f"'vendor_url' does not look like a valid URL: '{vendor_url}'.")
+def _format_check(field, spec):
+    valid = FORMATS[spec.format]
+    is_error = spec.severity == 'error'
 
-    # pricing_source can be a string or list; each entry should look like a URL.
-    # Non-URL values are a warning rather than an error — maintainers may approve
-    # exceptions where a direct URL is not available (e.g. pricing via sales quote).
-    pricing_source = data.get('pricing_source')
-    if pricing_source:
-        sources = pricing_source if isinstance(pricing_source, list) else [pricing_source]
-        for src in sources:
-            if not _is_valid_url(src):
-                warnings.append(
-                    f"'pricing_source' does not look like a valid URL: '{src}'. "
-                    f"Please provide a direct link to the pricing page wherever possible; "
-                    f"maintainers may approve exceptions where no URL is available."
+    def check(data, warnings, errors):
+        value = data.get(field)
+        if not value:
+            return
+        for item in (value if spec.many and isinstance(value, list) else (value,)):
+            if not valid(item):
+                (_error if is_error else _warning)(
+                    errors if is_error else warnings, spec.code, spec.message.format(value=item), field,
                 )
+    return check
+
+class CompiledSchema:
+    """
+    The checks a Rules snapshot describes, compiled once (see compile_rules):
+    one SchemaRule per required, deprecated and formatted field, one for
+    unknown fields and one for the prices, in the order their diagnostics are
+    reported. run() applies them to a document; affected() picks out the
+    ones to re-run when only some fields changed.
+    """
+
+    def __init__(self, rules):
+        compiled = [
+            SchemaRule(f'required:{field}', 'schema', frozenset([field]), _required_check(field))
+            for field in rules.required_fields
+        ]
+        compiled.append(SchemaRule('unknown-fields', 'schema', None, _unknown_check(rules.known_fields)))
+        compiled += [
+            SchemaRule(f'deprecated:{field}', 'schema', frozenset([field]), _deprecated_check(field, message))
+            for field, message in rules.deprecated_fields
+        ]
+        compiled += [
+            SchemaRule(f'format:{field}', 'schema', frozenset([field]), _format_check(field, spec))
+            for field, spec in rules.field_formats
+        ]
+        compiled.append(SchemaRule('prices', 'pricing', frozenset(PRICING_FIELDS), validate_prices))
+        self.rules = tuple(compiled)
+        self.known_fields = rules.known_fields
+        self._checks = {
+            group: tuple(rule.check for rule in self.rules if group in (None, rule.group))
+            for group in (None, 'schema', 'pricing')
+        }
+        self._readers = {}
+        for index, rule in enumerate(self.rules):
+            for field in rule.reads or ():
+                self._readers.setdefault(field, []).append(index)
+        self._unknown_readers = [index for index, rule in enumerate(self.rules) if rule.reads is None]
+
+    def run(self, data, warnings, errors, group=None):
+        """Applies every rule (or only those in `group`) to a mapping. Mutates warnings and errors in place."""
+        for check in self._checks[group]:
+            check(data, warnings, errors)
+
+    def affected(self, changed):
+        """Returns the indexes into rules of the rules that read any of the `changed` fields, in order."""
+        indexes = set()
+        for field in changed:
+            indexes.update(self._readers.get(field, ()))
+            if field not in self.known_fields:
+                indexes.update(self._unknown_readers)
+        return sorted(indexes)
+
+@lru_cache(maxsize=32)
+def compile_rules(rules):
+    """Returns the CompiledSchema for a Rules snapshot, compiling it on first use."""
+    return CompiledSchema(rules)
+
+def validate_schema(data, warnings, errors, rules=None):
+    """
+    Validates required fields, known fields, date format, and URL format.
+    Mutates warnings and errors in place. Uses the module's field lists unless
+    a Rules snapshot is given.
+    """
+    compile_rules(rules or current_rules()).run(data, warnings, errors, 'schema')
 
 
 def validate_vendor_file(filepath):
@@ -141,82 +495,372 @@ def validate_vendor_file(filepath):
     Validates a single vendor YAML file.
     Returns (is_valid, warnings, errors)
     """
+    return _validate_vendor_file(filepath)[1]
+
+def _validate_vendor_file(filepath, timer=None, validator=None, raw=None):
+    """
+    Validates a single vendor YAML file, also returning the SHA-256 digest of the
+    bytes that were validated so the result can be cached against that exact content.
+    Returns (digest, (is_valid, warnings, errors)); digest is None if the file
+    could not be read. Phase timings are recorded into `timer` (a _PhaseTimer) if given.
+    The content is checked with `validator` (an IncrementalValidator) if given.
+    If the file's bytes have already been read, pass them as `raw`.
+    """
+    try:
+        if raw is None:
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+    except Exception as e:
+        errors = []
+        _error(errors, 'read-failed', f"Failed to read file: {e}")
+        return None, (False, [], errors)
+    finally:
+        if timer is not None:
+            timer.lap('read')
+    if validator is not None:
+        result = validator.validate(raw)
+        return digest, (result.valid, result.warnings, result.errors)
+    return digest, _validate_vendor_content(raw, timer)
+
+class _PhaseTimer:
+    """Accumulates wall time per validation phase. Only created under --profile."""
+
+    def __init__(self):
+        self.timings = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charges the time since the previous lap to `phase`."""
+        now = time.perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - self.last
+        self.last = now
+
+def _profile_vendor_file(filepath, raw=None):
+    """
+    _validate_vendor_file with phase timing.
+    Returns (digest, (is_valid, warnings, errors), {phase: seconds, 'total': seconds}).
+    """
+    timer = _PhaseTimer()
+    start = timer.last
+    digest, outcome = _validate_vendor_file(filepath, timer, raw=raw)
+    timer.timings['total'] = time.perf_counter() - start
+    return digest, outcome, timer.timings
+
+def _validate_read_file(item):
+    """Worker: _validate_vendor_file for a (filepath, raw bytes or None) pair."""
+    return _validate_vendor_file(item[0], raw=item[1])
+
+def _profile_read_file(item):
+    """Worker: _profile_vendor_file for a (filepath, raw bytes or None) pair."""
+    return _profile_vendor_file(item[0], raw=item[1])
+
+def _validate_vendor_content(raw, timer=None):
+    """
+    Validates the raw bytes of a vendor YAML file.
+    Returns (is_valid, warnings, errors)
+    """
+    data, warnings, errors = validate_vendor_document(raw, timer)
+    return len(errors) == 0, warnings, errors
+
+def validate_vendor_document(raw, timer=None):
+    """
+    Parses and validates the raw bytes of a vendor YAML file, for callers that
+    also need the parsed document.
+    Returns (data, warnings, errors); data is None if the file could not be parsed.
+    """
     warnings = []
     errors = []
+    try:
+        data = _load_document(raw, errors)
+    finally:
+        if timer is not None:
+            timer.lap('parse')
+    if errors:
+        return None, warnings, errors
+    return _check_document(data, warnings, errors, timer), warnings, errors
 
+def _load_document(raw, errors):
+    """
+    Parses a vendor YAML document given as bytes or text. Returns the parsed
+    data, or None after recording why it could not be parsed in errors.
+    """
     try:
-        with open(filepath, 'r') as f:
-            content = f.read()
+        # Decode bytes exactly as open(filepath, 'r') would
+        content = io.TextIOWrapper(io.BytesIO(raw)).read() if isinstance(raw, bytes) else raw
         # Use duplicate-key-detecting loader
-        data = yaml.load(content, Loader=_DuplicateKeyLoader)
+        return load_vendor_yaml(content)
+    except DuplicateKeyError as e:
+        _error(errors, 'duplicate-key', f"Failed to parse YAML: {e}")
     except yaml.YAMLError as e:
-        errors.append(f"Failed to parse YAML: {e}")
-        return False, warnings, errors
+        _error(errors, 'yaml-invalid', f"Failed to parse YAML: {e}")
     except Exception as e:
-        errors.append(f"Failed to read file: {e}")
-        return False, warnings, errors
+        _error(errors, 'read-failed', f"Failed to read file: {e}")
+    return None
 
+def _check_document(data, warnings, errors, timer=None, rules=None):
+    """Validates a parsed document. Returns data, or None if it is empty or not a mapping."""
     if not data:
-        errors.append("Empty YAML file.")
-        return False, warnings, errors
+        _error(errors, 'empty-file', "Empty YAML file.")
+        return None
+    if not isinstance(data, dict):
+        _error(errors, 'not-a-mapping',
+               f"A vendor file must be a mapping of field names to values, not a {type(data).__name__}.")
+        return None
 
     # Schema validation
-    validate_schema(data, warnings, errors)
+    validate_schema(data, warnings, errors, rules)
+    if timer is not None:
+        timer.lap('schema')
+
+    # Pricing checks
+    validate_prices(data, warnings, errors)
+    if timer is not None:
+        timer.lap('pricing')
+
+    return data
+
+class ValidationResult(namedtuple('ValidationResult', ['valid', 'errors', 'warnings', 'data'])):
+    """
+    Outcome of validating one document with a Validator.
+      valid:    True if there are no errors
+      errors:   list of error Diagnostics
+      warnings: list of warning Diagnostics
+      data:     the parsed document, or None if it could not be parsed
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """JSON-serialisable form, without the document itself."""
+        return {
+            'valid': self.valid,
+            'errors': [d.to_dict() for d in self.errors],
+            'warnings': [d.to_dict() for d in self.warnings],
+        }
+
+class Validator:
+    """
+    Validates vendor documents held in memory, with no filesystem access:
+    YAML text (str), the raw bytes of a file, or an already-parsed dict.
+
+    The rule set is snapshotted when the validator is created (see
+    current_rules), so later changes to the module's field lists don't
+    affect it. Documents are parsed with the same duplicate-key-detecting
+    loader as the files. A validate() call keeps all of its state local, so
+    one Validator can be shared by any number of threads.
+
+      validator = Validator()
+      result = validator.validate(request_body)
+      if not result.valid:
+          return [error.to_dict() for error in result.errors]
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules or current_rules()
+
+    def validate(self, document):
+        """Validates one document. Returns a ValidationResult. Raises TypeError for other input types."""
+        warnings = []
+        errors = []
+        data = _load_input(document, errors)
+        if not errors:
+            data = _check_document(data, warnings, errors, rules=self.rules)
+        return ValidationResult(not errors, errors, warnings, data)
+
+    def validate_many(self, documents, jobs=1):
+        """
+        Validates a batch of documents. Returns ValidationResults in input order.
+        With jobs > 1 the batch is spread across worker processes (the
+        documents and results must then be picklable).
+        """
+        return map_files(self.validate, list(documents), jobs)
+
+def _load_input(document, errors):
+    # A Validator's input: YAML text, the raw bytes of a file, or a parsed dict
+    if isinstance(document, (bytes, bytearray, memoryview)):
+        return _load_document(bytes(document), errors)
+    if isinstance(document, str):
+        return _load_document(document, errors)
+    if isinstance(document, dict):
+        return document
+    raise TypeError(f"expected str, bytes or dict, not {type(document).__name__}")
+
+def changed_fields(old, new):
+    """
+    Returns the set of top-level fields that differ between two parsed
+    documents: added, removed, or holding a different value (a value of a
+    different type, e.g. 1 and True, counts as different).
+    """
+    return {
+        field for field in old.keys() | new.keys()
+        if field not in old or field not in new or repr(old[field]) != repr(new[field])
+    }
+
+class IncrementalValidator:
+    """
+    Validates successive versions of one document, such as a file open in an
+    editor, re-running only the rules (see CompiledSchema) that read a field
+    that changed since the previous version. Results are always identical to
+    Validator.validate's. Unlike a Validator it keeps state between calls, so
+    use one per document and don't share it across threads.
+
+      validator = IncrementalValidator()
+      validator.validate(text)                       # runs every rule
+      validator.validate(edited_text)                # only rules reading changed fields
+      validator.validate(data, changed={'sso_pricing'})
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules or current_rules()
+        self._schema = compile_rules(self.rules)
+        # The previous version and each rule's (warnings, errors) for it
+        self._data = None
+        self._outcomes = None
+        # How many rules the last validate() ran
+        self.rules_run = 0
+
+    def validate(self, document, changed=None):
+        """
+        Validates the next version of the document. `changed` is the set of
+        fields that differ from the previous version, if the caller already
+        knows it (e.g. from an editor); otherwise it is worked out by comparing
+        the two. Returns a ValidationResult.
+        """
+        warnings = []
+        errors = []
+        data = _load_input(document, errors)
+        if errors or not data or not isinstance(data, dict):
+            # Nothing to compare the next version with
+            self._data = self._outcomes = None
+            self.rules_run = 0
+            if not errors:
+                data = _check_document(data, warnings, errors, rules=self.rules)
+            return ValidationResult(not errors, errors, warnings, data)
+
+        rules = self._schema.rules
+        if self._outcomes is None:
+            indexes = range(len(rules))
+            outcomes = [None] * len(rules)
+        else:
+            indexes = self._schema.affected(changed_fields(self._data, data) if changed is None else changed)
+            outcomes = list(self._outcomes)
+        for index in indexes:
+            rule_warnings, rule_errors = [], []
+            rules[index].check(data, rule_warnings, rule_errors)
+            outcomes[index] = (rule_warnings, rule_errors)
+        for rule_warnings, rule_errors in outcomes:
+            warnings += rule_warnings
+            errors += rule_errors
+        # Copied, so a caller editing the dict in place can't change what it is compared with
+        self._data = copy.deepcopy(data)
+        self._outcomes = outcomes
+        self.rules_run = len(indexes)
+        return ValidationResult(not errors, errors, warnings, data)
+
+# Allow a small margin of error for rounding (e.g., 200% instead of 199.9%)
+PERCENT_MARGIN = 1.5 # 1.5% margin allows for 33% instead of 33.3% rounding by users
+
+def expected_percent_increase(data):
+    """
+    Returns the percent_increase that base_pricing and sso_pricing imply,
+    rounded to a whole percent as the validator suggests it, or None unless
+    the prices compare exactly: both parseable, not Call Us, a non-zero base,
+    the same units and the same currency.
+    """
+    base_pricing = clean_pricing(data.get('base_pricing'))
+    sso_pricing = clean_pricing(data.get('sso_pricing'))
+    if not base_pricing or not sso_pricing:
+        return None
+    base_price = parse_price(base_pricing)
+    sso_price = parse_price(sso_pricing)
+    if sso_price.call_us or base_price.amount is None or sso_price.amount is None or base_price.amount == 0:
+        return None
+    base_currency = detect_currency(base_pricing)
+    sso_currency = detect_currency(sso_pricing)
+    if base_currency is not None and sso_currency is not None and base_currency != sso_currency:
+        return None
+    if strip_currency(base_price.unit) != strip_currency(sso_price.unit):
+        return None
+    return int(f"{(sso_price.amount - base_price.amount) / base_price.amount * 100:.0f}")
 
-    # Strip legacy footnote references (e.g. "[^id]") from pricing fields so
-    # old-format PRs don't generate spurious percentage warnings on top of the
-    # deprecation warning already issued above.
-    footnote_ref = re.compile(r'\[\^[^\]]+\]')
-    base_pricing = footnote_ref.sub('', str(data.get('base_pricing') or '')).strip() or None
-    sso_pricing = footnote_ref.sub('', str(data.get('sso_pricing') or '')).strip() or None
-    percent_increase_raw = data.get('percent_increase')
+def _format_money(amount, symbol, code):
+    # '$10.0' with a symbol, '10.0 CHF' with only a code, plain '10.0' otherwise
+    if symbol:
+        return f"{symbol}{amount}"
+    if code:
+        return f"{amount} {code}"
+    return str(amount)
+
+def validate_prices(data, warnings, errors):
+    """
+    Validates the pricing fields: that percent_increase matches base_pricing and
+    sso_pricing, and that the two prices are comparable.
+    Mutates warnings and errors in place.
+    """
+    base_pricing = clean_pricing(data.get('base_pricing'))
+    sso_pricing = clean_pricing(data.get('sso_pricing'))
 
     if not base_pricing or not sso_pricing:
         # Already caught by schema validation; no need to go further
-        return len(errors) == 0, warnings, errors
+        return
 
     # Parse provided user percentage
-    provided_pct = None
-    if isinstance(percent_increase_raw, (int, float)):
-        provided_pct = float(percent_increase_raw)
-    elif isinstance(percent_increase_raw, str):
-        # Remove '%' and parse
-        pct_clean = percent_increase_raw.replace('%', '').strip()
-        try:
-            provided_pct = float(pct_clean)
-        except ValueError:
-            pass # e.g. "???" or "N/A"
+    provided_pct = parse_percent(data.get('percent_increase'))
+
+    base_price = parse_price(base_pricing)
+    sso_price = parse_price(sso_pricing)
 
     # Check for "Call Us" exceptions
-    if is_call_us(sso_pricing):
+    if sso_price.call_us:
         # We don't strictly calculate. We just check if the user provided a number which would be weird.
         if provided_pct is not None:
-            warnings.append(f"SSO pricing looks like 'Contact Us' ('{sso_pricing}'), but a numeric percentage ({provided_pct}%) was provided.")
-        return len(errors) == 0, warnings, errors
+            _warning(warnings, 'call-us-with-percent', f"SSO pricing looks like 'Contact Us' ('{sso_pricing}'), but a numeric percentage ({provided_pct}%) was provided.", 'percent_increase')
+        return
 
     # Extract numeric values
-    base_val = extract_price(base_pricing)
-    sso_val = extract_price(sso_pricing)
+    base_val = base_price.amount
+    sso_val = sso_price.amount
 
     if base_val is None or sso_val is None:
-        warnings.append(f"Could not extract numeric price from base ('{base_pricing}') and/or sso ('{sso_pricing}'). Manual review recommended.")
-        return len(errors) == 0, warnings, errors
+        _warning(warnings, 'unparseable-price', f"Could not extract numeric price from base ('{base_pricing}') and/or sso ('{sso_pricing}'). Manual review recommended.")
+        return
+
+    # If the two prices are in different currencies, convert the SSO price into
+    # the base price's currency so the percentage compares like-for-like. The
+    # rates are approximate, so the percentage check becomes a warning.
+    base_currency = detect_currency(base_pricing)
+    sso_currency = detect_currency(sso_pricing)
+    converted = base_currency is not None and sso_currency is not None and base_currency != sso_currency
+    if converted:
+        sso_val = round(convert(sso_val, sso_currency, base_currency), 2)
+        _warning(
+            warnings, 'currency-mismatch',
+            f"Pricing currencies differ: base is {base_currency} ('{base_pricing}'), sso is {sso_currency} ('{sso_pricing}'). "
+            f"The SSO price was converted to {sso_val} {base_currency} using FX rates from {load_fx_table().version}; "
+            f"please verify the percentage.",
+            'sso_pricing'
+        )
 
     # Warn if the unit suffixes differ — the percentage is still calculated and
     # checked below (likely a typo), but if units mismatch the percentage check
     # is also downgraded to a warning since the numbers may not be comparable.
-    base_unit = extract_unit(base_pricing)
-    sso_unit = extract_unit(sso_pricing)
-    units_match = base_unit == sso_unit
+    # Currency markers are left out of the comparison; they are checked above.
+    units_match = strip_currency(base_price.unit) == strip_currency(sso_price.unit)
     if not units_match:
-        warnings.append(
+        _warning(
+            warnings, 'unit-mismatch',
             f"Pricing units appear to differ: base='{base_pricing}', sso='{sso_pricing}'. "
             f"Please verify the percentage is calculated on a like-for-like basis."
         )
 
+    # Amounts are reported in the base price's currency, which the SSO price is
+    # also in by now, written with the symbol the files use where there is one
+    symbol = base_price.currency or (None if converted else sso_price.currency)
+    code = base_currency or sso_currency
+
     if base_val == 0:
-        warnings.append("Base pricing is $0. Cannot calculate percentage increase.")
-        return len(errors) == 0, warnings, errors
+        _warning(warnings, 'zero-base-price', f"Base pricing is {_format_money(0, symbol, code)}. Cannot calculate percentage increase.", 'base_pricing')
+        return
 
     # Calculate percentage
     calculated_pct = ((sso_val - base_val) / base_val) * 100
@@ -227,99 +871,920 @@ def validate_vendor_file(filepath):
         formatted_pct = f"{calculated_pct:.0f}"
         msg = (
             f"Missing 'percent_increase'. "
-            f"Based on base=${base_val} and sso=${sso_val}, "
+            f"Based on base={_format_money(base_val, symbol, code)} and sso={_format_money(sso_val, symbol, code)}, "
             f"the value should be: percent_increase: {formatted_pct}%"
         )
-        if units_match:
-            errors.append(msg)
-            return False, warnings, errors
+        if units_match and not converted:
+            _error(errors, 'missing-percent-increase', msg, 'percent_increase')
+            return
         else:
-            warnings.append(msg)
-            return len(errors) == 0, warnings, errors
+            _warning(warnings, 'missing-percent-increase', msg, 'percent_increase')
+            return
 
     # Compare
-    # Allow a small margin of error for rounding (e.g., 200% instead of 199.9%)
-    margin = 1.5 # 1.5% margin allows for 33% instead of 33.3% rounding by users
-    if abs(calculated_pct - provided_pct) > margin:
+    if abs(calculated_pct - provided_pct) > PERCENT_MARGIN:
         msg = (
             f"Percentage mismatch: expected {calculated_pct:.1f}%, "
             f"got {provided_pct}%. "
-            f"Prices: base=${base_val}, sso=${sso_val}."
+            f"Prices: base={_format_money(base_val, symbol, code)}, sso={_format_money(sso_val, symbol, code)}."
         )
-        if units_match:
-            errors.append(msg)
+        if units_match and not converted:
+            _error(errors, 'percent-mismatch', msg, 'percent_increase')
         else:
-            warnings.append(msg)
+            _warning(warnings, 'percent-mismatch', msg, 'percent_increase')
 
-    return len(errors) == 0, warnings, errors
 
-def main():
-    parser = argparse.ArgumentParser(description="Validate SSO Wall of Shame vendor pricing.")
-    parser.add_argument("paths", nargs='+', help="Vendor YAML files or directories containing them.")
-    parser.add_argument("--fail-on-warnings", action="store_true", help="Exit with error code if there are warnings.")
-    args = parser.parse_args()
+DEFAULT_INCLUDE = ('*.yml', '*.yaml')
 
-    filepaths_to_check = []
-    for path in args.paths:
-        if os.path.isfile(path) and path.endswith(('.yml', '.yaml')):
-            filepaths_to_check.append(path)
+def _glob_matches(relpath, patterns):
+    # A pattern with a '/' matches the path below the directory being
+    # searched; one without matches the last component, at any depth
+    name = relpath.rpartition('/')[2]
+    return any(fnmatch.fnmatchcase(relpath if '/' in pattern else name, pattern) for pattern in patterns)
+
+def find_vendor_files(paths, include=DEFAULT_INCLUDE, exclude=(), recursive=False):
+    """
+    Expands vendor YAML files and directories containing them into a list of
+    files. Directories are searched with os.scandir for files matching an
+    include glob, and so are their subdirectories if recursive is True (the
+    command line sets it; other scripts read only the top level of _vendors/).
+    Files and directories matching an exclude glob are left out (a pattern
+    containing '/' is matched against the path below the searched directory,
+    any other against the file or directory name). Symlinked directories are
+    not followed. A file reached through several of the paths is listed once.
+    Returns (filepaths, skipped) where skipped lists paths that are neither
+    vendor files nor directories.
+    """
+    filepaths = []
+    skipped = []
+    seen = set()
+
+    def add(filepath):
+        key = os.path.abspath(filepath)
+        if key not in seen:
+            seen.add(key)
+            filepaths.append(filepath)
+
+    for path in paths:
+        if os.path.isfile(path):
+            relpath = path.replace(os.sep, '/')
+            if _glob_matches(relpath, include) and not _glob_matches(relpath, exclude):
+                add(path)
+            else:
+                skipped.append(path)
         elif os.path.isdir(path):
-            for filename in os.listdir(path):
-                if filename.endswith(('.yml', '.yaml')):
-                    filepaths_to_check.append(os.path.join(path, filename))
+            # Depth first, each directory's files before its subdirectories
+            pending = [(path, '')]
+            while pending:
+                directory, prefix = pending.pop()
+                subdirectories = []
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        relpath = prefix + entry.name
+                        if _glob_matches(relpath, exclude):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                subdirectories.append((entry.path, relpath + '/'))
+                        elif _glob_matches(relpath, include) and entry.is_file():
+                            add(entry.path)
+                pending.extend(reversed(subdirectories))
         else:
-            print(f"Skipping invalid path: {path}")
+            skipped.append(path)
+    return filepaths, skipped
+
+def read_files_from(stream):
+    """Reads the NUL-delimited paths (as from `git diff -z` or `find -print0`) in a binary stream."""
+    return [os.fsdecode(path) for path in stream.read().split(b'\0') if path]
+
+def shard_of(filepath, count):
+    """
+    Returns the 0-based shard (of count) a vendor file belongs to, from a
+    stable hash of its filename, so every node agrees wherever the checkout is.
+    """
+    digest = hashlib.sha256(os.path.basename(filepath).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+def shard_files(filepaths, index, count):
+    """Returns the filepaths in shard `index` (1-based) of `count`, in their original order."""
+    return [filepath for filepath in filepaths if shard_of(filepath, count) == index - 1]
+
+def rules_fingerprint():
+    """
+    Returns a digest identifying the current validator and rule set. Cached
+    results are only reused while this is unchanged, so editing this script,
+    scripts/currency.py or the FX table, or changing REQUIRED_FIELDS,
+    KNOWN_FIELDS, DEPRECATED_FIELDS or FIELD_FORMATS (even at runtime)
+    invalidates the cache.
+    """
+    h = hashlib.sha256()
+    # Prices are parsed with currency.py's symbol tables and checked with the
+    # FX table's rates, so both count as part of the validator
+    for path in (__file__, currency.__file__, DEFAULT_FX_RATES_PATH):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    rules = (
+        CACHE_FORMAT_VERSION,
+        yaml.__version__,
+        REQUIRED_FIELDS,
+        sorted(KNOWN_FIELDS),
+        sorted(DEPRECATED_FIELDS.items()),
+        list(FIELD_FORMATS.items()),
+    )
+    h.update(repr(rules).encode('utf-8'))
+    return h.hexdigest()
+
+class ValidationCache:
+    """
+    Persistent map from file content digest to that file's (errors, warnings)
+    diagnostics, stored as JSON. Entries written under a different rules_fingerprint() are
+    discarded on load, and entries the run neither read nor wrote are dropped on save.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries = {}
+        # Digests looked up or stored this run; the rest belong to files that
+        # have since changed or been deleted
+        self.touched = set()
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(stored, dict) and stored.get('fingerprint') == fingerprint:
+            self.entries = stored.get('entries') or {}
+
+    def get(self, digest):
+        """Returns the cached (errors, warnings) for digest, or None on a miss."""
+        entry = self.entries.get(digest) if digest else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touched.add(digest)
+        errors, warnings = entry
+        return (
+            [Diagnostic(message, code, 'error', field) for code, field, message in errors],
+            [Diagnostic(message, code, 'warning', field) for code, field, message in warnings],
+        )
+
+    def put(self, digest, errors, warnings):
+        if digest:
+            self.touched.add(digest)
+            self.entries[digest] = [
+                [[d.code, d.field, str(d)] for d in errors],
+                [[d.code, d.field, str(d)] for d in warnings],
+            ]
+
+    def save(self, prune=True):
+        """
+        Writes the cache atomically so an interrupted run never leaves a torn file.
+        Unless `prune` is false (for runs that only saw part of the corpus, like
+        one shard), only the entries touched this run are kept.
+        """
+        if prune:
+            self.entries = {digest: entry for digest, entry in self.entries.items() if digest in self.touched}
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.validate_cache.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'fingerprint': self.fingerprint, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+def _file_digest(filepath):
+    """Returns the SHA-256 digest of a file's bytes, or None if it cannot be read."""
+    try:
+        with open(filepath, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def map_files(func, filepaths, jobs):
+    """
+    Applies func to each path, fanning the work out across `jobs` worker
+    processes when more than one is requested. Results are in input order.
+    """
+    jobs = min(jobs, len(filepaths))
+    if jobs <= 1:
+        return [func(filepath) for filepath in filepaths]
+
+    # Hand each worker several files at a time; per-file tasks are too small
+    # to be worth a round trip to the pool on their own.
+    chunksize = max(1, len(filepaths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(func, filepaths, chunksize=chunksize))
+
+def validate_files(filepaths, jobs=1, cache=None, profile=None):
+    """
+    Validates each file in filepaths across `jobs` worker processes.
+    Files whose content is already in `cache` (a ValidationCache) are not
+    re-validated, and fresh results are added to it. If `profile` is a dict,
+    it is filled with {filepath: {phase: seconds}} for each file validated.
+    Returns {filepath: (errors, warnings)} in the same order as filepaths.
+    """
+    cached = {}
+    # (filepath, raw bytes) to validate; without a cache the workers read the files
+    pending = [(filepath, None) for filepath in filepaths]
+    if cache is not None:
+        # Each file is read once: a miss is validated from the bytes that were
+        # looked up, and only a file that could not be read is opened again
+        # (by the worker, to report why)
+        pending = []
+        for filepath in filepaths:
+            try:
+                with open(filepath, 'rb') as f:
+                    raw = f.read()
+            except OSError:
+                raw = None
+            hit = cache.get(hashlib.sha256(raw).hexdigest() if raw is not None else None)
+            if hit is None:
+                pending.append((filepath, raw))
+            else:
+                cached[filepath] = hit
+    paths = [filepath for filepath, raw in pending]
+
+    if profile is None:
+        outcomes = map_files(_validate_read_file, pending, jobs)
+    else:
+        outcomes = []
+        for filepath, (digest, outcome, timings) in zip(paths, map_files(_profile_read_file, pending, jobs)):
+            profile[filepath] = timings
+            outcomes.append((digest, outcome))
+
+    for filepath, (digest, (is_valid, warnings, errors)) in zip(paths, outcomes):
+        cached[filepath] = (errors, warnings)
+        if cache is not None:
+            # Keyed by the digest of the bytes actually validated, so an edit
+            # racing with this run can never be cached under stale content.
+            cache.put(digest, errors, warnings)
+
+    return {filepath: cached[filepath] for filepath in filepaths}
+
+def _validate_blob(raw):
+    """Worker: validates a blob's bytes. Returns (digest, (is_valid, warnings, errors))."""
+    return hashlib.sha256(raw).hexdigest(), _validate_vendor_content(raw)
+
+def validate_git_ranges(ranges, repo='.', jobs=1, cache=None, contents=None):
+    """
+    Validates the vendor files each commit range ('BASE..HEAD' or
+    'BASE...HEAD') adds or modifies, reading them from the object store through
+    one `git cat-file --batch` process rather than a checkout. Symlinks and
+    submodules under _vendors/ are errors; other non-YAML files are ignored.
+    Each distinct blob is validated once. Results are keyed by path, or by
+    'HEAD:path' when more than one range is given. If contents is a dict, it
+    is filled with {key: (path, raw bytes)} for every YAML file validated.
+    Returns {key: (errors, warnings)} in range, then path, order.
+    Raises GitError if git fails and ValueError for a malformed range.
+    """
+    entries = []
+    for commit_range in ranges:
+        base, head = parse_range(commit_range, repo)
+        # Keys name the head as given, e.g. 'release-1.0:_vendors/x.yml'
+        head_name = split_range(commit_range)[1]
+        for entry in changed_vendor_entries(base, head, repo):
+            key = entry.path if len(ranges) == 1 else f"{head_name}:{entry.path}"
+            entries.append((key, entry))
 
-    # Collect all results first so we can emit category markers at the end
     results = {}
-    for filepath in filepaths_to_check:
-        is_valid, warnings, errors = validate_vendor_file(filepath)
-        results[filepath] = (errors, warnings)
+    blobs = {}
+    with CatFileBatch(repo) as objects:
+        for key, entry in entries:
+            if entry.mode not in REGULAR_FILE_MODES:
+                errors = []
+                _error(errors, 'not-a-regular-file', "Symlinks and submodules are not permitted in _vendors/")
+                results[key] = (errors, [])
+            elif entry.path.endswith(('.yml', '.yaml')) and entry.oid not in blobs:
+                blobs[entry.oid] = objects.read(entry.oid)
+
+    outcomes = {}
+    pending = []
+    for oid, raw in blobs.items():
+        hit = cache.get(hashlib.sha256(raw).hexdigest()) if cache is not None else None
+        if hit is None:
+            pending.append(oid)
+        else:
+            outcomes[oid] = hit
+    for oid, (digest, (is_valid, warnings, errors)) in zip(
+        pending, map_files(_validate_blob, [blobs[oid] for oid in pending], jobs)
+    ):
+        outcomes[oid] = (errors, warnings)
+        if cache is not None:
+            cache.put(digest, errors, warnings)
+
+    ordered = {}
+    for key, entry in entries:
+        if key in results:
+            ordered[key] = results[key]
+        elif entry.oid in outcomes:
+            ordered[key] = outcomes[entry.oid]
+            if contents is not None:
+                contents[key] = (entry.path, blobs[entry.oid])
+    return ordered
+
+# Other files listed per duplicate warning before "(+N more)"
+_DUPLICATES_LISTED = 5
+
+def _describe_others(others):
+    listed = ', '.join(others[:_DUPLICATES_LISTED])
+    if len(others) > _DUPLICATES_LISTED:
+        listed += f" (+{len(others) - _DUPLICATES_LISTED} more)"
+    return listed
+
+def check_duplicates(results, corpus_paths, contents=None, jobs=1, order=None, allowlist=None):
+    """
+    Compares the validated vendors against each other and against every vendor
+    file under corpus_paths, adding duplicate-name, duplicate-vendor-url and
+    similar-name warnings to results (updated in place). Known false positives
+    in allowlist (default: scripts/duplicate_allowlist.json) are not reported. contents maps result
+    keys that are not file paths (see validate_git_ranges) to (path, raw bytes).
+    A corpus file at the same path as a validated one is the old version of it
+    and is left out.
+
+    For one shard of a run, pass the whole run's keys as order: they are all
+    compared in that order, so each shard's warnings read exactly as in an
+    unsharded run, but only keys in results get warnings.
+    """
+    contents = contents or {}
+    targets = []
+    for key in (results if order is None else order):
+        if key in contents:
+            path, raw = contents[key]
+            targets.append((key, read_record(path, raw)))
+        elif os.path.isfile(key):
+            targets.append((key, read_record(key)))
+    replaced = {os.path.normpath(record.path) for _, record in targets}
+    corpus_files, _ = find_vendor_files(corpus_paths)
+    corpus_files = [p for p in dict.fromkeys(corpus_files) if os.path.normpath(p) not in replaced]
+
+    records = [record for _, record in targets] + map_files(read_record, corpus_files, jobs)
+    for i, matches in find_duplicates(records, allowlist=allowlist or load_allowlist()).items():
+        if i >= len(targets) or targets[i][0] not in results:
+            continue
+        key, record = targets[i]
+        warnings = []
+        by_kind = {}
+        for match in matches:
+            by_kind.setdefault(match.kind, []).append(records[match.other])
+        if 'name' in by_kind:
+            others = [os.path.basename(other.path) for other in by_kind['name']]
+            _warning(warnings, 'duplicate-name',
+                     f"Vendor name '{record.name}' is also used by {_describe_others(others)}. "
+                     "Is this vendor already listed?", 'name')
+        if 'host' in by_kind:
+            others = [os.path.basename(other.path) for other in by_kind['host']]
+            _warning(warnings, 'duplicate-vendor-url',
+                     f"vendor_url host '{vendor_host(record.vendor_url)}' is also used by "
+                     f"{_describe_others(others)}. Is this vendor already listed?", 'vendor_url')
+        if 'similar-name' in by_kind:
+            others = [f"'{other.name}' ({os.path.basename(other.path)})" for other in by_kind['similar-name']]
+            _warning(warnings, 'similar-name',
+                     f"Vendor name '{record.name}' is similar to {_describe_others(others)}. "
+                     "Is this vendor already listed?", 'name')
+        errors, existing = results[key]
+        results[key] = (errors, existing + warnings)
+
+def report_categories(results):
+    """Returns the sorted categories (e.g. 'schema-error') present in results."""
+    return sorted({d.category for errors, warnings in results.values() for d in (*errors, *warnings)})
 
+def exit_code(results, fail_on_warnings=False):
+    """Returns the process exit code for a set of results."""
+    if any(errors for errors, _ in results.values()):
+        return 1
+    if fail_on_warnings and any(warnings for _, warnings in results.values()):
+        return 1
+    return 0
+
+def print_text_report(results, cache=None, file=None):
+    """Prints the human-readable report: per-file blocks, category markers and summary (to stdout by default)."""
     # Print per-file output
     for filepath, (errors, warnings) in results.items():
         filename = os.path.basename(filepath)
         if errors:
-            print(f"❌ {filename}")
+            print(f"❌ {filename}", file=file)
             for error in errors:
-                print(f"   Error: {error}")
+                print(f"   Error: {error}", file=file)
         if warnings:
-            print(f"⚠️ {filename}")
+            print(f"⚠️ {filename}", file=file)
             for warning in warnings:
-                print(f"   Warning: {warning}")
+                print(f"   Warning: {warning}", file=file)
 
     # Emit machine-readable category markers for the workflow to map to PR labels.
-    # These are derived from message text using stable keyword matches — never
-    # from free-text that could be influenced by PR content.
-    categories = set()
-    for errors, warnings in results.values():
-        for e in errors:
-            if any(k in e for k in ["Missing required field", "not a valid", "Duplicate", "Empty YAML", "Failed to parse", "Failed to read"]):
-                categories.add("CATEGORY:schema-error")
-            if any(k in e for k in ["percent_increase", "Percentage mismatch"]):
-                categories.add("CATEGORY:pricing-error")
-        for w in warnings:
-            if any(k in w for k in ["deprecated", "Unknown field", "pricing_source"]):
-                categories.add("CATEGORY:schema-warning")
-            if any(k in w for k in ["units appear to differ", "Could not extract", "Contact Us", "Base pricing is $0", "percent_increase"]):
-                categories.add("CATEGORY:pricing-warning")
-    for cat in sorted(categories):
-        print(cat)
+    # These come from each diagnostic's stable code — never from message text,
+    # which can contain free-text from PR content.
+    for category in report_categories(results):
+        print(f"CATEGORY:{category}", file=file)
 
     files_with_errors = sum(1 for e, _ in results.values() if e)
     files_with_warnings = sum(1 for _, w in results.values() if w)
     total_files = len(results)
 
-    print("\n" + "="*40)
-    print(f"Validation complete. Scanned {total_files} files.")
-    print(f"Errors: {files_with_errors} files")
-    print(f"Warnings: {files_with_warnings} files")
+    print("\n" + "="*40, file=file)
+    print(f"Validation complete. Scanned {total_files} files.", file=file)
+    print(f"Errors: {files_with_errors} files", file=file)
+    print(f"Warnings: {files_with_warnings} files", file=file)
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses", file=file)
+
+def print_jsonl_report(results, cache=None, file=None):
+    """
+    Prints one JSON object per line: a {"type": "diagnostic"} record for every
+    error and warning, in the same order as the text report, then a single
+    {"type": "summary"} record. Writes to stdout by default.
+    """
+    for filepath, (errors, warnings) in results.items():
+        for diagnostic in (*errors, *warnings):
+            record = {'type': 'diagnostic', 'file': filepath, **diagnostic.to_dict()}
+            print(json.dumps(record, ensure_ascii=False), file=file)
+
+    print(json.dumps(summary_record(results, cache)), file=file)
+
+# Bump when the layout of --report-out files changes.
+REPORT_FORMAT_VERSION = 1
+
+CacheCounts = namedtuple('CacheCounts', ['hits', 'misses'])
+CacheCounts.__doc__ = "Cache hit and miss counts, as reported by a ValidationCache."
+
+def write_report(path, results, order, skipped=(), shard=None, cache=None):
+    """
+    Writes a run's results to path as JSON (see merge_reports.py), replacing
+    it atomically. order lists every result key of the whole run in report
+    order, including keys validated by other shards; shard is (index, count)
+    or None for an unsharded run.
+    """
+    report = {
+        'version': REPORT_FORMAT_VERSION,
+        'rules': rules_fingerprint(),
+        'shard': list(shard) if shard else [1, 1],
+        'order': list(order),
+        'skipped': list(skipped),
+        'results': [
+            {'file': key, 'errors': [d.to_dict() for d in errors], 'warnings': [d.to_dict() for d in warnings]}
+            for key, (errors, warnings) in results.items()
+        ],
+        'cache': {'hits': cache.hits, 'misses': cache.misses} if cache is not None else None,
+    }
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.validate_report.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_report(path):
+    """
+    Reads a report written by write_report. Returns the report dict, with
+    'results' as {key: (errors, warnings)} of Diagnostics and 'cache' as
+    CacheCounts or None. Raises ValueError if it is not a readable report.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except OSError as e:
+        raise ValueError(f"{path}: {e.strerror}") from None
+    except ValueError:
+        raise ValueError(f"{path}: not a JSON report") from None
+    if not isinstance(report, dict) or report.get('version') != REPORT_FORMAT_VERSION:
+        raise ValueError(f"{path}: not a version {REPORT_FORMAT_VERSION} validation report")
+
+    def diagnostics(records):
+        return [Diagnostic(r['message'], r['code'], r['severity'], r['field']) for r in records]
+
+    try:
+        report['results'] = {
+            entry['file']: (diagnostics(entry['errors']), diagnostics(entry['warnings']))
+            for entry in report['results']
+        }
+        index, count = report['shard']
+        report['shard'] = (int(index), int(count))
+        report['cache'] = CacheCounts(**report['cache']) if report['cache'] is not None else None
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{path}: malformed validation report") from None
+    return report
+
+def summary_record(results, cache=None):
+    """
+    Returns the jsonl summary record for results: file counts and the report
+    categories, plus cache hits and misses if a cache was used.
+    """
+    summary = {
+        'type': 'summary',
+        'files': len(results),
+        'files_with_errors': sum(1 for e, _ in results.values() if e),
+        'files_with_warnings': sum(1 for _, w in results.values() if w),
+        'categories': report_categories(results),
+    }
+    if cache is not None:
+        summary['cache'] = {'hits': cache.hits, 'misses': cache.misses}
+    return summary
+
+PROFILE_PHASES = ('read', 'parse', 'schema', 'pricing')
+
+def print_profile_report(profile, run_timings, top=10, file=None):
+    """
+    Prints where validation time went: whole-run stages, the share of per-file
+    time spent in each phase, and the `top` slowest files. Writes to stderr by default.
+    """
+    file = file or sys.stderr
+    print("\n" + "="*40, file=file)
+    print("Profile", file=file)
+    for stage, seconds in run_timings.items():
+        print(f"  {stage:<10} {seconds:9.4f} s", file=file)
+
+    per_file_total = sum(timings['total'] for timings in profile.values())
+    print(f"\nPer-file phases ({len(profile)} files validated, {per_file_total:.4f} s total):", file=file)
+    for phase in PROFILE_PHASES:
+        seconds = sum(timings.get(phase, 0.0) for timings in profile.values())
+        share = seconds / per_file_total * 100 if per_file_total else 0.0
+        print(f"  {phase:<10} {seconds:9.4f} s  {share:5.1f}%", file=file)
+
+    slowest = sorted(profile.items(), key=lambda item: item[1]['total'], reverse=True)[:top]
+    if slowest:
+        print(f"\nSlowest {len(slowest)} files:", file=file)
+        for filepath, timings in slowest:
+            phases = ', '.join(f"{phase} {timings.get(phase, 0.0) * 1000:.2f}" for phase in PROFILE_PHASES)
+            print(f"  {timings['total'] * 1000:8.2f} ms  {filepath}  ({phases} ms)", file=file)
+
+def _diagnostic_key(diagnostic):
+    return (diagnostic.severity, diagnostic.code, diagnostic.field, str(diagnostic))
+
+def diff_results(old, new):
+    """
+    Compares two {filepath: (errors, warnings)} result sets.
+    Returns {filepath: (added, removed)} for every file whose diagnostics
+    changed; added and removed are lists of Diagnostics. A file missing from
+    one side counts as having no diagnostics there.
+    """
+    changes = {}
+    for filepath in {**old, **new}:
+        before = [d for group in old.get(filepath, ()) for d in group]
+        after = [d for group in new.get(filepath, ()) for d in group]
+        before_keys = {_diagnostic_key(d) for d in before}
+        after_keys = {_diagnostic_key(d) for d in after}
+        added = [d for d in after if _diagnostic_key(d) not in before_keys]
+        removed = [d for d in before if _diagnostic_key(d) not in after_keys]
+        if added or removed:
+            changes[filepath] = (added, removed)
+    return changes
+
+class VendorWatcher:
+    """
+    Keeps the validation results for a set of vendor paths in memory and
+    revalidates only the files that change, for --watch. Files are re-read on
+    every change but only re-parsed when their content actually differs, and
+    then only the rules reading a field that changed are re-run (see
+    IncrementalValidator).
+    """
+
+    def __init__(self, paths):
+        # Only the given directories are watched, so don't look below them
+        filepaths, self.skipped = find_vendor_files(paths)
+        self._directories = {os.path.normpath(p) for p in paths if os.path.isdir(p)}
+        self._files = {p for p in filepaths if os.path.normpath(os.path.dirname(p) or '.') not in self._directories}
+        self.paths = [p for p in paths if p not in self.skipped]
+        self._digests = {}
+        self._validators = {}
+        self.results = {}
+        for filepath in filepaths:
+            self.results[filepath] = self._validate(filepath)
+
+    @property
+    def watch_directories(self):
+        """The directories to watch: the given ones plus those holding any given files."""
+        return sorted(self._directories | {os.path.normpath(os.path.dirname(p) or '.') for p in self._files})
+
+    def _in_scope(self, path):
+        return path in self._files or os.path.normpath(os.path.dirname(path) or '.') in self._directories
+
+    def _validate(self, filepath):
+        validator = self._validators.setdefault(filepath, IncrementalValidator())
+        digest, (is_valid, warnings, errors) = _validate_vendor_file(filepath, validator=validator)
+        self._digests[filepath] = digest
+        return errors, warnings
+
+    def refresh(self, changed):
+        """
+        Revalidates the changed paths (None: rescan everything) and updates
+        results. Returns (revalidated, diff) where revalidated is the number of
+        files re-read and diff is diff_results for them.
+        """
+        if changed is None:
+            filepaths, _ = find_vendor_files(self.paths)
+            changed = set(filepaths) | set(self.results)
+        else:
+            # Normalise paths the way find_vendor_files builds them
+            by_norm = {os.path.normpath(p): p for p in self.results}
+            changed = {by_norm.get(os.path.normpath(p), p) for p in changed if self._in_scope(p)}
+
+        old, new = {}, {}
+        for filepath in sorted(changed):
+            if filepath in self.results:
+                old[filepath] = self.results[filepath]
+            if not os.path.isfile(filepath):
+                self.results.pop(filepath, None)
+                self._digests.pop(filepath, None)
+                self._validators.pop(filepath, None)
+                continue
+            previous_digest = self._digests.get(filepath)
+            if previous_digest is not None and _file_digest(filepath) == previous_digest:
+                new[filepath] = self.results[filepath]
+                continue
+            self.results[filepath] = new[filepath] = self._validate(filepath)
+        return len(changed), diff_results(old, new)
+
+def print_watch_update(results, revalidated, changes, seconds, output_format='text'):
+    """Prints what one --watch revalidation changed, then an updated summary."""
+    if output_format == 'jsonl':
+        for filepath, (added, removed) in changes.items():
+            for change, diagnostics in (('removed', removed), ('added', added)):
+                for diagnostic in diagnostics:
+                    print(json.dumps(
+                        {'type': 'change', 'change': change, 'file': filepath, **diagnostic.to_dict()},
+                        ensure_ascii=False,
+                    ))
+        print(json.dumps({**summary_record(results), 'revalidated': revalidated, 'seconds': round(seconds, 6)}))
+        return
+
+    for filepath, (added, removed) in changes.items():
+        print(os.path.basename(filepath) + ('' if filepath in results else ' (removed)'))
+        for diagnostic in removed:
+            print(f"   - {diagnostic.severity.capitalize()}: {diagnostic}")
+        for diagnostic in added:
+            print(f"   + {diagnostic.severity.capitalize()}: {diagnostic}")
+    files_with_errors = sum(1 for e, _ in results.values() if e)
+    files_with_warnings = sum(1 for _, w in results.values() if w)
+    print(
+        f"[{datetime.now():%H:%M:%S}] Revalidated {revalidated} file(s) in {seconds * 1000:.1f} ms"
+        f"{'' if changes else ', no change in diagnostics'}. "
+        f"Errors: {files_with_errors} files, Warnings: {files_with_warnings} files."
+    )
+
+def watch(paths, output_format='text', watcher=None):
+    """
+    Validates paths, prints the full report, then waits for vendor files to
+    change and prints only how the diagnostics changed. Runs until interrupted.
+    """
+    vendors = VendorWatcher(paths)
+    for path in vendors.skipped:
+        print(f"Skipping invalid path: {path}", file=sys.stderr if output_format == 'jsonl' else sys.stdout)
+    if output_format == 'jsonl':
+        print_jsonl_report(vendors.results)
+    else:
+        print_text_report(vendors.results)
+
+    watcher = watcher or open_watcher(vendors.watch_directories)
+    mode = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"\nWatching {len(vendors.results)} files for changes ({mode}). Press Ctrl-C to stop.", file=sys.stderr)
+    sys.stdout.flush()
+    try:
+        while True:
+            changed = watcher.wait()
+            if changed is not None and not changed:
+                continue
+            start = time.perf_counter()
+            revalidated, changes = vendors.refresh(changed)
+            if not revalidated:
+                continue
+            print_watch_update(vendors.results, revalidated, changes, time.perf_counter() - start, output_format)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def fix_results(results, jobs=1, sort_keys=False, dry_run=False, file=None):
+    """
+    Runs --fix over the files in results (see autofix.py): those with a
+    fixable error, or every file with sort_keys. Logs each fix, or in a dry run
+    its diff, to stderr by default. Returns the paths of the files rewritten.
+    """
+    # autofix builds on this module
+    from scripts.autofix import fix_files, needs_fix
+
+    file = file or sys.stderr
+    fixable = {filepath for filepath, (errors, _) in results.items() if needs_fix(errors)}
+    targets = [filepath for filepath in results if sort_keys or filepath in fixable]
+    changed = []
+    for fix in fix_files(targets, jobs=jobs, sort_keys=sort_keys, dry_run=dry_run, fixable=fixable):
+        filename = os.path.basename(fix.path)
+        if fix.error is not None:
+            # Files that fail to parse can't be sorted either; that's already reported
+            if fix.path in fixable:
+                print(f"Could not fix {filename}: {fix.error}", file=file)
+        elif fix.changed:
+            changed.append(fix.path)
+            if dry_run:
+                file.write(fix.diff)
+            else:
+                done = f"percent_increase: {fix.percent}%" if fix.percent is not None else "sorted keys"
+                print(f"Fixed {filename} ({done})", file=file)
+    print(f"--fix: {len(changed)} of {len(targets)} files {'would be ' if dry_run else ''}changed.", file=file)
+    return [] if dry_run else changed
+
+def positive_number(kind, allow_zero=False):
+    """
+    argparse type factory for options that take a number of type `kind` (int
+    or float) above 0, or at least 0 with allow_zero.
+    """
+    expected = f"a {'non-negative' if allow_zero else 'positive'} {'integer' if kind is int else 'number'}"
+    def parse(value):
+        try:
+            number = kind(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected {expected}, got '{value}'")
+        if number < 0 or (number == 0 and not allow_zero):
+            raise argparse.ArgumentTypeError(f"expected {expected}, got '{value}'")
+        return number
+    return parse
+
+def _shard(value):
+    """argparse type for --shard: 'i/N' with 1 <= i <= N."""
+    index, sep, count = value.partition('/')
+    if not (sep and index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+        raise argparse.ArgumentTypeError(f"expected i/N with 1 <= i <= N, got '{value}'")
+    return int(index), int(count)
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate SSO Wall of Shame vendor pricing.")
+    parser.add_argument("paths", nargs='*',
+                        help="Vendor YAML files or directories containing them (searched recursively).")
+    parser.add_argument("--files-from", metavar="FILE",
+                        help="Also validate the NUL-delimited paths listed in FILE ('-' for stdin), e.g. from "
+                             "`git diff --name-only -z` or `find -print0`. Any number of paths is validated "
+                             "in one run with one report.")
+    parser.add_argument("--include", action='append', metavar="GLOB",
+                        help="Only validate files matching GLOB; repeat for several (default: *.yml and *.yaml). "
+                             "A GLOB with a '/' matches the path below a given directory, any other the filename.")
+    parser.add_argument("--exclude", action='append', default=[], metavar="GLOB",
+                        help="Skip files, and directories, matching GLOB; repeat for several.")
+    parser.add_argument("--git-range", action='append', metavar="BASE..HEAD",
+                        help="Validate the vendor files changed in a commit range, read from the git object "
+                             "store instead of the working tree. BASE...HEAD diffs from the merge base. "
+                             "Repeat to validate several ranges.")
+    parser.add_argument("--fail-on-warnings", action="store_true", help="Exit with error code if there are warnings.")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to validate with (default: number of CPUs).")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse results for files whose content is unchanged since a previous run. Results "
+                             "for files this run did not see are dropped, except under --shard.")
+    parser.add_argument("--cache-path", metavar="PATH",
+                        help=f"With --cache, where to store the results (default: {DEFAULT_CACHE_PATH}).")
+    parser.add_argument("--format", choices=['text', 'jsonl'], default='text',
+                        help="Output format: human-readable text (default) or one JSON object per line.")
+    parser.add_argument("--check-duplicates", action="store_true",
+                        help="Also warn about vendors that duplicate another vendor file (same name or "
+                             "vendor_url host, or a near-identical name), comparing against the vendor "
+                             "files in --duplicates-corpus and each other. Known false positives are listed "
+                             "in scripts/duplicate_allowlist.json.")
+    parser.add_argument("--duplicates-corpus", metavar="DIR",
+                        help="With --check-duplicates, the vendor files to compare against (default: _vendors).")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the first run, keep watching the given paths and revalidate only the "
+                             "files that change, printing how their diagnostics changed. Ctrl-C to stop.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each validation phase and file, and print a summary with the slowest "
+                             "files to stderr.")
+    parser.add_argument("--profile-top", type=positive_number(int), metavar="N",
+                        help="With --profile, list the N slowest files (default: 10).")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="With --profile, also write a cProfile (pstats) dump of validation to PATH. "
+                             "Validation runs in-process so the dump is complete.")
+    parser.add_argument("--fix", action="store_true",
+                        help="Rewrite percent_increase, or insert it, in files where it is wrong or missing (an "
+                             "error), editing just that line; the fixed files are then validated again and the "
+                             "report shows the result. Fixes are logged to stderr.")
+    parser.add_argument("--sort-keys", action="store_true",
+                        help="With --fix, also sort each file's top-level keys (moving whole lines).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="With --fix, print the fixes to stderr as a unified diff instead of writing them.")
+    parser.add_argument("--shard", type=_shard, metavar="i/N",
+                        help="Validate only shard i of N (1-based), chosen by a stable hash of each filename, "
+                             "so N nodes given the same paths split them without overlap.")
+    parser.add_argument("--report-out", metavar="PATH",
+                        help="Also write the results as JSON to PATH, for scripts/merge_reports.py to combine "
+                             "the shards of a run into one report.")
+    args = parser.parse_args()
+
+    if args.files_from is not None:
+        try:
+            if args.files_from == '-':
+                args.paths.extend(read_files_from(sys.stdin.buffer))
+            else:
+                with open(args.files_from, 'rb') as f:
+                    args.paths.extend(read_files_from(f))
+        except OSError as e:
+            parser.error(f"--files-from: {e}")
+    elif not args.paths and not args.git_range:
+        parser.error("give vendor paths, --files-from, --git-range, or a combination")
+    if args.profile and args.git_range:
+        parser.error("--profile only applies to vendor paths, not --git-range")
+    if args.watch and (args.git_range or args.profile or args.check_duplicates or not args.paths
+                       or args.include or args.exclude):
+        parser.error("--watch needs vendor paths and cannot be combined with --git-range, --profile, "
+                     "--check-duplicates, --include or --exclude")
+    if (args.sort_keys or args.dry_run) and not args.fix:
+        parser.error("--sort-keys and --dry-run only apply to --fix")
+    if args.fix and (args.git_range or args.watch):
+        parser.error("--fix only applies to vendor paths, not --git-range or --watch")
+    if args.shard and (args.git_range or args.watch):
+        parser.error("--shard only applies to vendor paths, not --git-range or --watch")
+    if args.duplicates_corpus and not args.check_duplicates:
+        parser.error("--duplicates-corpus requires --check-duplicates")
+    if args.cache_path and not args.cache:
+        parser.error("--cache-path requires --cache")
+    if (args.profile_out or args.profile_top) and not args.profile:
+        parser.error("--profile-out and --profile-top require --profile")
+    if args.profile_out and args.jobs > 1:
+        print("--profile-out: validating in-process (ignoring --jobs) so the profile covers all work.",
+              file=sys.stderr)
+        args.jobs = 1
+
+    if args.watch:
+        # Only the given directories are watched; rather than validate a
+        # different set of files than a plain run would, refuse nested trees
+        nested = set(find_vendor_files(args.paths, recursive=True)[0]) - set(find_vendor_files(args.paths)[0])
+        if nested:
+            parser.error(f"--watch does not watch subdirectories, but {sorted(nested)[0]} is in one; "
+                         f"give each directory to watch")
+        watch(args.paths, args.format)
+        return
+
+    run_timings = {}
+    stage_start = time.perf_counter()
+
+    filepaths_to_check, skipped = find_vendor_files(args.paths, args.include or DEFAULT_INCLUDE, args.exclude,
+                                                    recursive=True)
+    # Every result key of the whole (unsharded) run, in report order
+    order = list(dict.fromkeys(filepaths_to_check))
+    if args.shard:
+        filepaths_to_check = shard_files(filepaths_to_check, *args.shard)
+    for path in skipped:
+        # Keep stdout parseable in jsonl mode
+        print(f"Skipping invalid path: {path}", file=sys.stderr if args.format == 'jsonl' else sys.stdout)
+
+    if args.profile:
+        run_timings['discover'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+
+    # Collect all results first so we can emit category markers at the end
+    cache = ValidationCache(args.cache_path or DEFAULT_CACHE_PATH, rules_fingerprint()) if args.cache else None
+    profile = {} if args.profile else None
+    profiler = cProfile.Profile() if args.profile_out else None
+    if profiler is not None:
+        profiler.enable()
+    results = validate_files(filepaths_to_check, jobs=args.jobs, cache=cache, profile=profile)
+    if args.fix:
+        fixed = fix_results(results, jobs=args.jobs, sort_keys=args.sort_keys, dry_run=args.dry_run)
+        # Only the files that were rewritten need validating again
+        results.update(validate_files(fixed, jobs=args.jobs, cache=cache))
+    contents = {}
+    if args.git_range:
+        try:
+            results.update(validate_git_ranges(args.git_range, jobs=args.jobs, cache=cache, contents=contents))
+        except (GitError, ValueError) as e:
+            parser.error(f"--git-range: {e}")
+        listed = set(order)
+        order.extend(key for key in results if key not in listed)
+    if args.check_duplicates:
+        check_duplicates(results, [args.duplicates_corpus or '_vendors'], contents, jobs=args.jobs,
+                         order=order if args.shard else None)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_out)
+    if cache is not None:
+        # A shard only sees its part of the corpus; keep the rest for the others
+        cache.save(prune=not args.shard)
+    if args.report_out:
+        write_report(args.report_out, results, order, skipped, args.shard, cache)
+
+    if args.profile:
+        run_timings['validate'] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+
+    if args.format == 'jsonl':
+        print_jsonl_report(results, cache)
+    else:
+        print_text_report(results, cache)
 
-    if files_with_errors > 0:
-        sys.exit(1)
+    if args.profile:
+        run_timings['report'] = time.perf_counter() - stage_start
+        print_profile_report(profile, run_timings, top=args.profile_top or 10)
 
-    if args.fail_on_warnings and files_with_warnings > 0:
-        sys.exit(1)
+    code = exit_code(results, args.fail_on_warnings)
+    if code:
+        sys.exit(code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,388 @@
+"""
+A long-running validation server, so bots that validate many submissions pay
+for interpreter startup and the PyYAML import once instead of per run.
+
+It speaks just enough HTTP/1.1 (keep-alive included) over TCP or a Unix
+socket:
+
+  POST /validate    one vendor YAML document as the request body (name it with
+                    ?path=_vendors/foo.yml), or several as JSON:
+                      {"documents": [{"path": "_vendors/foo.yml", "content": "..."}, ...]}
+  GET  /health      {"status": "ok", ...counters}
+
+?format=json (default) answers with a JSON object of per-document results;
+?format=text and ?format=jsonl answer with exactly what validate_pricing.py
+prints for the same files, with its exit code in an X-Exit-Code header.
+Add ?fail_on_warnings=1 to count warnings in the exit code, as the CLI does.
+
+Documents from all connections go through one queue. A batcher hands them to
+a bounded pool of worker processes, one batch per free worker, so under load
+a batch carries everything that queued while the workers were busy and the
+per-task overhead is shared; when the server is idle a document is
+dispatched on its own straight away.
+
+Run from the repo root:
+  python3 scripts/validate_server.py --port 8737
+  python3 scripts/validate_server.py --socket /tmp/validate.sock
+  curl --data-binary @_vendors/example.yml 'http://127.0.0.1:8737/validate?path=_vendors/example.yml&format=text'
+"""
+
+import argparse
+import asyncio
+import http
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.validate_pricing import (
+    Validator, exit_code, positive_number, print_jsonl_report, print_text_report, summary_record,
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8737
+DEFAULT_BATCH_SIZE = 64
+# Largest request body accepted, in bytes
+DEFAULT_MAX_BODY = 8 * 1024 * 1024
+# Seconds an idle keep-alive connection is kept open
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+FORMATS = ('json', 'jsonl', 'text')
+
+_MAX_HEAD = 64 * 1024
+
+# Per worker process; the rules are snapshotted when the worker starts
+_validator = None
+
+
+class HTTPError(Exception):
+    """A request the server answers with an error status instead of results."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _warm_worker():
+    # Build the validator and run one document through it so the parser and
+    # pricing caches are ready before the first real request arrives
+    global _validator
+    _validator = Validator()
+    _validator.validate(b"name: Warm-up\nbase_pricing: $1 per u/m\nsso_pricing: $2 per u/m\n")
+
+
+def _validate_batch(documents):
+    """Worker: validates a list of documents. Returns [(errors, warnings)] in the same order."""
+    if _validator is None:
+        _warm_worker()
+    return [(result.errors, result.warnings) for result in map(_validator.validate, documents)]
+
+
+def parse_documents(body, content_type, query):
+    """
+    Reads the documents in a /validate request body. Returns [(path, raw bytes)].
+    Raises HTTPError(400) for a malformed request.
+    """
+    if content_type.split(';')[0].strip().lower() != 'application/json':
+        return [(query.get('path', ['document.yml'])[0], body)]
+    try:
+        documents = json.loads(body)['documents']
+    except (ValueError, KeyError, TypeError):
+        raise HTTPError(400, 'expected a JSON object with a "documents" list') from None
+    if not isinstance(documents, list) or not documents:
+        raise HTTPError(400, '"documents" must be a non-empty list')
+    parsed = []
+    for i, document in enumerate(documents):
+        if not isinstance(document, dict) or not isinstance(document.get('content'), str):
+            raise HTTPError(400, f'document {i} needs a "content" string')
+        parsed.append((str(document.get('path') or f'document-{i}.yml'), document['content'].encode('utf-8')))
+    paths = [path for path, _ in parsed]
+    if len(set(paths)) != len(paths):
+        raise HTTPError(400, 'document paths must be unique')
+    return parsed
+
+
+def render_results(results, output_format, fail_on_warnings=False):
+    """
+    Renders {path: (errors, warnings)} as a response. Returns (body bytes,
+    content type, exit code); the exit code is the one the CLI would return.
+    """
+    code = exit_code(results, fail_on_warnings)
+    if output_format == 'json':
+        summary = summary_record(results)
+        del summary['type']
+        body = {
+            'results': [
+                {
+                    'path': path,
+                    'valid': not errors,
+                    'errors': [d.to_dict() for d in errors],
+                    'warnings': [d.to_dict() for d in warnings],
+                }
+                for path, (errors, warnings) in results.items()
+            ],
+            'summary': summary,
+            'exit_code': code,
+        }
+        return json.dumps(body, ensure_ascii=False).encode('utf-8'), 'application/json', code
+    out = io.StringIO()
+    if output_format == 'jsonl':
+        print_jsonl_report(results, file=out)
+        content_type = 'application/x-ndjson'
+    else:
+        print_text_report(results, file=out)
+        content_type = 'text/plain; charset=utf-8'
+    return out.getvalue().encode('utf-8'), content_type, code
+
+
+class ValidationServer:
+    """
+    Validates documents submitted over HTTP, in batches on a pool of `jobs`
+    worker processes. A batch holds at most `batch_size` documents; with a
+    `batch_window` (seconds), the batcher also waits that long for more
+    documents before dispatching a batch that isn't full.
+    """
+
+    def __init__(self, jobs=1, batch_size=DEFAULT_BATCH_SIZE, batch_window=0.0, max_body=DEFAULT_MAX_BODY,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+        self.stats = {'requests': 0, 'documents': 0, 'batches': 0}
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+        self._running = set()
+        self._connections = set()
+        self._server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        """Starts the worker pool and listens on host:port, or on socket_path if given."""
+        self._pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_warm_worker)
+        # Start every worker now rather than on the first requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _validate_batch, []) for _ in range(self.jobs)))
+        # The queue bounds the documents waiting for a worker; beyond that,
+        # connections wait to enqueue
+        self._queue = asyncio.Queue(maxsize=self.batch_size * self.jobs * 4)
+        self._slots = asyncio.Semaphore(self.jobs)
+        self._batcher = asyncio.create_task(self._dispatch())
+        if socket_path is not None:
+            self._server = await asyncio.start_unix_server(self._serve, socket_path, limit=_MAX_HEAD)
+        else:
+            self._server = await asyncio.start_server(self._serve, host, port, limit=_MAX_HEAD)
+        return self._server
+
+    @property
+    def address(self):
+        """The bound (host, port) or socket path."""
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        """
+        Stops accepting connections and finishes the batches in flight;
+        documents still queued are answered 503. Then closes the connections
+        and shuts the workers down.
+        """
+        if self._server is not None:
+            self._server.close()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.set_exception(HTTPError(503, "the server is shutting down"))
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        # Let the answers go out before dropping the connections
+        await asyncio.sleep(0)
+        for writer in list(self._connections):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    async def validate(self, documents):
+        """Queues raw documents for validation. Returns [(errors, warnings)] in the same order."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for raw in documents:
+            future = loop.create_future()
+            await self._queue.put((raw, future))
+            futures.append(future)
+        self.stats['documents'] += len(futures)
+        return await asyncio.gather(*futures)
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Wait for a free worker first: whatever queues meanwhile joins the batch
+                await self._slots.acquire()
+                if self.batch_window and len(batch) + self._queue.qsize() < self.batch_size:
+                    await asyncio.sleep(self.batch_window)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.set_exception(HTTPError(503, "the server is shutting down"))
+                raise
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch):
+        self.stats['batches'] += 1
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                self._pool, _validate_batch, [raw for raw, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(HTTPError(500, f"validation failed: {e!r}"))
+        else:
+            for (_, future), outcome in zip(batch, outcomes):
+                if not future.done():
+                    future.set_result(outcome)
+        finally:
+            self._slots.release()
+
+    async def _read_request(self, reader, writer):
+        # Returns (method, target, headers, body), or None once the client is done
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.idle_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "request headers too long") from None
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3 or not parts[2].startswith('HTTP/1.'):
+            raise HTTPError(400, f"bad request line {lines[0][:80]!r}")
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        headers[':version'] = parts[2]
+
+        if 'transfer-encoding' in headers:
+            raise HTTPError(411, "send the body with a Content-Length")
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            raise HTTPError(400, "bad Content-Length")
+        if int(length) > self.max_body:
+            raise HTTPError(413, f"request body over {self.max_body} bytes")
+        if headers.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        body = await reader.readexactly(int(length))
+        return parts[0], parts[1], headers, body
+
+    async def _respond(self, method, target, headers, body):
+        # Returns (status, body, content type, extra headers)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, "use GET")
+            payload = {'status': 'ok', 'workers': self.jobs, **self.stats}
+            return 200, json.dumps(payload).encode('utf-8'), 'application/json', {}
+        if url.path != '/validate':
+            raise HTTPError(404, f"no such endpoint: {url.path}")
+        if method != 'POST':
+            raise HTTPError(405, "use POST")
+        output_format = query.get('format', ['json'])[0]
+        if output_format not in FORMATS:
+            raise HTTPError(400, f"format must be one of {', '.join(FORMATS)}")
+        fail_on_warnings = query.get('fail_on_warnings', ['0'])[0].lower() in ('1', 'true', 'yes')
+
+        documents = parse_documents(body, headers.get('content-type', ''), query)
+        outcomes = await self.validate([raw for _, raw in documents])
+        results = {path: outcome for (path, _), outcome in zip(documents, outcomes)}
+        payload, content_type, code = render_results(results, output_format, fail_on_warnings)
+        return 200, payload, content_type, {'X-Exit-Code': str(code)}
+
+    async def _serve(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader, writer)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    self.stats['requests'] += 1
+                    status, payload, content_type, extra = await self._respond(method, target, headers, body)
+                    keep_alive = (headers[':version'] == 'HTTP/1.1'
+                                  and headers.get('connection', '').lower() != 'close')
+                except HTTPError as e:
+                    status, content_type, extra, keep_alive = e.status, 'application/json', {}, False
+                    payload = json.dumps({'error': str(e)}).encode('utf-8')
+                lines = [
+                    f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}",
+                    f"Content-Type: {content_type}",
+                    f"Content-Length: {len(payload)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                    *(f"{name}: {value}" for name, value in extra.items()),
+                ]
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+
+async def serve(server, host, port, socket_path):
+    """Runs server until SIGINT or SIGTERM."""
+    await server.start(host, port, socket_path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    address = server.address
+    where = address if isinstance(address, str) else f"http://{address[0]}:{address[1]}"
+    print(f"Validating on {where} with {server.jobs} workers. Ctrl-C to stop.", file=sys.stderr, flush=True)
+    await stop.wait()
+    start = time.perf_counter()
+    await server.close()
+    print(f"Stopped after {server.stats['requests']} requests ({server.stats['documents']} documents in "
+          f"{server.stats['batches']} batches); shutdown took {time.perf_counter() - start:.1f} s.",
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve vendor validation over HTTP, keeping the validator warm.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket at PATH instead of TCP.")
+    parser.add_argument("--jobs", "-j", type=positive_number(int), default=os.cpu_count() or 1,
+                        help="Number of worker processes to validate with (default: number of CPUs).")
+    parser.add_argument("--batch-size", type=positive_number(int), default=DEFAULT_BATCH_SIZE,
+                        help=f"Most documents handed to a worker at once (default: {DEFAULT_BATCH_SIZE}).")
+    parser.add_argument("--batch-window", type=float, default=0.0, metavar="SECONDS",
+                        help="Also wait this long for more documents before dispatching a batch that "
+                             "isn't full (default: 0, dispatch as soon as a worker is free).")
+    parser.add_argument("--max-body", type=positive_number(int), default=DEFAULT_MAX_BODY, metavar="BYTES",
+                        help=f"Largest request body accepted (default: {DEFAULT_MAX_BODY}).")
+    args = parser.parse_args()
+
+    server = ValidationServer(jobs=args.jobs, batch_size=args.batch_size, batch_window=max(args.batch_window, 0.0),
+                              max_body=args.max_body)
+    asyncio.run(serve(server, args.host, args.port, args.socket))
+
+
+if __name__ == '__main__':
+    main()
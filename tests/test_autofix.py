@@ -0,0 +1,191 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import validate_pricing
+from scripts.autofix import fix_file, fix_files, fix_text, set_percent_increase, sort_top_level_keys
+
+SORTED = (
+    "---\n"
+    "base_pricing: $10 per u/m\n"
+    "name: Foo\n"
+    "percent_increase: 100%  # checked by hand\n"
+    "pricing_source:\n"
+    "- https://foo.example.com/pricing\n"
+    "sso_pricing: $25 per u/m\n"
+    "updated_at: 2024-01-15\n"
+    "vendor_url: https://foo.example.com\n"
+)
+
+TEMPLATE_ORDER = (
+    "---\n"
+    "name: Bar\n"
+    "base_pricing: $10 per u/m\n"
+    "sso_pricing: $15 per u/m\n"
+    "vendor_url: https://bar.example.com\n"
+    "# Where the numbers come from\n"
+    "pricing_source: https://bar.example.com/pricing\n"
+    "updated_at: 2024-01-15\n"
+)
+
+
+class TestLineEdits(unittest.TestCase):
+
+    def test_rewrites_only_the_percent_line(self):
+        fixed, percent = fix_text(SORTED)
+        self.assertEqual(percent, 150)
+        self.assertEqual(fixed, SORTED.replace("100%  #", "150%  #"))
+
+    def test_inserts_in_sorted_position(self):
+        text = SORTED.replace("percent_increase: 100%  # checked by hand\n", "")
+        fixed, percent = fix_text(text)
+        self.assertEqual(fixed, SORTED.replace("100%  # checked by hand", "150%"))
+
+    def test_inserts_after_sso_pricing_when_unsorted(self):
+        fixed, percent = fix_text(TEMPLATE_ORDER)
+        self.assertEqual(percent, 50)
+        self.assertEqual(fixed, TEMPLATE_ORDER.replace("$15 per u/m\n", "$15 per u/m\npercent_increase: 50%\n"))
+
+    def test_preserves_crlf_and_missing_final_newline(self):
+        text = SORTED.replace('\n', '\r\n').rstrip('\r\n')
+        fixed, _ = fix_text(text)
+        self.assertEqual(fixed, text.replace("100%  #", "150%  #"))
+        fixed = set_percent_increase("name: Foo\r\nsso_pricing: $2\r\npercent_increase: 1%", 100)
+        self.assertEqual(fixed, "name: Foo\r\nsso_pricing: $2\r\npercent_increase: 100%")
+
+    def test_replaces_a_continued_value(self):
+        text = "name: Foo\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: >\n  50%\nupdated_at: 2024-01-15\n"
+        fixed, percent = fix_text(text)
+        self.assertEqual(fixed, "name: Foo\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: 100%\n"
+                                "updated_at: 2024-01-15\n")
+
+    def test_sort_keys_moves_whole_blocks(self):
+        fixed = sort_top_level_keys(TEMPLATE_ORDER)
+        self.assertEqual(fixed, (
+            "---\n"
+            "base_pricing: $10 per u/m\n"
+            "name: Bar\n"
+            "# Where the numbers come from\n"
+            "pricing_source: https://bar.example.com/pricing\n"
+            "sso_pricing: $15 per u/m\n"
+            "updated_at: 2024-01-15\n"
+            "vendor_url: https://bar.example.com\n"
+        ))
+        fixed, percent = fix_text(TEMPLATE_ORDER, sort_keys=True)
+        self.assertEqual(percent, 50)
+        self.assertIn("name: Bar\npercent_increase: 50%\n# Where the numbers come from\n", fixed)
+        self.assertEqual(sort_top_level_keys("b: 1\na: 2"), "a: 2\nb: 1\n")
+
+    def test_leaves_correct_and_inexact_files_alone(self):
+        for text in (
+            SORTED.replace("100%", "150%"),
+            SORTED.replace("100%", "151%"),  # within rounding margin
+            SORTED.replace("sso_pricing: $25 per u/m", "sso_pricing: $25 per year"),
+            SORTED.replace("sso_pricing: $25 per u/m", "sso_pricing: Call Us!"),
+            SORTED.replace("sso_pricing: $25 per u/m", "sso_pricing: €25 per u/m"),
+        ):
+            with self.subTest(text=text):
+                fixed, percent = fix_text(text)
+                self.assertIs(fixed, text)
+                self.assertIsNone(percent)
+
+    def test_refuses_edits_that_would_change_other_fields(self):
+        # A flow mapping can't be edited line by line
+        with self.assertRaisesRegex(ValueError, "can't be edited in place"):
+            fix_text("{name: Foo, base_pricing: $10, sso_pricing: $20}\n")
+        # Rewriting the line would drop an anchor another field refers to
+        with self.assertRaisesRegex(ValueError, "would change other fields"):
+            fix_text("name: Foo\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: &p 5%\nnotes: *p\n")
+        with self.assertRaisesRegex(ValueError, "cannot parse"):
+            fix_text("name: [\n")
+
+
+class TestFixFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.paths = {}
+        for name, content in (('sorted.yaml', SORTED), ('template.yaml', TEMPLATE_ORDER),
+                              ('ok.yaml', SORTED.replace("100%", "150%")), ('broken.yaml', "name: [\n")):
+            self.paths[name] = os.path.join(self.tmpdir.name, name)
+            with open(self.paths[name], 'w') as f:
+                f.write(content)
+
+    def _read(self, name):
+        with open(self.paths[name]) as f:
+            return f.read()
+
+    def test_dry_run_leaves_files_alone(self):
+        result = fix_file(self.paths['sorted.yaml'], dry_run=True)
+        self.assertTrue(result.changed)
+        self.assertIn("-percent_increase: 100%  # checked by hand\n+percent_increase: 150%  # checked by hand",
+                      result.diff)
+        self.assertEqual(self._read('sorted.yaml'), SORTED)
+
+    def test_parallel_fix(self):
+        results = fix_files(sorted(self.paths.values()), jobs=2)
+        by_name = {os.path.basename(r.path): r for r in results}
+        self.assertEqual([os.path.basename(r.path) for r in results], sorted(self.paths))
+        self.assertEqual((by_name['sorted.yaml'].changed, by_name['sorted.yaml'].percent), (True, 150))
+        self.assertEqual((by_name['template.yaml'].changed, by_name['template.yaml'].percent), (True, 50))
+        self.assertFalse(by_name['ok.yaml'].changed)
+        self.assertIn("cannot parse", by_name['broken.yaml'].error)
+        self.assertEqual(self._read('sorted.yaml'), SORTED.replace("100%  #", "150%  #"))
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), sorted(self.paths))
+
+    def test_fixable_error_that_cannot_be_fixed_is_reported(self):
+        from scripts.validate_pricing import Diagnostic, fix_results
+        with open(self.paths['ok.yaml'], 'w') as f:
+            f.write(SORTED.replace("$25", "€25"))
+        mismatch = Diagnostic("Percentage mismatch", 'percent-mismatch', 'error', 'percent_increase')
+        err = io.StringIO()
+        changed = fix_results({self.paths['ok.yaml']: ([mismatch], [])}, file=err)
+        self.assertEqual(changed, [])
+        self.assertIn("Could not fix ok.yaml: percent_increase can't be worked out", err.getvalue())
+        # Without the error, there is nothing to fix
+        [result] = fix_files([self.paths['ok.yaml']])
+        self.assertEqual((result.changed, result.error), (False, None))
+
+    def _run_main(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        code = 0
+        with patch('sys.argv', ['validate_pricing.py', self.tmpdir.name, '--jobs', '1', *argv]), \
+                patch('sys.stdout', out), patch('sys.stderr', err):
+            try:
+                validate_pricing.main()
+            except SystemExit as e:
+                code = e.code
+        return out.getvalue(), code, err.getvalue()
+
+    def test_cli_fixes_and_revalidates_only_touched_files(self):
+        os.remove(self.paths.pop('broken.yaml'))
+        _, code, _ = self._run_main()
+        self.assertEqual(code, 1)
+
+        with patch.object(validate_pricing, 'validate_files', wraps=validate_pricing.validate_files) as validate:
+            out, code, err = self._run_main('--fix')
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(map(os.path.basename, validate.call_args_list[1].args[0])),
+                         ['sorted.yaml', 'template.yaml'])
+        self.assertIn("Fixed template.yaml (percent_increase: 50%)", err)
+        self.assertIn("--fix: 2 of 2 files changed.", err)
+        # The report is the one a fresh run now gives
+        self.assertEqual(out, self._run_main()[0])
+
+    def test_cli_dry_run_and_sort_keys(self):
+        out, code, err = self._run_main('--fix', '--dry-run', '--sort-keys')
+        self.assertEqual(code, 1)
+        self.assertIn("+++ ", err)
+        self.assertIn("--fix: 2 of 4 files would be changed.", err)
+        self.assertNotIn("Could not fix broken.yaml", err)
+        self.assertEqual(self._read('template.yaml'), TEMPLATE_ORDER)
+        self.assertEqual(self._run_main('--dry-run')[1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
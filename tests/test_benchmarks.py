@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.corpus import generate_corpus, generate_documents
+from benchmarks.bench_server import percentile, run_load_test
+from benchmarks.run import find_regressions, run_benchmarks
+from scripts.validate_pricing import validate_files
+
+
+class TestCorpusGenerator(unittest.TestCase):
+
+    def test_same_seed_same_corpus(self):
+        self.assertEqual(list(generate_documents(200, seed=7)), list(generate_documents(200, seed=7)))
+
+    def test_different_seed_different_corpus(self):
+        self.assertNotEqual(list(generate_documents(50, seed=1)), list(generate_documents(50, seed=2)))
+
+    def test_filenames_are_unique(self):
+        filenames = [filename for filename, _ in generate_documents(2000)]
+        self.assertEqual(len(filenames), len(set(filenames)))
+
+    def test_corpus_mixes_expected_shapes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = generate_corpus(tmpdir, 500)
+            results = validate_files(paths)
+        codes = {d.code for errors, warnings in results.values() for d in (*errors, *warnings)}
+        for code in ('yaml-invalid', 'duplicate-key', 'missing-field', 'invalid-date',
+                     'deprecated-field', 'unit-mismatch', 'percent-mismatch'):
+            self.assertIn(code, codes)
+        contents = [content for _, content in generate_documents(500)]
+        self.assertTrue(any("sso_pricing: Call Us" in c for c in contents))
+        self.assertTrue(any("pricing_source: \n- https://" in c for c in contents))
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_run_benchmarks_reports_throughput(self):
+        results = run_benchmarks([20], repeat=1, log=lambda *args: None)
+        self.assertEqual(
+            [r['name'] for r in results],
+            ['extract_price', 'validate_vendor_file', 'validate_pricing.main', 'migrate_footnotes', 'find_duplicates'],
+        )
+        for result in results:
+            self.assertEqual(result['size'], 20)
+            self.assertGreater(result['items_per_second'], 0)
+
+    def test_find_regressions(self):
+        baseline = {'results': [
+            {'name': 'extract_price', 'size': 1000, 'items_per_second': 1000.0},
+            {'name': 'validate_vendor_file', 'size': 1000, 'items_per_second': 1000.0},
+        ]}
+        results = [
+            {'name': 'extract_price', 'size': 1000, 'items_per_second': 850.0},
+            {'name': 'validate_vendor_file', 'size': 1000, 'items_per_second': 500.0},
+            {'name': 'migrate_footnotes', 'size': 1000, 'items_per_second': 1.0},
+        ]
+        regressions = find_regressions(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('validate_vendor_file', regressions[0])
+
+
+class TestServerLoadTest(unittest.TestCase):
+
+    def test_percentile(self):
+        samples = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(samples, 50), 3)
+        self.assertEqual(percentile(samples, 99), 5)
+        self.assertEqual(percentile(samples, 1), 1)
+        self.assertIsNone(percentile([], 50))
+
+    def test_load_test_reports_latency(self):
+        results = run_load_test(requests=20, concurrency=4, docs_per_request=3, cli_runs=1, jobs=1,
+                                log=lambda *args: None)
+        self.assertEqual([r['name'] for r in results], ['cli', 'server'])
+        cli, server = results
+        self.assertEqual((cli['requests'], server['requests'], server['documents']), (1, 20, 60))
+        for result in results:
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['documents_per_second'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import build_corpus
+from scripts.build_corpus import build_corpus as build, load_columns, load_corpus, load_documents
+
+
+def _vendor_yaml(name, base='$10 per u/m', sso='$20 per u/m', pct='100%'):
+    return (
+        f"name: {name}\nbase_pricing: {base}\nsso_pricing: {sso}\npercent_increase: {pct}\n"
+        f"vendor_url: https://{name.lower()}.example.com\n"
+        f"pricing_source:\n- https://{name.lower()}.example.com/pricing\n- https://{name.lower()}.example.com/sso\n"
+        "updated_at: 2024-01-15\n"
+    )
+
+
+class TestBuildCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.vendors = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.vendors)
+        self.db = os.path.join(self.tmpdir.name, 'build', 'vendors.sqlite')
+        self._write('alpha.yaml', _vendor_yaml('Alpha'))
+        self._write('beta.yaml', _vendor_yaml('Beta', sso='Call Us!', pct='???'))
+        self._write('broken.yaml', "name: Foo\nname: Bar\n")
+
+    def _write(self, filename, content, mtime=None):
+        path = os.path.join(self.vendors, filename)
+        with open(path, 'w') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def _by_name(self):
+        return {os.path.basename(v['path']): v for v in load_corpus(self.db)}
+
+    def test_rows_have_parsed_price_fields(self):
+        stats = build([self.vendors], self.db)
+        self.assertEqual(stats['added'], 3)
+        vendors = self._by_name()
+        alpha = vendors['alpha.yaml']
+        self.assertEqual(alpha['name'], 'Alpha')
+        self.assertEqual((alpha['base_amount'], alpha['sso_amount']), (10.0, 20.0))
+        self.assertEqual((alpha['base_unit'], alpha['base_period'], alpha['base_currency']), ('per u/m', 'month', '$'))
+        self.assertEqual(alpha['base_currency_code'], 'USD')
+        self.assertEqual(alpha['percent_value'], 100.0)
+        self.assertEqual(alpha['call_us'], 0)
+        self.assertEqual(alpha['valid'], 1)
+        self.assertEqual(len(alpha['pricing_source']), 2)
+        self.assertEqual(alpha['updated_at'], '2024-01-15')
+        self.assertEqual(vendors['beta.yaml']['call_us'], 1)
+
+        broken = vendors['broken.yaml']
+        self.assertEqual(broken['valid'], 0)
+        self.assertIsNone(broken['name'])
+        self.assertEqual([e['code'] for e in broken['errors']], ['duplicate-key'])
+
+    def test_incremental_rebuild(self):
+        build([self.vendors], self.db)
+        # Content changed
+        self._write('alpha.yaml', _vendor_yaml('Alpha', sso='$30 per u/m', pct='200%'))
+        # mtime changed, content identical
+        beta = os.path.join(self.vendors, 'beta.yaml')
+        os.utime(beta, ns=(1, 1))
+        # Removed and added
+        os.unlink(os.path.join(self.vendors, 'broken.yaml'))
+        self._write('gamma.yaml', _vendor_yaml('Gamma'))
+
+        with patch.object(build_corpus, 'vendor_row', wraps=build_corpus.vendor_row) as parsed:
+            stats = build([self.vendors], self.db)
+        self.assertEqual(
+            {k: stats[k] for k in ('added', 'updated', 'unchanged', 'removed')},
+            {'added': 1, 'updated': 1, 'unchanged': 1, 'removed': 1},
+        )
+        self.assertEqual(sorted(os.path.basename(call.args[0]) for call in parsed.call_args_list),
+                         ['alpha.yaml', 'gamma.yaml'])
+        vendors = self._by_name()
+        self.assertEqual(sorted(vendors), ['alpha.yaml', 'beta.yaml', 'gamma.yaml'])
+        self.assertEqual(vendors['alpha.yaml']['sso_amount'], 30.0)
+        self.assertEqual(vendors['beta.yaml']['mtime_ns'], 1)
+
+        stats = build([self.vendors], self.db)
+        self.assertEqual(stats['unchanged'], 3)
+
+    def test_file_deleted_after_discovery_is_removed(self):
+        build([self.vendors], self.db)
+        discovered = build_corpus.find_vendor_files([self.vendors])
+        os.unlink(os.path.join(self.vendors, 'beta.yaml'))
+        with patch.object(build_corpus, 'find_vendor_files', return_value=discovered):
+            stats = build([self.vendors], self.db)
+        self.assertEqual(stats['removed'], 1)
+        self.assertEqual(sorted(self._by_name()), ['alpha.yaml', 'broken.yaml'])
+
+    def test_jobs_must_be_positive(self):
+        for jobs in ('0', '-3'):
+            with patch('sys.argv', ['build_corpus.py', self.vendors, '--jobs', jobs]), patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as raised:
+                    build_corpus.main()
+            self.assertEqual(raised.exception.code, 2)
+
+    def test_rule_change_rebuilds_everything(self):
+        build([self.vendors], self.db)
+        with patch.object(build_corpus, 'artifact_fingerprint', return_value='changed'):
+            stats = build([self.vendors], self.db)
+        self.assertEqual(stats['added'], 3)
+
+    def test_parallel_build_matches_serial(self):
+        serial_db = os.path.join(self.tmpdir.name, 'serial.sqlite')
+        build([self.vendors], serial_db, jobs=1)
+        build([self.vendors], self.db, jobs=2)
+        self.assertEqual(load_corpus(serial_db), load_corpus(self.db))
+
+    def test_load_columns_and_documents(self):
+        build([self.vendors], self.db)
+        columns = load_columns(self.db, ['name', 'sso_amount'])
+        self.assertEqual(columns['name'], ['Alpha', 'Beta', None])
+        self.assertEqual(columns['sso_amount'], [20.0, None, None])
+        documents = load_documents(self.db)
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(documents[os.path.join(self.vendors, 'alpha.yaml')]['percent_increase'], '100%')
+        with self.assertRaises(ValueError):
+            load_columns(self.db, ['nope'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.build_corpus import build_corpus
+from scripts.build_site_data import main, search_index, search_name, site_data, write_site_data
+
+
+class TestBuildSiteData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.vendors = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.vendors)
+        self.db = os.path.join(self.tmpdir.name, 'build', 'vendors.sqlite')
+
+    def _write(self, filename, content):
+        with open(os.path.join(self.vendors, filename), 'w') as f:
+            f.write(content)
+
+    def _site_data(self):
+        build_corpus([self.vendors], self.db)
+        return site_data(self.db)
+
+    def test_classifies_and_sorts_like_the_liquid_loop(self):
+        self._write('zeta.yaml', "name: zeta\nbase_pricing: $10 per u/m\nsso_pricing: $15 per u/m\npercent_increase: 50%\n")
+        self._write('alpha.yaml', "name: Alpha\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\npercent_increase: 100%\n")
+        self._write('beta.yaml', "name: beta\nbase_pricing: $10 per u/m\nsso_pricing: Contact Sales\npercent_increase: ???\n")
+        self._write('gamma.yaml', "name: Gamma\nbase_pricing: $10 per u/m\nsso_pricing: Custom Quote[^1]\npercent_increase: ???\n")
+        data = self._site_data()
+        self.assertEqual([v['name'] for v in data['vendors']], ['Alpha', 'zeta'])
+        self.assertEqual([v['name'] for v in data['call_us']], ['beta', 'Gamma'])
+
+    def test_numeric_fields_and_pricing_source_list(self):
+        self._write('alpha.yaml', (
+            "name: Alpha\nbase_pricing: $1,000 per year\nsso_pricing: $2,500 per year\npercent_increase: 150%\n"
+            "pricing_source: https://alpha.example.com/pricing\nupdated_at: 2024-01-15\n"
+        ))
+        self._write('beta.yaml', "name: Beta\nbase_pricing: $5\nsso_pricing: $10\npercent_increase: 100%\n")
+        alpha, beta = self._site_data()['vendors']
+        self.assertEqual((alpha['base_amount'], alpha['sso_amount'], alpha['percent_value']), (1000.0, 2500.0, 150.0))
+        self.assertEqual(alpha['base_pricing'], '$1,000 per year')
+        self.assertEqual(alpha['pricing_source'], ['https://alpha.example.com/pricing'])
+        self.assertEqual(alpha['updated_at'], '2024-01-15')
+        self.assertEqual(beta['pricing_source'], [])
+        self.assertIsNone(beta['vendor_note'])
+
+    def test_rejected_files_are_published_as_jekyll_reads_them(self):
+        # Duplicate keys fail validation, but Jekyll still renders the last value
+        self._write('dup.yaml', "name: Dup\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: 90%\npercent_increase: 100%\n")
+        self._write('bad.yaml', "name: Bad\nbase_pricing: [$10\n")
+        data = self._site_data()
+        self.assertEqual([v['name'] for v in data['vendors']], ['Dup'])
+        self.assertEqual(data['vendors'][0]['percent_increase'], '100%')
+        self.assertEqual(data['call_us'], [])
+
+    def test_search_index_numbers_priced_rows_first(self):
+        self._write('zeta.yaml', "name: Zeta  Labs\nbase_pricing: $10\nsso_pricing: $15\npercent_increase: 50%\n")
+        self._write('alpha.yaml', "name: Alpha\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: 100%\n")
+        self._write('beta.yaml', "name: LABS\nbase_pricing: $10\nsso_pricing: Contact Sales\n")
+        data = self._site_data()
+        self.assertEqual(data['search']['names'], ['alpha', 'zeta labs', 'labs'])
+        self.assertEqual([v['search_name'] for v in data['vendors'] + data['call_us']], data['search']['names'])
+        self.assertEqual(data['search']['grams']['lab'], [1, 2])
+        self.assertEqual(data['search']['grams']['a'], [0, 1, 2])
+        self.assertEqual(data['search']['grams']['a l'], [1])
+
+    def test_search_index_covers_every_short_substring(self):
+        vendors = [{'search_name': search_name(name)} for name in ('Foo Bar', '  foo\tBAZ ', None, 'Ünïcode')]
+        index = search_index(vendors)
+        self.assertEqual(index['names'], ['foo bar', 'foo baz', '', 'ünïcode'])
+        for gram, rows in index['grams'].items():
+            with self.subTest(gram=gram):
+                self.assertLessEqual(len(gram), index['gram_size'])
+                self.assertEqual(rows, [i for i, name in enumerate(index['names']) if gram in name])
+        self.assertEqual(len(index['grams']), len({
+            name[i:i + n] for name in index['names'] for n in (1, 2, 3) for i in range(len(name) - n + 1)
+        }))
+
+    def test_write_site_data(self):
+        self._write('alpha.yaml', "name: Alpha\nbase_pricing: $10\nsso_pricing: $20\npercent_increase: 100%\n")
+        out = os.path.join(self.tmpdir.name, '_data', 'vendors.json')
+        write_site_data(self._site_data(), out)
+        with open(out) as f:
+            written = json.load(f)
+        self.assertEqual([v['name'] for v in written['vendors']], ['Alpha'])
+        self.assertEqual(os.listdir(os.path.dirname(out)), ['vendors.json'])
+
+    def test_failed_write_leaves_the_old_file(self):
+        from unittest.mock import patch
+        out = os.path.join(self.tmpdir.name, 'vendors.json')
+        write_site_data({'vendors': []}, out)
+        with patch('os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_site_data({'vendors': [{'name': 'Alpha'}]}, out)
+        with open(out) as f:
+            self.assertEqual(json.load(f), {'vendors': []})
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['_vendors', 'vendors.json'])
+
+    def test_jobs_must_be_positive(self):
+        from unittest.mock import patch
+        for jobs in ('0', '-3'):
+            with patch('sys.argv', ['build_site_data.py', '--jobs', jobs]), patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as raised:
+                    main()
+            self.assertEqual(raised.exception.code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+import unittest
+import sys
+import os
+import io
+import json
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.check_links import LinkCache, LinkChecker, check_links, collect_links, main as check_links_main
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """A stand-in for vendor sites: each path behaves in one way worth checking."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _send(self, status, headers=(), body=b''):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status not in (204, 304):
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD' and status not in (204, 304):
+            self.wfile.write(body)
+
+    def _handle(self):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        path = self.path
+        if path.startswith('/ok'):
+            if self.headers.get('If-None-Match') == '"v1"':
+                self._send(304, [('ETag', '"v1"')])
+            else:
+                self._send(200, [('ETag', '"v1"')], b'hello')
+        elif path == '/dated':
+            if self.headers.get('If-Modified-Since') == 'Wed, 01 Jan 2025 00:00:00 GMT':
+                self._send(304)
+            else:
+                self._send(200, [('Last-Modified', 'Wed, 01 Jan 2025 00:00:00 GMT')], b'hello')
+        elif path == '/gone':
+            self._send(404, body=b'not here')
+        elif path == '/no-head':
+            self._send(405 if self.command == 'HEAD' else 200, body=b'get me')
+        elif path == '/moved':
+            self._send(301, [('Location', '/ok-target')])
+        elif path == '/flaky':
+            self.server.flaky += 1
+            if self.server.flaky == 1:
+                self._send(503, [('Retry-After', '0')])
+            else:
+                self._send(200, body=b'fine now')
+        elif path == '/busy':
+            self._send(429, [('Retry-After', '0')])
+        elif path == '/slow':
+            self.server.release.wait(5)
+            self._send(200)
+        else:
+            self._send(500)
+
+    do_HEAD = do_GET = _handle
+
+
+class LinkServerFixture(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.connections = 0
+        self.server.flaky = 0
+        self.server.release = threading.Event()
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(self.server.release.set)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def check(self, urls, **options):
+        options.setdefault('backoff', 0.01)
+        options.setdefault('timeout', 5)
+
+        async def run():
+            async with LinkChecker(**options) as checker:
+                return await checker.check_all(urls), checker
+
+        return asyncio.run(run())
+
+
+class TestLinkChecker(LinkServerFixture):
+
+    def test_statuses(self):
+        urls = [f"{self.base}/{path}" for path in ('ok', 'gone', 'no-head', 'moved', 'flaky', 'busy')]
+        results, _ = self.check(urls, retries=1)
+        ok, gone, no_head, moved, flaky, busy = (results[url] for url in urls)
+        self.assertEqual((ok.status, ok.error), (200, None))
+        self.assertEqual((gone.status, gone.error), (404, "HTTP 404 (Not Found)"))
+        self.assertEqual((no_head.status, no_head.error), (200, None))
+        self.assertEqual((moved.status, moved.final_url), (200, f"{self.base}/ok-target"))
+        self.assertEqual((flaky.status, flaky.error), (200, None))
+        self.assertEqual(busy.status, 429)
+        methods = [(method, path) for method, path, _ in self.server.requests]
+        self.assertEqual(methods.count(('HEAD', '/no-head')), 1)
+        self.assertEqual(methods.count(('GET', '/no-head')), 1)
+        # 404s are confirmed with GET too, since some servers only break HEAD
+        self.assertEqual(methods.count(('GET', '/gone')), 1)
+        # 429 is retried, never escalated to GET
+        self.assertEqual(methods.count(('HEAD', '/busy')), 2)
+        self.assertNotIn(('GET', '/busy'), methods)
+
+    def test_connections_are_pooled_per_host(self):
+        urls = [f"{self.base}/ok?page={i}" for i in range(20)]
+        results, checker = self.check(urls, per_host=2)
+        self.assertTrue(all(r.status == 200 for r in results.values()))
+        self.assertLessEqual(self.server.connections, 2)
+        [pool] = checker.pools.values()
+        self.assertEqual(pool.opened, self.server.connections)
+
+    def test_unreachable_and_timeout(self):
+        with socket_closed_port() as port:
+            results, _ = self.check([f"http://127.0.0.1:{port}/"], retries=0)
+        [result] = results.values()
+        self.assertIsNone(result.status)
+        self.assertIsNotNone(result.error)
+
+        results, _ = self.check([f"{self.base}/slow"], retries=0, timeout=0.2)
+        self.assertEqual(results[f"{self.base}/slow"].error, "timed out after 0.2s")
+
+    def test_cache_revalidates_with_conditional_requests(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'links.json')
+            urls = [f"{self.base}/ok", f"{self.base}/dated", f"{self.base}/no-head"]
+            cache = LinkCache(path)
+            first, _ = self.check(urls, cache=cache)
+            cache.save()
+            self.assertFalse(any(r.from_cache for r in first.values()))
+
+            second, _ = self.check(urls, cache=LinkCache(path))
+        self.assertTrue(second[urls[0]].from_cache)
+        self.assertTrue(second[urls[1]].from_cache)
+        self.assertEqual(second[urls[0]].status, 304)
+        self.assertIsNone(second[urls[0]].error)
+        # No validators to send, so a full check
+        self.assertFalse(second[urls[2]].from_cache)
+        conditional = [h for method, p, h in self.server.requests if p == '/ok' and 'If-None-Match' in h]
+        self.assertEqual(len(conditional), 1)
+
+
+class socket_closed_port:
+    """A local port with nothing listening on it."""
+
+    def __enter__(self):
+        import socket
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        return self.sock.getsockname()[1]
+
+    def __exit__(self, *exc_info):
+        self.sock.close()
+
+
+class TestCheckLinks(LinkServerFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.vendors = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.vendors)
+        self._write('alpha.yaml', f"name: Alpha\nvendor_url: {self.base}/ok\npricing_source:\n"
+                                  f"- {self.base}/gone\n- {self.base}/ok#pricing\n- Quote\n")
+        self._write('beta.yaml', f"name: Beta\nvendor_url: {self.base}/busy\npricing_source: {self.base}/gone\n")
+        self._write('broken.yaml', "name: [unclosed\n")
+
+    def _write(self, filename, content):
+        with open(os.path.join(self.vendors, filename), 'w') as f:
+            f.write(content)
+
+    def test_collect_links_dedupes(self):
+        links = collect_links(sorted(os.path.join(self.vendors, f) for f in os.listdir(self.vendors)))
+        alpha, beta = (os.path.join(self.vendors, f'{name}.yaml') for name in ('alpha', 'beta'))
+        self.assertEqual(links, {
+            f"{self.base}/ok": [(alpha, 'vendor_url'), (alpha, 'pricing_source')],
+            f"{self.base}/gone": [(alpha, 'pricing_source'), (beta, 'pricing_source')],
+            f"{self.base}/busy": [(beta, 'vendor_url')],
+        })
+
+    def test_diagnostics(self):
+        results, link_results, _ = check_links([self.vendors], retries=0, backoff=0.01)
+        self.assertEqual(len(link_results), 3)
+        alpha_errors, alpha_warnings = results[os.path.join(self.vendors, 'alpha.yaml')]
+        self.assertEqual([(d.code, d.field) for d in alpha_errors], [('broken-link', 'pricing_source')])
+        self.assertEqual(alpha_warnings, [])
+        beta_errors, beta_warnings = results[os.path.join(self.vendors, 'beta.yaml')]
+        self.assertEqual([d.code for d in beta_errors], ['broken-link'])
+        self.assertEqual([d.code for d in beta_warnings], ['link-check-failed'])
+        self.assertEqual(results[os.path.join(self.vendors, 'broken.yaml')], ([], []))
+
+    def test_cli_jsonl(self):
+        captured = io.StringIO()
+        argv = ['check_links.py', self.vendors, '--format', 'jsonl', '--retries', '0']
+        with patch('sys.argv', argv), patch('sys.stdout', captured), patch('sys.stderr', io.StringIO()):
+            with self.assertRaises(SystemExit) as cm:
+                check_links_main()
+        self.assertEqual(cm.exception.code, 1)
+        records = [json.loads(line) for line in captured.getvalue().splitlines()]
+        self.assertEqual(records[-1]['categories'], ['links-error', 'links-warning'])
+        self.assertEqual(sum(1 for r in records if r.get('code') == 'broken-link'), 2)
+
+
+    def test_cli_cache_does_not_take_the_paths(self):
+        cache_path = os.path.join(self.tmpdir.name, 'links.json')
+        captured = io.StringIO()
+        argv = ['check_links.py', '--cache', self.vendors, '--cache-path', cache_path, '--format', 'jsonl',
+                '--retries', '0']
+        with patch('sys.argv', argv), patch('sys.stdout', captured), patch('sys.stderr', io.StringIO()):
+            with self.assertRaises(SystemExit) as cm:
+                check_links_main()
+        self.assertEqual(cm.exception.code, 1)
+        self.assertTrue(os.path.exists(cache_path))
+        records = [json.loads(line) for line in captured.getvalue().splitlines()]
+        self.assertEqual(sum(1 for r in records if r.get('code') == 'broken-link'), 2)
+
+    def test_cli_rejects_bad_options(self):
+        for options in (['--retries', '-1'], ['--retries', 'x'], ['--cache-path', 'links.json']):
+            with self.subTest(options=options):
+                with patch('sys.argv', ['check_links.py', self.vendors, *options]), patch('sys.stderr', io.StringIO()):
+                    with self.assertRaises(SystemExit) as cm:
+                        check_links_main()
+                self.assertEqual(cm.exception.code, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import io
+import csv
+import json
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.build_corpus import build_corpus as build, main as build_main
+from scripts.currency import convert
+
+try:
+    import numpy as np
+    from scripts import corpus_stats
+except ImportError:
+    np = None
+
+
+def _vendor_yaml(name, base='$10 per u/m', sso='$20 per u/m', pct='100%', updated_at='2024-01-15'):
+    return (
+        f"name: {name}\nbase_pricing: {base}\nsso_pricing: {sso}\npercent_increase: {pct}\n"
+        f"vendor_url: https://{name.lower()}.example.com\npricing_source: https://{name.lower()}.example.com/pricing\n"
+        f"updated_at: {updated_at}\n"
+    )
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestCorpusStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.vendors = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.vendors)
+        self.db = os.path.join(self.tmpdir.name, 'vendors.sqlite')
+        for i, pct in enumerate((90, 100, 110, 100, 95)):
+            self._write(f'v{i}.yaml', _vendor_yaml(f'V{i}', sso=f'${10 + pct / 10:g} per u/m', pct=f'{pct}%'))
+        self._write('euro.yaml', _vendor_yaml('Euro', base='€10 per u/m', sso='$20 per u/m', pct='84%'))
+        self._write('greedy.yaml', _vendor_yaml('Greedy', sso='$1000 per u/m', pct='9900%', updated_at='2020-01-15'))
+        self._write('callus.yaml', _vendor_yaml('CallUs', sso='Call Us!', pct='???', updated_at='someday'))
+        build([self.vendors], self.db)
+
+    def _write(self, filename, content):
+        with open(os.path.join(self.vendors, filename), 'w') as f:
+            f.write(content)
+
+    def test_arrays(self):
+        arrays = corpus_stats.load_arrays(self.db, today='2025-01-15')
+        names = list(arrays['name'])
+        euro = names.index('Euro')
+        self.assertAlmostEqual(arrays['base_usd'][euro], convert(10, 'EUR', 'USD'))
+        self.assertAlmostEqual(arrays['markup'][euro], (20 / convert(10, 'EUR', 'USD') - 1) * 100)
+        callus = names.index('CallUs')
+        self.assertTrue(arrays['call_us'][callus])
+        self.assertTrue(np.isnan(arrays['markup'][callus]))
+        self.assertTrue(np.isnat(arrays['updated_at'][callus]))
+        self.assertEqual(arrays['age_days'][names.index('Greedy')], 1827)
+        self.assertEqual(arrays['age_days'][names.index('V0')], 366)
+
+    def test_stats(self):
+        stats = corpus_stats.corpus_stats(corpus_stats.load_arrays(self.db, today='2025-01-15'))
+        self.assertEqual(stats['vendors'], 8)
+        self.assertEqual(stats['call_us'], {'count': 1, 'share': 1 / 8})
+        self.assertEqual(stats['markup']['count'], 7)
+        self.assertAlmostEqual(stats['markup']['percentiles']['p50'], 100.0)
+        self.assertEqual(sum(bucket['count'] for bucket in stats['markup']['histogram']), 7)
+        self.assertEqual((stats['staleness']['dated'], stats['staleness']['undated']), (7, 1))
+        self.assertEqual(stats['staleness']['older_than_730_days'], 1)
+        self.assertEqual([o['name'] for o in stats['outliers']], ['Greedy'])
+        json.dumps(stats)
+
+    def test_outlier_scores(self):
+        scores = corpus_stats.outlier_scores(np.array([100.0, 100.0, np.nan, -100.0]))
+        self.assertEqual(list(scores[:2]), [0.0, 0.0])
+        self.assertTrue(np.isnan(scores[2:]).all())
+
+    def test_empty_corpus(self):
+        db = os.path.join(self.tmpdir.name, 'empty.sqlite')
+        empty = os.path.join(self.tmpdir.name, 'empty')
+        os.mkdir(empty)
+        build([empty], db)
+        stats = corpus_stats.corpus_stats(corpus_stats.load_arrays(db))
+        self.assertEqual((stats['vendors'], stats['markup']['count'], stats['outliers']), (0, 0, []))
+        corpus_stats.print_stats(stats, file=io.StringIO())
+
+    def test_exports_round_trip(self):
+        arrays = corpus_stats.load_arrays(self.db)
+        corpus_stats.corpus_stats(arrays)
+        npz = os.path.join(self.tmpdir.name, 'out', 'stats.npz')
+        corpus_stats.export_arrays(arrays, npz)
+        with np.load(npz) as loaded:
+            self.assertEqual(list(loaded['name']), list(arrays['name']))
+            np.testing.assert_array_equal(loaded['markup'], arrays['markup'])
+            np.testing.assert_array_equal(loaded['updated_at'], arrays['updated_at'])
+
+        path = os.path.join(self.tmpdir.name, 'stats.csv')
+        corpus_stats.export_arrays(arrays, path)
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 8)
+        callus = next(row for row in rows if row['name'] == 'CallUs')
+        self.assertEqual((callus['markup'], callus['updated_at'], callus['call_us']), ('', '', 'True'))
+
+        with self.assertRaises(ValueError):
+            corpus_stats.export_arrays(arrays, os.path.join(self.tmpdir.name, 'stats.xlsx'))
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['_vendors', 'out', 'stats.csv', 'vendors.sqlite'])
+
+    def test_failed_export_leaves_no_temp_file(self):
+        from unittest.mock import patch
+        arrays = corpus_stats.load_arrays(self.db)
+        corpus_stats.corpus_stats(arrays)
+        out = os.path.join(self.tmpdir.name, 'out')
+        with patch.object(corpus_stats.np, 'savez_compressed', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                corpus_stats.export_arrays(arrays, os.path.join(out, 'stats.npz'))
+        self.assertEqual(os.listdir(out), [])
+
+    def test_cli(self):
+        out = os.path.join(self.tmpdir.name, 'stats.csv')
+        captured = io.StringIO()
+        argv = ['build_corpus.py', self.vendors, '--out', self.db, '--stats', '--stats-format', 'json', '--stats-out', out]
+        with patch('sys.argv', argv), patch('sys.stdout', captured), patch('sys.stderr', io.StringIO()):
+            build_main()
+        self.assertEqual(json.loads(captured.getvalue())['vendors'], 8)
+        self.assertTrue(os.path.exists(out))
+
+        with patch('sys.argv', ['build_corpus.py', self.vendors, '--stats-out', out]), \
+                patch('sys.stderr', io.StringIO()), self.assertRaises(SystemExit):
+            build_main()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.currency import convert, convert_many, detect_currency, load_fx_table, strip_currency
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestDetectCurrency(unittest.TestCase):
+
+    def test_symbols_and_codes(self):
+        cases = {
+            '$10 per u/m': 'USD',
+            '€10 per u/m': 'EUR',
+            '4.99€ / device': 'EUR',
+            '£8 per user': 'GBP',
+            'A$15 per user': 'AUD',
+            'CA$12/mo': 'CAD',
+            '10 EUR per user': 'EUR',
+            'CHF 5 per seat': 'CHF',
+            '10 per user': None,
+            'Call Us!': None,
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(detect_currency(text), expected)
+
+    def test_explicit_code_beats_bare_symbol(self):
+        self.assertEqual(detect_currency('$10 AUD per user'), 'AUD')
+        self.assertEqual(detect_currency('$10 USD per user'), 'USD')
+
+    def test_codes_must_be_whole_words(self):
+        self.assertIsNone(detect_currency('EUROPE 10 per user'))
+        self.assertIsNone(detect_currency('10 per seat (XYZ plan)'))
+
+    def test_non_strings(self):
+        self.assertIsNone(detect_currency(10))
+        self.assertIsNone(detect_currency(None))
+
+
+class TestStripCurrency(unittest.TestCase):
+
+    def test_strips_symbols_and_codes(self):
+        self.assertEqual(strip_currency('€ / device'), '/ device')
+        self.assertEqual(strip_currency('usd per user'), 'per user')
+        self.assertEqual(strip_currency('per u/m'), 'per u/m')
+        self.assertEqual(strip_currency('per users'), 'per users')
+
+
+class TestConvert(unittest.TestCase):
+
+    def test_convert(self):
+        table = load_fx_table()
+        self.assertEqual(convert(10, 'USD', 'USD'), 10)
+        self.assertAlmostEqual(convert(table.rates['EUR'], 'EUR', 'USD'), 1.0)
+        self.assertAlmostEqual(convert(convert(10, 'GBP', 'JPY'), 'JPY', 'GBP'), 10)
+        self.assertIsNone(convert(10, 'XXX', 'USD'))
+        self.assertIsNone(convert(None, 'EUR', 'USD'))
+
+    def test_convert_many_matches_convert(self):
+        amounts = [10.0, 20.0, None, 5.0, 7.5]
+        currencies = ['EUR', None, 'USD', 'XXX', 'GBP']
+        expected = [convert(10.0, 'EUR', 'USD'), 20.0, None, None, convert(7.5, 'GBP', 'USD')]
+        self.assertEqual(convert_many(amounts, currencies, 'USD', default='USD'), expected)
+        self.assertEqual(convert_many([20.0], [None]), [None])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_convert_many_numpy(self):
+        amounts = np.array([10.0, 20.0, np.nan, 5.0, 7.5])
+        currencies = ['EUR', None, 'USD', 'XXX', 'GBP']
+        converted = convert_many(amounts, currencies, 'EUR', default='USD')
+        expected = [10.0, convert(20.0, 'USD', 'EUR'), None, None, convert(7.5, 'GBP', 'EUR')]
+        for value, want in zip(converted, expected):
+            if want is None:
+                self.assertTrue(np.isnan(value))
+            else:
+                self.assertAlmostEqual(value, want)
+        self.assertEqual(convert_many(np.array([]), []).shape, (0,))
+
+
+class TestLoadFxTable(unittest.TestCase):
+
+    def _table(self, data):
+        f = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
+        json.dump(data, f)
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_shipped_table(self):
+        table = load_fx_table()
+        self.assertEqual(table.base, 'USD')
+        self.assertEqual(table.rates['USD'], 1.0)
+        self.assertTrue(table.version)
+
+    def test_malformed_tables(self):
+        for data in (
+            {'base': 'USD', 'rates': {'USD': 1}},
+            {'version': '1', 'base': 'USD', 'rates': {'USD': 2}},
+            {'version': '1', 'base': 'USD', 'rates': {'USD': 1, 'EUR': -1}},
+            {'version': '1', 'base': 'USD', 'rates': {'USD': 1, 'euro': 0.9}},
+        ):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                load_fx_table(self._table(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
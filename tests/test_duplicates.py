@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import itertools
+import json
+import random
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.duplicates import (
+    Allowlist, VendorRecord, find_duplicates, load_allowlist, normalize_name, read_record, similar_name_pairs,
+    trigrams, vendor_host,
+)
+
+VENDORS_DIR = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("Atlassian Jira-Cloud!"), 'atlassianjiracloud')
+        self.assertEqual(normalize_name("Café"), 'cafe')
+        self.assertEqual(normalize_name(None), '')
+
+    def test_vendor_host(self):
+        self.assertEqual(vendor_host("https://www.Example.com:443/pricing"), 'example.com')
+        self.assertEqual(vendor_host("https://app.example.com"), 'app.example.com')
+        self.assertIsNone(vendor_host("example.com"))
+        self.assertIsNone(vendor_host(None))
+
+    def test_read_record_is_lenient(self):
+        record = read_record('x.yaml', b"name: A\nname: B\nvendor_url: https://b.example.com\n")
+        self.assertEqual(record, VendorRecord('x.yaml', 'B', 'https://b.example.com'))
+        self.assertEqual(read_record('y.yaml', b"name: [oops\n"), VendorRecord('y.yaml', None, None))
+
+
+class TestAllowlist(unittest.TestCase):
+
+    def load(self, data):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'allowlist.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            return load_allowlist(path)
+
+    def test_entries_are_normalized(self):
+        allowlist = self.load({'hosts': ['WWW.Example.com'], 'names': [['Linear', 'Linear-B']]})
+        self.assertEqual(allowlist.hosts, {'example.com'})
+        self.assertEqual(allowlist.names, {frozenset({'linear', 'linearb'})})
+
+    def test_malformed_allowlist_is_rejected(self):
+        for data in ({'hosts': []}, [], {'hosts': [1], 'names': []}, {'hosts': [], 'names': [['Linear']]}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                self.load(data)
+
+    def test_default_allowlist_loads(self):
+        self.assertIn('adobe.com', load_allowlist().hosts)
+
+
+class TestFindDuplicates(unittest.TestCase):
+
+    def test_exact_name_and_host(self):
+        records = [
+            VendorRecord('jira.yaml', 'Jira', 'https://www.atlassian.com/software/jira'),
+            VendorRecord('atlassianjiracloud.yaml', 'Atlassian Jira Cloud', 'https://atlassian.com'),
+            VendorRecord('jira2.yaml', 'JIRA', 'https://jira.example.com'),
+            VendorRecord('other.yaml', 'Other', 'https://other.example.com'),
+        ]
+        found = find_duplicates(records)
+        self.assertEqual(sorted(found), [0, 1, 2])
+        self.assertEqual([(m.kind, m.other) for m in found[0]], [('name', 2), ('host', 1)])
+        self.assertEqual([(m.kind, m.other) for m in found[1]], [('host', 0)])
+
+    def test_near_duplicate_names(self):
+        records = [
+            VendorRecord('a.yaml', 'HubSpot Marketing Hub', None),
+            VendorRecord('b.yaml', 'Hubspot MarketingHub Pro', None),
+            VendorRecord('c.yaml', 'Zendesk', None),
+        ]
+        found = find_duplicates(records)
+        self.assertEqual(list(found), [0, 1])
+        [match] = found[0]
+        self.assertEqual((match.kind, match.other), ('similar-name', 1))
+        self.assertGreater(match.similarity, 0.7)
+
+    def test_same_path_is_never_a_duplicate(self):
+        records = [VendorRecord('_vendors/a.yaml', 'A', None), VendorRecord('_vendors/a.yaml', 'A', None)]
+        self.assertEqual(find_duplicates(records), {})
+
+    def test_allowlist_skips_shared_hosts_and_name_pairs(self):
+        records = [
+            VendorRecord('adobeacrobat.yaml', 'Adobe Acrobat', 'https://www.adobe.com/acrobat'),
+            VendorRecord('adobecreativecloud.yaml', 'Adobe Creative Cloud', 'https://adobe.com/creativecloud'),
+            VendorRecord('linear.yaml', 'Linear', None),
+            VendorRecord('linearb.yaml', 'LinearB', None),
+            VendorRecord('acrobat.yaml', 'Adobe-Acrobat', 'https://adobe.com'),
+        ]
+        self.assertEqual(sorted(find_duplicates(records)), [0, 1, 2, 3, 4])
+        allowlist = Allowlist(frozenset({'adobe.com'}), frozenset({frozenset({'linear', 'linearb'})}))
+        found = find_duplicates(records, allowlist=allowlist)
+        # An allowed host still leaves exact and similar names to be checked
+        self.assertEqual(sorted(found), [0, 4])
+        self.assertEqual([(m.kind, m.other) for m in found[0]], [('name', 4)])
+
+    def test_corpus_has_no_unexpected_duplicates(self):
+        paths = sorted(os.path.join(VENDORS_DIR, name) for name in os.listdir(VENDORS_DIR) if name.endswith('.yaml'))
+        records = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                records.append(read_record(path, f.read()))
+        found = find_duplicates(records, allowlist=load_allowlist())
+        self.assertEqual({records[i].path: matches for i, matches in found.items()}, {})
+
+    def test_similar_pairs_are_exact_and_find_close_names(self):
+        rng = random.Random(0)
+        syllables = ['ac', 'al', 'hub', 'spot', 'data', 'dog', 'cloud', 'flow', 'jira', 'lab', 'ops']
+        names = sorted({''.join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(300)})
+        expected = {}
+        for i, j in itertools.combinations(range(len(names)), 2):
+            a, b = trigrams(names[i]), trigrams(names[j])
+            expected[(i, j)] = len(a & b) / len(a | b)
+
+        pairs = similar_name_pairs(names, threshold=0.6)
+        # Never a false positive, and similarities are exact
+        for i, j, similarity in pairs:
+            self.assertAlmostEqual(similarity, expected[(i, j)])
+            self.assertGreaterEqual(similarity, 0.6)
+        # Clear near-duplicates are always found
+        found = {(i, j) for i, j, _ in pairs}
+        self.assertTrue({pair for pair, s in expected.items() if s >= 0.8} <= found)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import tempfile
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.file_watch import InotifyWatcher, PollingWatcher, open_watcher
+
+
+class WatcherTests:
+    """
+    Shared checks, mixed into a TestCase per watcher implementation. Subclasses
+    set watcher_factory: called with a list of directories, returns a watcher.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = self.tmpdir.name
+        self.existing = os.path.join(self.directory, 'alpha.yaml')
+        with open(self.existing, 'w') as f:
+            f.write("name: Alpha\n")
+        try:
+            self.watcher = self.watcher_factory([self.directory])
+        except OSError as e:
+            self.skipTest(f"watcher unavailable: {e}")
+        self.addCleanup(self.watcher.close)
+
+    def test_times_out_without_changes(self):
+        self.assertEqual(self.watcher.wait(timeout=0.05), set())
+
+    def test_reports_written_and_deleted_vendor_files(self):
+        with open(self.existing, 'a') as f:
+            f.write("vendor_url: https://alpha.example.com\n")
+        created = os.path.join(self.directory, 'beta.yml')
+        with open(created, 'w') as f:
+            f.write("name: Beta\n")
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as f:
+            f.write("ignored\n")
+        self.assertEqual(self._wait_for(2), {self.existing, created})
+
+        os.unlink(created)
+        self.assertEqual(self._wait_for(1), {created})
+
+    def test_reports_files_renamed_into_place(self):
+        tmp = os.path.join(self.directory, '.alpha.yaml.swp')
+        with open(tmp, 'w') as f:
+            f.write("name: Alpha Two\n")
+        os.replace(tmp, self.existing)
+        self.assertEqual(self._wait_for(1), {self.existing})
+
+    def _wait_for(self, count):
+        changed = set()
+        while len(changed) < count:
+            batch = self.watcher.wait(timeout=2)
+            if not batch:
+                break
+            changed |= batch
+        return changed
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+
+    watcher_factory = partial(PollingWatcher, interval=0.01)
+
+
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+
+    watcher_factory = InotifyWatcher
+
+    def test_open_watcher_prefers_inotify(self):
+        watcher = open_watcher([self.directory])
+        self.addCleanup(watcher.close)
+        self.assertIsInstance(watcher, InotifyWatcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+import sys
+import os
+import io
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.git_objects import CatFileBatch, GitError, changed_vendor_entries, parse_range
+from scripts import validate_pricing
+from scripts.validate_pricing import main as vp_main, validate_git_ranges
+
+VALID = (
+    "name: {name}\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\npercent_increase: 100%\n"
+    "vendor_url: https://example.com\npricing_source: https://example.com/pricing\nupdated_at: 2024-01-15\n"
+)
+
+
+class GitRepoFixture(unittest.TestCase):
+    """A throwaway git repository with a _vendors/ directory."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.repo = self.tmpdir.name
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'user.name', 'Test')
+        os.mkdir(os.path.join(self.repo, '_vendors'))
+
+    def git(self, *args):
+        return subprocess.run(['git', *args], cwd=self.repo, check=True, capture_output=True, text=True).stdout.strip()
+
+    def write(self, path, content):
+        with open(os.path.join(self.repo, path), 'w') as f:
+            f.write(content)
+
+    def commit(self, message='change'):
+        self.git('add', '-A')
+        self.git('commit', '-q', '--allow-empty', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+
+class TestGitObjects(GitRepoFixture):
+
+    def test_changed_entries_and_blob_contents(self):
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha'))
+        self.write('README.md', 'hello\n')
+        base = self.commit()
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha Two'))
+        self.write('_vendors/beta.yaml', VALID.format(name='Beta'))
+        self.write('README.md', 'changed\n')
+        head = self.commit()
+        os.symlink('/etc/passwd', os.path.join(self.repo, '_vendors', 'gamma.yaml'))
+        symlink_head = self.commit()
+
+        entries = changed_vendor_entries(base, head, self.repo)
+        self.assertEqual([(e.path, e.status) for e in entries], [('_vendors/alpha.yaml', 'M'), ('_vendors/beta.yaml', 'A')])
+        with CatFileBatch(self.repo) as objects:
+            self.assertEqual(objects.read(entries[0].oid).decode(), VALID.format(name='Alpha Two'))
+            self.assertEqual(objects.read(entries[1].oid).decode(), VALID.format(name='Beta'))
+            with self.assertRaises(GitError):
+                objects.read('0' * 40)
+
+        [symlink] = changed_vendor_entries(head, symlink_head, self.repo)
+        self.assertEqual((symlink.path, symlink.mode), ('_vendors/gamma.yaml', '120000'))
+
+    def test_parse_range(self):
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha'))
+        base = self.commit()
+        self.git('checkout', '-q', '-b', 'feature')
+        feature = self.commit('feature')
+        self.git('checkout', '-q', '-')
+        main = self.commit('main moved on')
+
+        self.assertEqual(parse_range(f'{base}..{feature}', self.repo), (base, feature))
+        self.assertEqual(parse_range(f'{main}..feature', self.repo), (main, feature))
+        self.assertEqual(parse_range(f'{main}...feature', self.repo), (base, feature))
+        with self.assertRaises(ValueError):
+            parse_range('HEAD', self.repo)
+        with self.assertRaises(GitError):
+            parse_range('nope..HEAD', self.repo)
+
+
+class TestValidateGitRanges(GitRepoFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha'))
+        self.base = self.commit()
+
+    def _run_main(self, *argv):
+        captured = io.StringIO()
+        exit_code = 0
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            with patch('sys.argv', ['validate_pricing.py', *argv]), patch('sys.stdout', captured), \
+                    patch('sys.stderr', io.StringIO()):
+                try:
+                    vp_main()
+                except SystemExit as e:
+                    exit_code = e.code
+        finally:
+            os.chdir(cwd)
+        return captured.getvalue(), exit_code
+
+    def test_matches_validating_a_checkout(self):
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha').replace('100%', '50%'))
+        self.write('_vendors/beta.yaml', "name: Beta\nname: Beta\n")
+        self.write('_vendors/notes.txt', "not a vendor\n")
+        head = self.commit()
+
+        from_git, git_code = self._run_main('--git-range', f'{self.base}..{head}')
+        from_tree, tree_code = self._run_main('_vendors/alpha.yaml', '_vendors/beta.yaml')
+        self.assertEqual(from_git, from_tree)
+        self.assertEqual(git_code, 1)
+        self.assertIn("Scanned 2 files", from_git)
+
+    def test_working_tree_is_not_read(self):
+        self.write('_vendors/beta.yaml', VALID.format(name='Beta'))
+        head = self.commit()
+        # An uncommitted edit must not leak into the result
+        self.write('_vendors/beta.yaml', "name: Broken\n")
+        out, code = self._run_main('--git-range', f'{self.base}..{head}')
+        self.assertEqual(code, 0)
+        self.assertIn("Errors: 0 files", out)
+
+    def test_symlinks_are_errors(self):
+        os.symlink('/etc/passwd', os.path.join(self.repo, '_vendors', 'evil'))
+        head = self.commit()
+        results = validate_git_ranges([f'{self.base}..{head}'], self.repo)
+        [(errors, warnings)] = results.values()
+        self.assertEqual(list(results), ['_vendors/evil'])
+        self.assertEqual([e.code for e in errors], ['not-a-regular-file'])
+
+    def test_several_ranges_validate_each_blob_once(self):
+        self.write('_vendors/beta.yaml', VALID.format(name='Beta'))
+        first = self.commit()
+        self.write('_vendors/gamma.yaml', VALID.format(name='Gamma'))
+        second = self.commit()
+        with patch.object(validate_pricing, '_validate_blob', wraps=validate_pricing._validate_blob) as spy:
+            results = validate_git_ranges([f'{self.base}..{first}', f'{self.base}..{second}'], self.repo)
+        self.assertEqual(list(results), [
+            f'{first}:_vendors/beta.yaml', f'{second}:_vendors/beta.yaml', f'{second}:_vendors/gamma.yaml',
+        ])
+        self.assertEqual(spy.call_count, 2)
+
+    def test_keys_name_heads_containing_dots(self):
+        self.git('tag', 'v1.2')
+        self.git('checkout', '-q', '-b', 'release-1.0')
+        self.write('_vendors/gamma.yaml', VALID.format(name='Gamma'))
+        self.commit()
+        self.git('tag', 'v1.3')
+        results = validate_git_ranges([f'{self.base}..release-1.0', 'v1.2...v1.3'], self.repo)
+        self.assertEqual(list(results), ['release-1.0:_vendors/gamma.yaml', 'v1.3:_vendors/gamma.yaml'])
+
+    def test_check_duplicates_against_the_working_tree(self):
+        self.write('_vendors/alpha2.yaml', VALID.format(name='Alpha'))
+        # Editing alpha.yaml itself must not make it a duplicate of its old version
+        self.write('_vendors/alpha.yaml', VALID.format(name='Alpha').replace('100%', '100.0%'))
+        head = self.commit()
+        self.git('checkout', '-q', self.base)
+        out, _ = self._run_main('--git-range', f'{self.base}..{head}', '--check-duplicates')
+        self.assertIn("⚠️ alpha2.yaml\n   Warning: Vendor name 'Alpha' is also used by alpha.yaml.", out)
+        self.assertIn("⚠️ alpha.yaml\n   Warning: Vendor name 'Alpha' is also used by alpha2.yaml.", out)
+        self.assertEqual(out.count("is also used by"), 4)
+
+    def test_text_report_rendered_from_the_jsonl_run(self):
+        # As the PR workflow does: validate once, render the text report from the saved results
+        from scripts.merge_reports import main as merge_main
+        self.write('_vendors/alpha2.yaml', VALID.format(name='Alpha'))
+        self.write('_vendors/beta.yaml', "name: Broken\n")
+        head = self.commit()
+        report = os.path.join(self.repo, 'report.json')
+        text, code = self._run_main('--git-range', f'{self.base}..{head}', '--check-duplicates')
+        _, jsonl_code = self._run_main('--git-range', f'{self.base}..{head}', '--check-duplicates',
+                                       '--format', 'jsonl', '--report-out', report)
+        rendered = io.StringIO()
+        with patch('sys.argv', ['merge_reports.py', report]), patch('sys.stdout', rendered):
+            with self.assertRaises(SystemExit) as raised:
+                merge_main()
+        self.assertEqual((rendered.getvalue(), raised.exception.code), (text, code))
+        self.assertEqual((code, jsonl_code), (1, 1))
+
+    def test_bad_range_is_a_usage_error(self):
+        _, code = self._run_main('--git-range', 'nope..HEAD')
+        self.assertEqual(code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
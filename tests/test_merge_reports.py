@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.merge_reports import main as merge_main, merge_reports
+from scripts.validate_pricing import main as validate_main, read_report
+
+VENDORS_DIR = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+
+DUPLICATE = (
+    "name: {name}\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\npercent_increase: 100%\n"
+    "vendor_url: {url}\npricing_source: https://example.com/pricing\nupdated_at: 2024-01-15\n"
+)
+
+
+def _run(main, argv):
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    with patch('sys.argv', argv), patch('sys.stdout', out), patch('sys.stderr', err):
+        try:
+            main()
+        except SystemExit as e:
+            code = e.code
+    return out.getvalue(), code, err.getvalue()
+
+
+class TestShardedRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.corpus = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.corpus)
+        for filename in sorted(os.listdir(VENDORS_DIR))[:40]:
+            shutil.copy(os.path.join(VENDORS_DIR, filename), self.corpus)
+        # Duplicates spread across shards, so their warnings list several others
+        for i, url in enumerate(['https://zendesk.com', 'https://zendesk.com/x', 'https://zen.example.com']):
+            with open(os.path.join(self.corpus, f'zendesk{i}.yaml'), 'w') as f:
+                f.write(DUPLICATE.format(name='Zendesk', url=url))
+        with open(os.path.join(self.corpus, 'broken.yaml'), 'w') as f:
+            f.write("name: Foo\nname: Bar\n")
+
+    def _validate(self, *argv):
+        return _run(validate_main, ['validate_pricing.py', self.corpus, 'missing.yaml', '--jobs', '1',
+                                    '--check-duplicates', '--duplicates-corpus', self.corpus, *argv])
+
+    def _shard_reports(self, count, *argv):
+        paths = []
+        for index in range(1, count + 1):
+            paths.append(os.path.join(self.tmpdir.name, f'shard-{index}.json'))
+            self._validate('--shard', f'{index}/{count}', '--report-out', paths[-1], *argv)
+        return paths
+
+    def test_merged_output_matches_single_run(self):
+        for output_format in ('text', 'jsonl'):
+            for count in (1, 3, 7):
+                with self.subTest(format=output_format, shards=count):
+                    single = self._validate('--format', output_format)
+                    reports = self._shard_reports(count)
+                    merged = _run(merge_main, ['merge_reports.py', *reversed(reports), '--format', output_format])
+                    self.assertEqual(merged, single)
+        self.assertIn("Skipping invalid path: missing.yaml", single[2])
+        self.assertIn("is also used by zendesk0.yaml, zendesk1.yaml", single[0])
+
+    def test_fail_on_warnings(self):
+        os.remove(os.path.join(self.corpus, 'broken.yaml'))
+        single = self._validate('--fail-on-warnings')
+        self.assertEqual(single[1], 1)
+        merged = _run(merge_main, ['merge_reports.py', *self._shard_reports(2), '--fail-on-warnings'])
+        self.assertEqual(merged, single)
+        self.assertEqual(_run(merge_main, ['merge_reports.py', *self._shard_reports(2)])[1], 0)
+
+    def test_cache_counts_are_summed(self):
+        cache = os.path.join(self.tmpdir.name, 'cache.json')
+        self._validate('--cache', '--cache-path', cache)
+        single = self._validate('--cache', '--cache-path', cache)
+        merged = _run(merge_main, ['merge_reports.py', *self._shard_reports(3, '--cache', '--cache-path', cache)])
+        self.assertEqual(merged, single)
+        self.assertIn("Cache: 44 hits, 0 misses", merged[0])
+
+    def test_shards_partition_the_files(self):
+        reports = [read_report(path) for path in self._shard_reports(4)]
+        keys = [key for report in reports for key in report['results']]
+        self.assertEqual(sorted(keys), sorted(reports[0]['order']))
+        self.assertEqual(len(keys), 44)
+        self.assertEqual([report['shard'] for report in reports], [(1, 4), (2, 4), (3, 4), (4, 4)])
+
+    def test_incomplete_or_mismatched_reports(self):
+        reports = [read_report(path) for path in self._shard_reports(3)]
+        with self.assertRaisesRegex(ValueError, 'missing shard 2 of 3'):
+            merge_reports([reports[0], reports[2]])
+        with self.assertRaisesRegex(ValueError, 'given more than once'):
+            merge_reports([reports[0], reports[0], reports[1], reports[2]])
+        with self.assertRaisesRegex(ValueError, 'different versions of the rules'):
+            merge_reports([reports[0], reports[1], dict(reports[2], rules='other')])
+        with self.assertRaisesRegex(ValueError, 'split 2 and 3 ways'):
+            merge_reports([*reports, read_report(self._shard_reports(2)[0])])
+        with self.assertRaisesRegex(ValueError, 'different vendor files'):
+            merge_reports([reports[0], reports[1], dict(reports[2], order=reports[2]['order'][1:])])
+
+        bad = os.path.join(self.tmpdir.name, 'bad.json')
+        with open(bad, 'w') as f:
+            json.dump({'version': 0}, f)
+        _, code, err = _run(merge_main, ['merge_reports.py', bad])
+        self.assertEqual(code, 2)
+        self.assertIn('not a version 1 validation report', err)
+
+    def test_shard_argument(self):
+        for value in ('0/3', '4/3', '3', 'a/b'):
+            with self.subTest(value=value):
+                _, code, err = _run(validate_main, ['validate_pricing.py', self.corpus, '--shard', value])
+                self.assertEqual(code, 2)
+                self.assertIn('expected i/N', err)
+        _, code, err = _run(validate_main, ['validate_pricing.py', '--git-range', 'a..b', '--shard', '1/2'])
+        self.assertEqual(code, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
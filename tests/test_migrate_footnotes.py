@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.migrate_footnotes import FOOTNOTES, migrate_file
+
+
+class TestMigrateFootnotes(unittest.TestCase):
+
+    def _migrate(self, content):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'vendor.yaml')
+            with open(path, 'w') as f:
+                f.write(content)
+            changed = migrate_file(path)
+            with open(path) as f:
+                return changed, f.read()
+
+    def test_footnote_becomes_vendor_note(self):
+        changed, out = self._migrate(
+            "name: X\nsso_pricing: $20 per u/m[^1]\nfootnotes: '[^1]: SSO isn''t sold monthly.'\n"
+        )
+        self.assertTrue(changed)
+        self.assertEqual(out, "name: X\nsso_pricing: $20 per u/m\nvendor_note: \"SSO isn't sold monthly.\"\n")
+
+    def test_multi_line_footnote_is_joined(self):
+        _, out = self._migrate("name: X\nfootnotes: '[^a]: Needs the\n  Enterprise plan'\nupdated_at: 2024-01-01\n")
+        self.assertEqual(out, "name: X\nvendor_note: Needs the Enterprise plan\nupdated_at: 2024-01-01\n")
+
+    def test_pricing_note(self):
+        _, out = self._migrate("name: X\npricing_note: Quote\n")
+        self.assertEqual(out, "name: X\npricing_source_info: Pricing comes from a quote\n")
+        _, out = self._migrate("name: X\npricing_note:\nupdated_at: 2024-01-01\n")
+        self.assertEqual(out, "name: X\nupdated_at: 2024-01-01\n")
+
+    def test_unchanged_file_is_not_rewritten(self):
+        changed, out = self._migrate("name: X\nsso_pricing: $20 per u/m\n")
+        self.assertFalse(changed)
+        self.assertEqual(out, "name: X\nsso_pricing: $20 per u/m\n")
+
+    def test_rule_stats(self):
+        stats = ({}, {}, {})
+        FOOTNOTES.apply("base_pricing: $1\nsso_pricing: $2[^1]\npricing_note: Quote\n", stats)
+        matches, rewrites, seconds = stats
+        self.assertEqual(matches, {'strip-footnote-refs': 2, 'pricing-note-to-source-info': 1})
+        self.assertEqual(rewrites, {'strip-footnote-refs': 1, 'pricing-note-to-source-info': 1})
+        self.assertEqual(set(seconds), set(matches))
+
+
+if __name__ == '__main__':
+    unittest.main()
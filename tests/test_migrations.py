@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import migrations
+from scripts.migrations import Migration, run_migration
+
+RENAME = Migration('rename')
+
+
+@RENAME.rule(r'old_field:')
+def rename_old_field(match, lines, i):
+    return ['new_field:' + lines[i][match.end():]], i + 1
+
+
+@RENAME.rule(r'(?:drop_me|also_drop):')
+def drop_field(match, lines, i):
+    return [], i + 1
+
+
+@RENAME.rule(r'name:')
+def never_changes(match, lines, i):
+    return None
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.files = {
+            'a.yaml': "name: A\nold_field: 1\ndrop_me: x\n",
+            'b.yaml': "name: B\nalso_drop: y\n",
+            'c.yaml': "name: C\n",
+        }
+        for name, content in self.files.items():
+            self._write(name, content)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.tmpdir.name, name), 'w') as f:
+            f.write(content)
+
+    def _read(self, name):
+        with open(os.path.join(self.tmpdir.name, name)) as f:
+            return f.read()
+
+    def test_single_pass_dispatch(self):
+        self.assertEqual(RENAME.apply("name: A\nold_field: 1\ndrop_me: x\nother: 2\n"), "name: A\nnew_field: 1\nother: 2\n")
+        text = "name: C\n"
+        self.assertIs(RENAME.apply(text), text)
+
+    def test_dry_run_prints_diff_and_writes_nothing(self):
+        results, skipped = run_migration(RENAME, [self.tmpdir.name], dry_run=True)
+        self.assertEqual(skipped, [])
+        self.assertEqual([r.changed for r in results], [True, True, False])
+        self.assertIn(" name: A\n-old_field: 1\n-drop_me: x\n+new_field: 1\n", results[0].diff)
+        for name, content in self.files.items():
+            self.assertEqual(self._read(name), content)
+
+    def test_parallel_matches_serial(self):
+        serial, _ = run_migration(RENAME, [self.tmpdir.name], dry_run=True)
+        parallel, _ = run_migration(RENAME, [self.tmpdir.name], jobs=2, dry_run=True)
+        self.assertEqual([r.diff for r in serial], [r.diff for r in parallel])
+        self.assertEqual([r.rule_counts for r in serial], [r.rule_counts for r in parallel])
+
+        results, _ = run_migration(RENAME, [self.tmpdir.name], jobs=2)
+        self.assertEqual(self._read('a.yaml'), "name: A\nnew_field: 1\n")
+        self.assertEqual(self._read('b.yaml'), "name: B\n")
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['a.yaml', 'b.yaml', 'c.yaml'])
+
+    def test_failed_write_leaves_original(self):
+        path = os.path.join(self.tmpdir.name, 'a.yaml')
+        with patch.object(migrations.os, 'replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                RENAME.migrate_file(path)
+        self.assertEqual(self._read('a.yaml'), self.files['a.yaml'])
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['a.yaml', 'b.yaml', 'c.yaml'])
+
+    def test_rule_summary(self):
+        import io
+        results, _ = run_migration(RENAME, [self.tmpdir.name], dry_run=True)
+        out = io.StringIO()
+        migrations.print_rule_summary(RENAME, results, 0.5, file=out)
+        lines = out.getvalue().splitlines()
+        drop = next(line for line in lines if line.startswith('drop_field'))
+        self.assertEqual(drop.split()[1:4], ['2', '2', '2'])
+        self.assertIn("3 files, 6 lines", out.getvalue())
+
+    def test_jobs_must_be_positive(self):
+        for jobs in ('0', '-3'):
+            with patch('sys.argv', ['migrate.py', self.tmpdir.name, '--jobs', jobs]), patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as raised:
+                    migrations.migration_main(RENAME, "Test migration.")
+            self.assertEqual(raised.exception.code, 2)
+        self.assertEqual(self._read('a.yaml'), self.files['a.yaml'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import io
+import json
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import price_history
+from scripts.price_history import update_history, vendor_history
+from test_git_objects import GitRepoFixture
+
+VENDOR = (
+    "name: {name}\nbase_pricing: $10 per u/m\nsso_pricing: {sso}\npercent_increase: {pct}\n"
+    "vendor_url: https://example.com\npricing_source: https://example.com/pricing\nupdated_at: {updated}\n"
+)
+
+
+def _vendor(name='Alpha', sso='$20 per u/m', pct='100%', updated='2024-01-15'):
+    return VENDOR.format(name=name, sso=sso, pct=pct, updated=updated)
+
+
+class TestPriceHistory(GitRepoFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.db = os.path.join(self.repo, 'build', 'price_history.sqlite')
+
+    def update(self):
+        return update_history(self.db, self.repo)
+
+    def history(self, vendor):
+        return [(p.status, p.sso_amount, p.percent_value) for p in vendor_history(vendor, self.db)]
+
+    def test_records_only_price_changes(self):
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.write('_vendors/README.md', 'not a vendor\n')
+        first = self.commit()
+        self.write('_vendors/alpha.yaml', _vendor(sso='€30 per u/m', pct='200%'))
+        self.commit()
+        self.write('_vendors/alpha.yaml', _vendor(sso='€30 per u/m', pct='200%', updated='2024-06-01'))
+        self.commit('only the date')
+        self.write('_vendors/alpha.yaml', "name: [\n")
+        self.commit('broken')
+        os.remove(os.path.join(self.repo, '_vendors', 'alpha.yaml'))
+        self.commit('removed')
+        self.write('_vendors/alpha.yaml', _vendor(sso='Contact Sales', pct='???'))
+        self.commit('back')
+
+        stats = self.update()
+        self.assertEqual(stats, {'commits': 6, 'points': 4, 'unparsed': 1, 'rebuilt': 0})
+        self.assertEqual(self.history('_vendors/alpha.yaml'),
+                         [('A', 20.0, 100.0), ('M', 30.0, 200.0), ('D', None, None), ('A', None, None)])
+        points = vendor_history('alpha', self.db)
+        self.assertEqual(points[0].commit, first)
+        self.assertEqual((points[1].sso_pricing, points[1].sso_currency_code), ('€30 per u/m', 'EUR'))
+        self.assertEqual((points[3].call_us, points[3].name), (1, 'Alpha'))
+        self.assertEqual(vendor_history('README', self.db), [])
+
+    def test_incremental_update_matches_full_build(self):
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.commit()
+        self.assertEqual(self.update()['commits'], 1)
+        self.assertEqual(self.update()['commits'], 0)
+
+        self.write('_vendors/alpha.yaml', _vendor(sso='$40 per u/m', pct='300%'))
+        # Duplicate keys: published as Jekyll reads them, last key winning
+        self.write('_vendors/beta.yaml', _vendor(name='Beta') + "percent_increase: 90%\n")
+        self.commit()
+        self.git('mv', '_vendors/alpha.yaml', '_vendors/alpha-renamed.yml')
+        self.commit('rename')
+        stats = self.update()
+        self.assertEqual((stats['commits'], stats['points'], stats['rebuilt']), (2, 4, 0))
+
+        incremental = {v: vendor_history(v, self.db) for v in ('alpha', 'alpha-renamed', 'beta')}
+        os.remove(self.db)
+        self.update()
+        self.assertEqual({v: vendor_history(v, self.db) for v in incremental}, incremental)
+        self.assertEqual(self.history('alpha'), [('A', 20.0, 100.0), ('M', 40.0, 300.0), ('D', None, None)])
+        self.assertEqual(self.history('alpha-renamed.yml'), [('A', 40.0, 300.0)])
+        self.assertEqual(self.history('beta'), [('A', 20.0, 90.0)])
+
+    def test_rewritten_history_is_rebuilt(self):
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.commit()
+        self.write('_vendors/alpha.yaml', _vendor(sso='$40 per u/m', pct='300%'))
+        self.commit()
+        self.update()
+        self.git('reset', '-q', '--hard', 'HEAD~1')
+        self.write('_vendors/alpha.yaml', _vendor(sso='$30 per u/m', pct='200%'))
+        self.commit('amended')
+        self.assertEqual(self.update()['rebuilt'], 1)
+        self.assertEqual(self.history('alpha'), [('A', 20.0, 100.0), ('M', 30.0, 200.0)])
+
+    def test_symlinks_count_as_removed(self):
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.commit()
+        os.remove(os.path.join(self.repo, '_vendors', 'alpha.yaml'))
+        os.symlink('/etc/passwd', os.path.join(self.repo, '_vendors', 'alpha.yaml'))
+        self.commit()
+        self.update()
+        self.assertEqual(self.history('alpha'), [('A', 20.0, 100.0), ('D', None, None)])
+
+    def test_ambiguous_name(self):
+        os.mkdir(os.path.join(self.repo, '_vendors', 'more'))
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.write('_vendors/more/alpha.yml', _vendor())
+        self.commit()
+        self.update()
+        with self.assertRaisesRegex(ValueError, 'matches several vendors'):
+            vendor_history('alpha', self.db)
+        self.assertEqual(len(vendor_history('_vendors/more/alpha.yml', self.db)), 1)
+
+    def test_cli(self):
+        self.write('_vendors/alpha.yaml', _vendor())
+        self.commit()
+        out, err = io.StringIO(), io.StringIO()
+        argv = ['price_history.py', 'alpha', 'missing', '--repo', self.repo, '--db', self.db, '--format', 'jsonl']
+        with patch('sys.argv', argv), patch('sys.stdout', out), patch('sys.stderr', err):
+            with self.assertRaises(SystemExit) as raised:
+                price_history.main()
+        self.assertEqual(raised.exception.code, 1)
+        [record] = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual((record['path'], record['status'], record['percent_value']),
+                         ('_vendors/alpha.yaml', 'A', 100.0))
+        self.assertIn("Indexed 1 new commit(s), 1 price change(s).", err.getvalue())
+        self.assertIn("No history for missing", err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.reverify import ReverifyIndex, TokenBucket, main as reverify_main
+
+DAY = 86400
+
+
+def _vendors(*specs):
+    """(path, updated_at, host) -> the {path: (sha256, updated_at, host)} ReverifyIndex.sync takes."""
+    return {path: (f'sha-{path}-{updated_at}', updated_at, host) for path, updated_at, host in specs}
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=1, burst=2)
+        self.assertEqual([bucket.take(0) for _ in range(3)], [True, True, False])
+        self.assertFalse(bucket.take(DAY / 2))
+        self.assertTrue(bucket.take(DAY))
+        # Never refills beyond the burst
+        self.assertEqual([bucket.take(30 * DAY) for _ in range(3)], [True, True, False])
+
+
+class TestReverifyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.vendors = _vendors(
+            ('a.yaml', '2020-01-01', 'a.com'),
+            ('b.yaml', '2019-01-01', 'b.com'),
+            ('c.yaml', '2021-01-01', 'c.com'),
+            ('d.yaml', None, 'd.com'),
+        )
+
+    def test_oldest_first_and_verified_go_to_the_back(self):
+        index = ReverifyIndex()
+        self.assertEqual(index.sync(self.vendors), {'added': 4, 'updated': 0, 'removed': 0})
+        batch = index.next_batch(2, today=date(2025, 1, 1), now=0)
+        self.assertEqual([v.path for v in batch], ['d.yaml', 'b.yaml'])
+        batch = index.next_batch(4, today=date(2025, 1, 2), now=DAY)
+        self.assertEqual([v.path for v in batch], ['a.yaml', 'c.yaml', 'd.yaml', 'b.yaml'])
+        self.assertEqual(batch[2].last_verified, '2025-01-01')
+
+    def test_per_host_rate_limit(self):
+        index = ReverifyIndex(host_rate=1, host_burst=1)
+        index.sync(_vendors(
+            ('x1.yaml', '2019-01-01', 'x.com'),
+            ('x2.yaml', '2019-01-02', 'x.com'),
+            ('y1.yaml', '2020-01-01', 'y.com'),
+        ))
+        batch = index.next_batch(3, today=date(2025, 1, 1), now=0)
+        self.assertEqual([v.path for v in batch], ['x1.yaml', 'y1.yaml'])
+        # x2 kept its place at the front and goes once x.com's bucket refills
+        self.assertEqual([v.path for v in index.next_batch(1, today=date(2025, 1, 1), now=0)], [])
+        self.assertEqual([v.path for v in index.next_batch(1, today=date(2025, 1, 2), now=DAY)], ['x2.yaml'])
+
+    def test_sync_is_incremental(self):
+        index = ReverifyIndex()
+        index.sync(self.vendors)
+        heap_size = len(index.heap)
+        self.assertEqual(index.sync(self.vendors), {'added': 0, 'updated': 0, 'removed': 0})
+        self.assertEqual(len(index.heap), heap_size)
+
+        changed = dict(self.vendors)
+        changed['b.yaml'] = ('sha-new', '2024-06-01', 'b.com')
+        del changed['d.yaml']
+        self.assertEqual(index.sync(changed), {'added': 0, 'updated': 1, 'removed': 1})
+        self.assertEqual(len(index.heap), heap_size + 1)
+        batch = index.next_batch(10, today=date(2025, 1, 1), now=0)
+        self.assertEqual([v.path for v in batch], ['a.yaml', 'c.yaml', 'b.yaml'])
+
+    def test_stale_heap_items_are_compacted(self):
+        index = ReverifyIndex(host_burst=1000)
+        index.sync(self.vendors)
+        for day in range(1, 60):
+            index.next_batch(4, today=date(2025, 1, 1), now=day * DAY)
+        self.assertLessEqual(len(index.heap), 2 * len(index.entries) + 64 + 4)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'state', 'reverify.json')
+            index = ReverifyIndex(host_burst=1)
+            index.sync(self.vendors)
+            first = index.next_batch(2, today=date(2025, 1, 1), now=0)
+            index.save(path)
+
+            loaded = ReverifyIndex.load(path, host_burst=1)
+            self.assertEqual(loaded.entries, index.entries)
+            self.assertEqual(loaded.sync(self.vendors), {'added': 0, 'updated': 0, 'removed': 0})
+            second = loaded.next_batch(4, today=date(2025, 1, 1), now=0)
+        # The hosts already used up their single token in the first batch
+        self.assertEqual({v.path for v in first} & {v.path for v in second}, set())
+        self.assertEqual([v.path for v in second], ['a.yaml', 'c.yaml'])
+
+
+class TestReverifyCli(unittest.TestCase):
+
+    def test_batches_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            vendors = os.path.join(tmpdir, '_vendors')
+            os.mkdir(vendors)
+            for name, updated_at in (('old', '2019-01-01'), ('mid', '2020-01-01'), ('new', '2021-01-01')):
+                with open(os.path.join(vendors, f'{name}.yaml'), 'w') as f:
+                    f.write(f"name: {name}\nvendor_url: https://{name}.example.com\n"
+                            f"pricing_source: https://pricing.{name}.example.com\nupdated_at: {updated_at}\n")
+            argv = ['reverify.py', '--vendors', vendors, '--corpus', os.path.join(tmpdir, 'v.sqlite'),
+                    '--state', os.path.join(tmpdir, 'state.json'), '--batch', '2', '--format', 'jsonl', '--jobs', '1']
+
+            def run(*extra):
+                captured = io.StringIO()
+                with patch('sys.argv', argv + list(extra)), patch('sys.stdout', captured):
+                    reverify_main()
+                return [json.loads(line) for line in captured.getvalue().splitlines()]
+
+            preview = run('--dry-run')
+            first = run()
+            second = run()
+        self.assertEqual([os.path.basename(v['path']) for v in preview], ['old.yaml', 'mid.yaml'])
+        self.assertEqual(first, preview)
+        self.assertEqual([os.path.basename(v['path']) for v in second], ['new.yaml', 'old.yaml'])
+        self.assertEqual(first[0]['host'], 'pricing.old.example.com')
+
+    def test_counts_must_be_positive(self):
+        for option, value in (('--jobs', '0'), ('--jobs', '-3'), ('--batch', '0'), ('--host-rate', '-1')):
+            with patch('sys.argv', ['reverify.py', option, value]), patch('sys.stderr'):
+                with self.assertRaises(SystemExit) as raised:
+                    reverify_main()
+            self.assertEqual(raised.exception.code, 2, option)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,10 +2,15 @@ import unittest
 import sys
 import os
 import tempfile
+import unittest.mock
 
 # Add parent directory to path to import script
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from scripts.validate_pricing import extract_price, extract_unit, is_call_us, validate_schema, validate_vendor_file
+from scripts.currency import CURRENCY_SYMBOLS, convert, load_fx_table
+from scripts.validate_pricing import (
+    extract_price, extract_unit, is_call_us, parse_price, parse_prices, validate_prices, validate_schema,
+    validate_vendor_file,
+)
 
 class TestExtractPrice(unittest.TestCase):
 
@@ -35,6 +40,124 @@ class TestIsCallUs(unittest.TestCase):
         self.assertFalse(is_call_us("$10 per user"))
 
 
+class TestParsePrice(unittest.TestCase):
+
+    def test_per_user_month(self):
+        price = parse_price("$10 per u/m")
+        self.assertEqual(price.currency, "$")
+        self.assertEqual(price.amount, 10.0)
+        self.assertEqual(price.unit, "per u/m")
+        self.assertEqual(price.period, "month")
+        self.assertFalse(price.call_us)
+
+    def test_currency_after_number(self):
+        price = parse_price("4.99€ / device")
+        self.assertEqual(price.currency, "€")
+        self.assertIsNone(price.period)
+
+    def test_leading_currency_code(self):
+        price = parse_price("CHF 20 per user/month")
+        self.assertIsNone(price.currency)
+        self.assertEqual(price.amount, 20.0)
+        self.assertEqual(price.unit, "per user/month")
+        self.assertEqual(parse_price("USD $10 / user")[:3], ("$", 10.0, "/ user"))
+        self.assertEqual(parse_price("US$15 per user")[:3], ("US$", 15.0, "per user"))
+        # Only whole codes from the FX table count
+        self.assertEqual(parse_price("CHFX 5").unit, "chfx 5")
+
+    def test_periods(self):
+        self.assertEqual(parse_price("$99/mo").period, "month")
+        self.assertEqual(parse_price("$0.60 per host-month").period, "month")
+        self.assertEqual(parse_price("$995 per year").period, "year")
+        self.assertEqual(parse_price("$99 per u/y").period, "year")
+        self.assertIsNone(parse_price("$2,500").period)
+
+    def test_call_us(self):
+        price = parse_price("Call Us! ($29+)")
+        self.assertTrue(price.call_us)
+        self.assertEqual(price.amount, 29.0)
+
+    def test_non_string_is_never_call_us(self):
+        price = parse_price(10)
+        self.assertEqual(price.amount, 10.0)
+        self.assertFalse(price.call_us)
+
+    def test_batch_matches_single(self):
+        strs = ["$10 per u/m", "Call Us!", "€30 per u/m", 25]
+        self.assertEqual(parse_prices(strs), [parse_price(s) for s in strs])
+
+
+class TestParsePriceDifferential(unittest.TestCase):
+    """The thin wrappers over parse_price must match the original implementations."""
+
+    @staticmethod
+    def _reference_extract_price(price_str):
+        import re
+        if not isinstance(price_str, str):
+            price_str = str(price_str)
+        clean_str = price_str.replace(',', '')
+        match = re.search(r'(\d+(?:\.\d+)?)', clean_str)
+        if match:
+            return float(match.group(1))
+        return None
+
+    @staticmethod
+    def _reference_extract_unit(price_str):
+        import re
+        if not isinstance(price_str, str):
+            price_str = str(price_str)
+        clean_str = price_str.replace(',', '')
+        # Unlike the original, a leading ISO code or letter-prefixed symbol
+        # ('CHF 10', 'US$15') is part of the currency, not the unit
+        codes = sorted(load_fx_table().rates)
+        qualified = [symbol for symbol in CURRENCY_SYMBOLS if symbol[0].isalpha() and symbol not in codes]
+        clean_str = re.sub(rf"^(?:(?:{'|'.join(codes)})(?![A-Za-z])\s*)?", '', clean_str)
+        clean_str = re.sub(rf"^(?:{'|'.join(sorted(map(re.escape, qualified), key=len, reverse=True))})", '', clean_str)
+        clean_str = re.sub(r'^[\$€£¥]+', '', clean_str).strip()
+        unit = re.sub(r'^\d+(?:\.\d+)?', '', clean_str).strip()
+        return unit.lower()
+
+    @staticmethod
+    def _reference_is_call_us(pricing_str):
+        if not isinstance(pricing_str, str):
+            return False
+        lower_str = pricing_str.lower()
+        return any(keyword in lower_str for keyword in ['call', 'custom', 'quote', 'contact'])
+
+    def _corpus(self):
+        import glob
+        import random
+        import yaml
+
+        values = [
+            "", " ", "$", "$$10", "$ 10 per u/m", " $10", "10", "10.", ".5", "1,000.50/yr",
+            "€", "£12.5 per seat", "¥1000", "USD 10", "$1.2.3", "per u/m $10", "CONTACT us",
+            "Call Us! ($8000+ minimum annual commitment)", "$0.60 - $7.20 per host-month",
+            "4.99€ / device", "\t$5\n", "$٣ per u/m", 10, 12.5, True, None, ['$1'],
+        ]
+        vendors_dir = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+        for path in glob.glob(os.path.join(vendors_dir, '*.y*ml')):
+            with open(path) as f:
+                try:
+                    data = yaml.safe_load(f) or {}
+                except yaml.YAMLError:
+                    continue
+            values.extend(data.get(k) for k in ('base_pricing', 'sso_pricing', 'percent_increase'))
+
+        rng = random.Random(1234)
+        alphabet = "$€£¥0123456789.,/ -+perumonthyearcalCUS!()\t"
+        for _ in range(2000):
+            values.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16))))
+        return values
+
+    def test_wrappers_match_original_implementations(self):
+        for value in self._corpus():
+            with self.subTest(value=value):
+                self.assertEqual(extract_price(value), self._reference_extract_price(value))
+                self.assertEqual(extract_unit(value), self._reference_extract_unit(value))
+                self.assertEqual(is_call_us(value), self._reference_is_call_us(value))
+
+
 class TestValidateSchema(unittest.TestCase):
 
     def _make_valid_data(self):
@@ -278,6 +401,59 @@ class TestUnitMismatch(unittest.TestCase):
             os.unlink(tmpfile)
 
 
+class TestCurrencyMismatch(unittest.TestCase):
+
+    def _validate(self, base, sso, pct=None):
+        data = {'base_pricing': base, 'sso_pricing': sso}
+        if pct is not None:
+            data['percent_increase'] = pct
+        warnings, errors = [], []
+        validate_prices(data, warnings, errors)
+        return warnings, errors
+
+    def test_same_currency_is_unchanged(self):
+        warnings, errors = self._validate('€10 per u/m', '€30 per u/m', '200%')
+        self.assertEqual((warnings, errors), ([], []))
+
+    def test_converts_before_comparing(self):
+        sso = f"${convert(20, 'EUR', 'USD'):.2f} per u/m"
+        warnings, errors = self._validate('€10 per u/m', sso, '100%')
+        self.assertEqual(errors, [])
+        self.assertEqual([w.code for w in warnings], ['currency-mismatch'])
+        self.assertIn("converted to 20.0 EUR", warnings[0])
+
+    def test_mismatch_is_only_a_warning(self):
+        # Unconverted, this would look like a 100% increase
+        warnings, errors = self._validate('€10 per u/m', '$20 per u/m', '100%')
+        self.assertEqual(errors, [])
+        self.assertEqual([w.code for w in warnings], ['currency-mismatch', 'percent-mismatch'])
+        self.assertIn("expected 84.0%", warnings[1])
+        self.assertIn("Prices: base=€10.0, sso=€18.4.", warnings[1])
+
+    def test_amounts_are_reported_in_the_base_currency(self):
+        warnings, errors = self._validate('10 CHF per user', '30 CHF per user', '100%')
+        self.assertIn("Prices: base=10.0 CHF, sso=30.0 CHF.", errors[0])
+        warnings, errors = self._validate('£10 per user', '£30 per user')
+        self.assertIn("Based on base=£10.0 and sso=£30.0", errors[0])
+
+    def test_currency_symbol_alone_is_not_a_unit_mismatch(self):
+        warnings, errors = self._validate('4.99€ / device', '$9 / device', '67%')
+        self.assertNotIn('unit-mismatch', [w.code for w in warnings])
+        warnings, errors = self._validate('10 USD per user', '$20 per user', '100%')
+        self.assertEqual((warnings, errors), ([], []))
+
+    def test_leading_currency_code_is_not_a_unit_mismatch(self):
+        warnings, errors = self._validate('CHF 10 per user', 'CHF 20 per user', '100%')
+        self.assertEqual((warnings, errors), ([], []))
+        warnings, errors = self._validate('CHF 10 per user', 'CHF 30 per user', '100%')
+        self.assertEqual(warnings, [])
+        self.assertIn("Prices: base=10.0 CHF, sso=30.0 CHF.", errors[0])
+
+    def test_unmarked_price_takes_the_other_currency(self):
+        warnings, errors = self._validate('€10 per user', '20 per user', '100%')
+        self.assertEqual((warnings, errors), ([], []))
+
+
 class TestDuplicateKeys(unittest.TestCase):
 
     def test_duplicate_key_raises_error(self):
@@ -293,6 +469,42 @@ class TestDuplicateKeys(unittest.TestCase):
             os.unlink(tmpfile)
 
 
+class TestVendorYamlLoader(unittest.TestCase):
+
+    def _pure_python_result(self, content):
+        import yaml
+        from scripts.validate_pricing import _DuplicateKeyLoader
+        try:
+            return yaml.load(content, Loader=_DuplicateKeyLoader)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    def _result(self, content):
+        from scripts.validate_pricing import load_vendor_yaml
+        try:
+            return load_vendor_yaml(content)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    def test_matches_pure_python_loader(self):
+        documents = [
+            "name: Foo\nbase_pricing: $5\nupdated_at: 2024-01-15\n",
+            "name: Foo\nbase_pricing: $5\nname: Bar\nbase_pricing: $6\n",
+            "outer:\n  a: 1\n  a: 2\n",
+            "a: [1,\n",
+            "a: b: c\n",
+            "? [1]\n: 1\n? [2]\n: 2\n",
+            "? [1]\n: 1\n? [1]\n: 2\n",
+        ]
+        for content in documents:
+            with self.subTest(content=content):
+                self.assertEqual(self._result(content), self._pure_python_result(content))
+
+    def test_duplicate_keys_are_reported_sorted(self):
+        result = self._result("b: 1\na: 1\nb: 2\na: 2\n")
+        self.assertEqual(result, "DuplicateKeyError: Duplicate key(s) in YAML: a, b")
+
+
 class TestCategoryMarkers(unittest.TestCase):
     """Tests that validate_pricing.py emits correct CATEGORY markers."""
 
@@ -368,6 +580,755 @@ class TestCategoryMarkers(unittest.TestCase):
         out = self._run_main_on(self._valid_yaml())
         self.assertNotIn("CATEGORY:", out)
 
+    def test_schema_error_on_invalid_vendor_url(self):
+        out = self._run_main_on(self._valid_yaml().replace("https://example.com\n", "example.com\n"))
+        self.assertIn("CATEGORY:schema-error", out)
+
+    def test_markers_ignore_user_text_in_messages(self):
+        # The duplicated key name appears in the message but must not imply a pricing error
+        out = self._run_main_on(self._valid_yaml(extra="percent_increase: 100%\n"))
+        self.assertIn("CATEGORY:schema-error", out)
+        self.assertNotIn("CATEGORY:pricing-error", out)
+
+
+class TestDiagnostics(unittest.TestCase):
+
+    def _write_tempfile(self, content):
+        f = tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False)
+        f.write(content)
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_diagnostics_carry_code_severity_category_and_field(self):
+        tmpfile = self._write_tempfile(
+            "name: Test\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\n"
+            "vendor_url: https://example.com\npricing_source: Quote\nupdated_at: 2024-01-15\n"
+        )
+        is_valid, warnings, errors = validate_vendor_file(tmpfile)
+        self.assertEqual([(e.code, e.severity, e.category, e.field) for e in errors],
+                         [('missing-percent-increase', 'error', 'pricing-error', 'percent_increase')])
+        self.assertEqual([(w.code, w.category, w.field) for w in warnings],
+                         [('pricing-source-not-url', 'schema-warning', 'pricing_source')])
+
+    def test_downgraded_diagnostic_keeps_code(self):
+        tmpfile = self._write_tempfile(
+            "name: Test\nbase_pricing: $10 per u/m\nsso_pricing: $20 per year\n"
+            "vendor_url: https://example.com\npricing_source: https://example.com/p\n"
+            "updated_at: 2024-01-15\npercent_increase: 50%\n"
+        )
+        is_valid, warnings, errors = validate_vendor_file(tmpfile)
+        self.assertEqual(errors, [])
+        self.assertEqual([w.code for w in warnings], ['unit-mismatch', 'percent-mismatch'])
+        self.assertEqual({w.category for w in warnings}, {'pricing-warning'})
+
+    def test_diagnostic_is_its_message(self):
+        from scripts.validate_pricing import Diagnostic
+        d = Diagnostic("Empty YAML file.", 'empty-file', 'error')
+        self.assertEqual(d, "Empty YAML file.")
+        self.assertIn("Empty", d)
+
+    def test_diagnostic_pickles_with_attributes(self):
+        import pickle
+        from scripts.validate_pricing import Diagnostic
+        d = pickle.loads(pickle.dumps(Diagnostic("Bad date.", 'invalid-date', 'error', 'updated_at')))
+        self.assertEqual(d.to_dict(), {
+            'severity': 'error', 'code': 'invalid-date', 'category': 'schema-error',
+            'field': 'updated_at', 'message': "Bad date.",
+        })
+
+    def test_jsonl_format(self):
+        import io
+        import json
+        from unittest.mock import patch
+        from scripts.validate_pricing import main as vp_main
+
+        tmpfile = self._write_tempfile("name: Foo\nname: Bar\n")
+        captured = io.StringIO()
+        with patch('sys.argv', ['validate_pricing.py', '--format', 'jsonl', tmpfile]):
+            with patch('sys.stdout', captured):
+                with self.assertRaises(SystemExit):
+                    vp_main()
+        records = [json.loads(line) for line in captured.getvalue().splitlines()]
+        self.assertEqual(records[0]['type'], 'diagnostic')
+        self.assertEqual(records[0]['file'], tmpfile)
+        self.assertEqual(records[0]['code'], 'duplicate-key')
+        self.assertEqual(records[-1], {
+            'type': 'summary', 'files': 1, 'files_with_errors': 1,
+            'files_with_warnings': 0, 'categories': ['schema-error'],
+        })
+
+
+class TestParallelValidation(unittest.TestCase):
+    """Tests that --jobs produces output identical to a serial run."""
+
+    FILES = {
+        'valid.yaml': (
+            "name: Valid\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\n"
+            "vendor_url: https://example.com\npricing_source: https://example.com/pricing\n"
+            "updated_at: 2024-01-15\npercent_increase: 100%\n"
+        ),
+        'missing_pct.yaml': (
+            "name: Missing\nbase_pricing: $10 per u/m\nsso_pricing: $30 per u/m\n"
+            "vendor_url: https://example.com\npricing_source: https://example.com/pricing\n"
+            "updated_at: 2024-01-15\n"
+        ),
+        'units.yaml': (
+            "name: Units\nbase_pricing: $10 per u/m\nsso_pricing: $20 per year\n"
+            "vendor_url: https://example.com\npricing_source: Quote\n"
+            "updated_at: 2024-01-15\npercent_increase: 100%\n"
+        ),
+        'broken.yaml': "name: Foo\nname: Bar\n",
+        'empty.yaml': "",
+    }
+
+    def _run_main(self, *argv):
+        import io
+        from unittest.mock import patch
+        from scripts.validate_pricing import main as vp_main
+
+        captured = io.StringIO()
+        exit_code = 0
+        with patch('sys.argv', ['validate_pricing.py', *argv]):
+            with patch('sys.stdout', captured):
+                try:
+                    vp_main()
+                except SystemExit as e:
+                    exit_code = e.code
+        return captured.getvalue(), exit_code
+
+    def test_parallel_output_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for filename, content in self.FILES.items():
+                with open(os.path.join(tmpdir, filename), 'w') as f:
+                    f.write(content)
+            serial = self._run_main(tmpdir, '--jobs', '1')
+            parallel = self._run_main(tmpdir, '--jobs', '3')
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[1], 1)
+        self.assertIn("CATEGORY:schema-error", serial[0])
+
+    def test_jobs_must_be_positive(self):
+        from unittest.mock import patch
+        with patch('sys.stderr'):
+            _, exit_code = self._run_main('--jobs', '0', 'x.yaml')
+        self.assertEqual(exit_code, 2)
+
+
+class TestProfile(unittest.TestCase):
+
+    def _run_main(self, *argv):
+        import io
+        from unittest.mock import patch
+        from scripts.validate_pricing import main as vp_main
+
+        out, err = io.StringIO(), io.StringIO()
+        with patch('sys.argv', ['validate_pricing.py', *argv]), patch('sys.stdout', out), patch('sys.stderr', err):
+            try:
+                vp_main()
+            except SystemExit:
+                pass
+        return out.getvalue(), err.getvalue()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for name, content in TestParallelValidation.FILES.items():
+            with open(os.path.join(self.tmpdir.name, name), 'w') as f:
+                f.write(content)
+
+    def test_profile_reports_phases_and_slowest_files(self):
+        plain, _ = self._run_main(self.tmpdir.name)
+        out, err = self._run_main('--profile', self.tmpdir.name, '--profile-top', '2')
+        self.assertEqual(out, plain)
+        for phase in ('read', 'parse', 'schema', 'pricing'):
+            self.assertIn(f"  {phase} ", err)
+        self.assertIn("Slowest 2 files:", err)
+
+    def test_profile_top_requires_profile(self):
+        _, err = self._run_main(self.tmpdir.name, '--profile-top', '2')
+        self.assertIn("require --profile", err)
+
+    def test_profile_out_writes_pstats(self):
+        import pstats
+        dump = os.path.join(self.tmpdir.name, 'profile.pstats')
+        self._run_main(self.tmpdir.name, '--profile', '--profile-out', dump, '--jobs', '2')
+        stats = pstats.Stats(dump)
+        self.assertTrue(any(func[2] == 'validate_schema' for func in stats.stats))
+
+    def test_validate_files_profile_covers_each_file(self):
+        from scripts.validate_pricing import validate_files
+        paths = sorted(os.path.join(self.tmpdir.name, name) for name in TestParallelValidation.FILES)
+        profile = {}
+        validate_files(paths, profile=profile)
+        self.assertEqual(sorted(profile), paths)
+        valid = profile[os.path.join(self.tmpdir.name, 'valid.yaml')]
+        self.assertEqual(set(valid), {'read', 'parse', 'schema', 'pricing', 'total'})
+
+
+class TestValidationCache(unittest.TestCase):
+
+    VALID = (
+        "name: Test\nbase_pricing: $10 per u/m\nsso_pricing: $20 per u/m\n"
+        "vendor_url: https://example.com\npricing_source: https://example.com/pricing\n"
+        "updated_at: 2024-01-15\npercent_increase: 100%\n"
+    )
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache', 'results.json')
+        self.vendor = os.path.join(self.tmpdir.name, 'vendor.yaml')
+        with open(self.vendor, 'w') as f:
+            f.write(self.VALID + "vender_url: https://typo.example.com\n")
+
+    def _validate(self):
+        from scripts.validate_pricing import ValidationCache, rules_fingerprint, validate_files
+        cache = ValidationCache(self.cache_path, rules_fingerprint())
+        results = validate_files([self.vendor], cache=cache)
+        cache.save()
+        return cache, results[self.vendor]
+
+    def test_unchanged_file_is_a_hit(self):
+        cache, first = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        cache, second = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(first, second)
+        self.assertTrue(any("vender_url" in w for w in second[1]))
+        self.assertEqual([w.code for w in second[1]], ['unknown-field'])
+
+    def test_changed_content_is_a_miss(self):
+        self._validate()
+        with open(self.vendor, 'w') as f:
+            f.write(self.VALID)
+        cache, (errors, warnings) = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(warnings, [])
+
+    def test_rule_change_invalidates_cache(self):
+        from scripts import validate_pricing
+        self._validate()
+        with unittest.mock.patch.object(validate_pricing, 'KNOWN_FIELDS',
+                                        validate_pricing.KNOWN_FIELDS | {'vender_url'}):
+            cache, (errors, warnings) = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(warnings, [])
+
+    def test_entries_for_changed_files_are_dropped(self):
+        cache, _ = self._validate()
+        stale = set(cache.entries)
+        with open(self.vendor, 'w') as f:
+            f.write(self.VALID)
+        cache, _ = self._validate()
+        self.assertEqual(len(cache.entries), 1)
+        self.assertFalse(stale & set(cache.entries))
+        import json
+        with open(self.cache_path) as f:
+            self.assertEqual(len(json.load(f)['entries']), 1)
+
+    def test_files_are_read_once(self):
+        from scripts import validate_pricing
+        self._validate()
+        with open(self.vendor, 'w') as f:
+            f.write(self.VALID)
+        with unittest.mock.patch.object(validate_pricing, '_validate_vendor_file',
+                                        wraps=validate_pricing._validate_vendor_file) as spy:
+            self._validate()
+        [call] = spy.call_args_list
+        self.assertEqual(call.kwargs['raw'], self.VALID.encode())
+
+    def test_cli_flag_takes_no_path(self):
+        import io
+        from scripts.validate_pricing import main
+        argv = ['validate_pricing.py', '--cache', self.vendor, '--cache-path', self.cache_path]
+        with unittest.mock.patch('sys.argv', argv), unittest.mock.patch('sys.stdout', io.StringIO()) as out:
+            main()
+        self.assertIn("Cache: 0 hits, 1 misses", out.getvalue())
+        self.assertTrue(os.path.exists(self.cache_path))
+
+    def test_currency_module_change_invalidates_cache(self):
+        from scripts import currency
+        self._validate()
+        edited = os.path.join(self.tmpdir.name, 'currency.py')
+        with open(currency.__file__) as src, open(edited, 'w') as dst:
+            dst.write(src.read() + "\nCURRENCY_SYMBOLS['Fr.'] = 'CHF'\n")
+        with unittest.mock.patch.object(currency, '__file__', edited):
+            cache, _ = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_corrupt_cache_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, 'w') as f:
+            f.write("{not json")
+        cache, _ = self._validate()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+
+class TestWatch(unittest.TestCase):
+    VALID = TestValidationCache.VALID
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.vendors = self.tmpdir.name
+        self._write('alpha.yaml', self.VALID)
+        self._write('beta.yaml', self.VALID.replace('100%', '50%'))
+
+    def _write(self, filename, content):
+        path = os.path.join(self.vendors, filename)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_refresh_revalidates_only_changed_files(self):
+        from scripts.validate_pricing import VendorWatcher
+        watcher = VendorWatcher([self.vendors])
+        alpha = os.path.join(self.vendors, 'alpha.yaml')
+        beta = os.path.join(self.vendors, 'beta.yaml')
+        self.assertEqual([e.code for e in watcher.results[beta][0]], ['percent-mismatch'])
+
+        self._write('beta.yaml', self.VALID)
+        self._write('gamma.yaml', self.VALID + "vender_url: typo\n")
+        from scripts import validate_pricing
+        with unittest.mock.patch.object(validate_pricing, '_validate_vendor_file',
+                                        wraps=validate_pricing._validate_vendor_file) as spy:
+            revalidated, changes = watcher.refresh({beta, os.path.join(self.vendors, 'gamma.yaml'), alpha})
+        # alpha's content is unchanged, so it is not re-parsed
+        self.assertEqual(revalidated, 3)
+        self.assertEqual(spy.call_count, 2)
+        gamma = os.path.join(self.vendors, 'gamma.yaml')
+        self.assertEqual(list(changes), [beta, gamma])
+        added, removed = changes[beta]
+        self.assertEqual((added, [d.code for d in removed]), ([], ['percent-mismatch']))
+        self.assertEqual([d.code for d in changes[gamma][0]], ['unknown-field'])
+
+        os.unlink(gamma)
+        _, changes = watcher.refresh({gamma, os.path.join(self.tmpdir.name, 'elsewhere', 'x.yaml')})
+        self.assertNotIn(gamma, watcher.results)
+        self.assertEqual(list(changes), [gamma])
+        self.assertEqual(sorted(watcher.results), [alpha, beta])
+
+    def test_refresh_without_paths_rescans(self):
+        from scripts.validate_pricing import VendorWatcher
+        watcher = VendorWatcher([self.vendors])
+        self._write('gamma.yaml', "name: Gamma\n")
+        os.unlink(os.path.join(self.vendors, 'alpha.yaml'))
+        watcher.refresh(None)
+        self.assertEqual(sorted(os.path.basename(p) for p in watcher.results), ['beta.yaml', 'gamma.yaml'])
+
+    def test_watch_prints_report_then_diffs(self):
+        import io
+        from scripts.validate_pricing import watch
+
+        test = self
+        beta = os.path.join(self.vendors, 'beta.yaml')
+
+        class ScriptedWatcher:
+            def __init__(self):
+                self.steps = [set(), {beta}]
+                self.closed = False
+
+            def wait(self, timeout=None):
+                if not self.steps:
+                    raise KeyboardInterrupt
+                step = self.steps.pop(0)
+                if step:
+                    test._write('beta.yaml', test.VALID)
+                return step
+
+            def close(self):
+                self.closed = True
+
+        scripted = ScriptedWatcher()
+        out = io.StringIO()
+        with unittest.mock.patch('sys.stdout', out), unittest.mock.patch('sys.stderr', io.StringIO()):
+            watch([self.vendors], watcher=scripted)
+        output = out.getvalue()
+        self.assertIn("Validation complete. Scanned 2 files.", output)
+        self.assertIn("beta.yaml\n   - Error: Percentage mismatch", output)
+        self.assertIn("Revalidated 1 file(s)", output)
+        self.assertIn("Errors: 0 files", output.splitlines()[-1])
+        self.assertTrue(scripted.closed)
+
+    def test_diff_results(self):
+        from scripts.validate_pricing import Diagnostic, diff_results
+        kept = Diagnostic("kept", 'unknown-field', 'warning', 'x')
+        gone = Diagnostic("gone", 'missing-field', 'error', 'name')
+        new = Diagnostic("new", 'invalid-date', 'error', 'updated_at')
+        changes = diff_results({'a': ([gone], [kept]), 'b': ([], [kept])}, {'a': ([new], [kept]), 'b': ([], [kept])})
+        self.assertEqual(changes, {'a': ([new], [gone])})
+
+
+class TestCheckDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.corpus = os.path.join(self.tmpdir.name, '_vendors')
+        os.mkdir(self.corpus)
+        self._write(self.corpus, 'atlassianjiracloud.yaml', 'Atlassian Jira Cloud', 'https://www.atlassian.com')
+        self._write(self.corpus, 'zendesk.yaml', 'Zendesk', 'https://zendesk.com')
+
+    def _write(self, directory, filename, name, url):
+        path = os.path.join(directory, filename)
+        with open(path, 'w') as f:
+            f.write(TestValidationCache.VALID.replace('name: Test', f'name: {name}').replace('https://example.com\n', f'{url}\n'))
+        return path
+
+    def test_new_file_duplicating_the_corpus(self):
+        from scripts.validate_pricing import check_duplicates, validate_files
+        new = self._write(self.tmpdir.name, 'jira.yaml', 'Jira', 'https://atlassian.com/software/jira')
+        results = validate_files([new])
+        self.assertEqual(results[new], ([], []))
+        check_duplicates(results, [self.corpus])
+        errors, warnings = results[new]
+        self.assertEqual([(w.code, w.field, w.category) for w in warnings],
+                         [('duplicate-vendor-url', 'vendor_url', 'schema-warning')])
+        self.assertIn("'atlassian.com' is also used by atlassianjiracloud.yaml", warnings[0])
+
+    def test_corpus_file_being_validated_is_not_its_own_duplicate(self):
+        from scripts.validate_pricing import check_duplicates, validate_files
+        results = validate_files([os.path.join(self.corpus, 'zendesk.yaml')])
+        check_duplicates(results, [self.corpus])
+        self.assertEqual(list(results.values()), [([], [])])
+
+    def test_cli_flag(self):
+        self._write(self.corpus, 'zendesk2.yaml', 'Zendesk', 'https://zendesk2.example.com')
+        # The flag takes no value, so the path after it is still validated
+        out, code = TestParallelValidation._run_main(self, '--check-duplicates', self.corpus,
+                                                      '--duplicates-corpus', self.corpus,
+                                                      '--fail-on-warnings', '--jobs', '1')
+        self.assertEqual(code, 1)
+        self.assertIn("Vendor name 'Zendesk' is also used by zendesk2.yaml", out)
+        self.assertIn("Vendor name 'Zendesk' is also used by zendesk.yaml", out)
+        self.assertIn("CATEGORY:schema-warning", out)
+        plain, code = TestParallelValidation._run_main(self, self.corpus, '--fail-on-warnings', '--jobs', '1')
+        self.assertEqual(code, 0)
+
+
+class TestFindVendorFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.root = os.path.join(self.tmpdir.name, 'vendors')
+        for relpath in ('a.yaml', 'notes.txt', 'sub/b.yml', 'sub/deep/c.yaml', 'archive/old.yaml', 'sub/skip.yaml'):
+            path = os.path.join(self.root, relpath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(TestValidationCache.VALID)
+
+    def _find(self, paths, **options):
+        from scripts.validate_pricing import find_vendor_files
+        options.setdefault('recursive', True)
+        filepaths, skipped = find_vendor_files(paths, **options)
+        return [os.path.relpath(p, self.root).replace(os.sep, '/') for p in filepaths], skipped
+
+    def test_recursive_with_files_before_subdirectories(self):
+        filepaths, skipped = self._find([self.root])
+        self.assertEqual(sorted(filepaths),
+                         ['a.yaml', 'archive/old.yaml', 'sub/b.yml', 'sub/deep/c.yaml', 'sub/skip.yaml'])
+        self.assertEqual(filepaths[0], 'a.yaml')
+        self.assertLess(filepaths.index('sub/b.yml'), filepaths.index('sub/deep/c.yaml'))
+        self.assertEqual(skipped, [])
+        self.assertEqual(self._find([self.root], recursive=False)[0], ['a.yaml'])
+
+    def test_library_default_is_the_top_level_only(self):
+        from scripts.validate_pricing import find_vendor_files
+        self.assertEqual(find_vendor_files([self.root]), ([os.path.join(self.root, 'a.yaml')], []))
+
+    def test_watch_rejects_nested_trees(self):
+        import io
+        from unittest.mock import patch
+        from scripts.validate_pricing import main as vp_main
+        err = io.StringIO()
+        with patch('sys.argv', ['validate_pricing.py', '--watch', self.root]), patch('sys.stderr', err):
+            with self.assertRaises(SystemExit) as raised:
+                vp_main()
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("--watch does not watch subdirectories", err.getvalue())
+
+    def test_include_and_exclude(self):
+        self.assertEqual(sorted(self._find([self.root], exclude=['archive', 'skip.*'])[0]),
+                         ['a.yaml', 'sub/b.yml', 'sub/deep/c.yaml'])
+        self.assertEqual(sorted(self._find([self.root], include=['sub/*.yaml'])[0]),
+                         ['sub/deep/c.yaml', 'sub/skip.yaml'])
+        self.assertEqual(self._find([self.root], include=['*.txt'])[0], ['notes.txt'])
+        notes = os.path.join(self.root, 'notes.txt')
+        self.assertEqual(self._find([notes]), ([], [notes]))
+
+    def test_overlapping_paths_are_listed_once(self):
+        sub = os.path.join(self.root, 'sub')
+        filepaths, _ = self._find([sub, self.root, os.path.join(sub, 'b.yml'), os.path.join(sub, '.', 'b.yml')])
+        self.assertEqual(len(filepaths), 5)
+        self.assertEqual(len(set(filepaths)), 5)
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "needs symlinks")
+    def test_symlinked_directories_are_not_followed(self):
+        os.symlink(self.root, os.path.join(self.root, 'sub', 'loop'))
+        self.assertEqual(len(self._find([self.root])[0]), 5)
+
+    def test_files_from_stdin(self):
+        import io
+        from unittest.mock import patch
+        from scripts.validate_pricing import main as vp_main, read_files_from
+        listed = [os.path.join(self.root, 'a.yaml'), os.path.join(self.root, 'sub'), 'missing.yaml']
+        self.assertEqual(read_files_from(io.BytesIO(b'\0'.join(p.encode() for p in listed) + b'\0')), listed)
+
+        stdin = io.TextIOWrapper(io.BytesIO('\0'.join(listed).encode()))
+        out = io.StringIO()
+        with patch('sys.argv', ['validate_pricing.py', '--files-from', '-', '--exclude', 'deep']), \
+                patch('sys.stdin', stdin), patch('sys.stdout', out):
+            vp_main()
+        self.assertIn("Skipping invalid path: missing.yaml", out.getvalue())
+        self.assertIn("Scanned 3 files.", out.getvalue())
+
+        # An empty list is a run over no files, not a usage error
+        out = io.StringIO()
+        with patch('sys.argv', ['validate_pricing.py', '--files-from', os.devnull]), patch('sys.stdout', out):
+            vp_main()
+        self.assertIn("Scanned 0 files.", out.getvalue())
+
+
+class TestValidator(unittest.TestCase):
+
+    VENDORS_DIR = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+
+    def setUp(self):
+        self.paths = sorted(
+            os.path.join(self.VENDORS_DIR, f) for f in os.listdir(self.VENDORS_DIR) if f.endswith(('.yml', '.yaml'))
+        )
+
+    def test_matches_validate_vendor_file(self):
+        from scripts.validate_pricing import Validator
+        validator = Validator()
+        for path in self.paths:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            expected = validate_vendor_file(path)
+            with self.subTest(path=os.path.basename(path)):
+                for document in (raw, raw.decode('utf-8')):
+                    result = validator.validate(document)
+                    self.assertEqual((result.valid, result.warnings, result.errors), expected)
+                    self.assertEqual([d.code for d in result.errors], [d.code for d in expected[2]])
+                if result.data is not None:
+                    again = validator.validate(result.data)
+                    self.assertEqual((again.valid, again.warnings, again.errors), expected)
+
+    def test_structured_results(self):
+        from scripts.validate_pricing import Validator
+        validator = Validator()
+        result = validator.validate({'name': 'Foo', 'base_pricing': '$10', 'sso_pricing': '$20'})
+        self.assertFalse(result.valid)
+        self.assertEqual(result.data['name'], 'Foo')
+        record = result.to_dict()
+        self.assertEqual({e['code'] for e in record['errors']}, {'missing-field', 'missing-percent-increase'})
+        self.assertEqual(record['warnings'], [])
+
+        for document in ("- a\n- b\n", b"just text\n"):
+            result = validator.validate(document)
+            self.assertEqual([e.code for e in result.errors], ['not-a-mapping'])
+            self.assertIsNone(result.data)
+        self.assertEqual([e.code for e in validator.validate("name: [\n").errors], ['yaml-invalid'])
+        self.assertEqual([e.code for e in validator.validate({}).errors], ['empty-file'])
+        with self.assertRaises(TypeError):
+            validator.validate(42)
+
+    def test_rules_are_snapshotted(self):
+        from scripts import validate_pricing
+        validator = validate_pricing.Validator()
+        with unittest.mock.patch.object(validate_pricing, 'REQUIRED_FIELDS', ['name', 'logo']):
+            result = validator.validate({'name': 'Foo', 'base_pricing': 'Call us', 'sso_pricing': 'Call us'})
+            fresh = validate_pricing.Validator().validate({'name': 'Foo'})
+        self.assertNotIn("'logo'", ' '.join(result.errors))
+        self.assertIn("Missing required field: 'logo'.", fresh.errors)
+
+    def test_thread_safe_and_batch(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from scripts.validate_pricing import Validator
+        documents = []
+        for path in self.paths:
+            with open(path, 'rb') as f:
+                documents.append(f.read())
+        validator = Validator()
+        expected = [validator.validate(d) for d in documents]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            concurrent = list(pool.map(validator.validate, documents * 4))
+        self.assertEqual(concurrent, expected * 4)
+        self.assertEqual(validator.validate_many(documents), expected)
+        self.assertEqual(validator.validate_many(iter(documents[:20]), jobs=2), expected[:20])
+
+
+class TestCompiledSchema(unittest.TestCase):
+    """The rules compiled from the declarative schema must match the original hand-written checks."""
+
+    FIELDS = [
+        'name', 'base_pricing', 'sso_pricing', 'percent_increase', 'vendor_url', 'pricing_source',
+        'updated_at', 'vendor_note', 'pricing_source_info', 'footnotes', 'pricing_note', 'vender_url',
+    ]
+
+    @staticmethod
+    def _reference_validate_schema(data, warnings, errors):
+        from datetime import datetime
+        from scripts.validate_pricing import (
+            DEPRECATED_FIELDS, KNOWN_FIELDS, REQUIRED_FIELDS, _error, _is_valid_url, _warning,
+        )
+        for field in REQUIRED_FIELDS:
+            if not data.get(field):
+                _error(errors, 'missing-field', f"Missing required field: '{field}'.", field)
+        unknown = set(data.keys()) - KNOWN_FIELDS
+        if unknown:
+            _warning(warnings, 'unknown-field', f"Unknown field(s): {', '.join(sorted(unknown))}. Check for typos.")
+        for field, message in DEPRECATED_FIELDS.items():
+            if field in data:
+                _warning(warnings, 'deprecated-field', message, field)
+        updated_at = data.get('updated_at')
+        if updated_at:
+            try:
+                datetime.strptime(str(updated_at), '%Y-%m-%d')
+            except ValueError:
+                _error(errors, 'invalid-date',
+                       f"'updated_at' value '{updated_at}' is not a valid YYYY-MM-DD date.", 'updated_at')
+        vendor_url = data.get('vendor_url')
+        if vendor_url and not _is_valid_url(vendor_url):
+            _error(errors, 'invalid-url', f"'vendor_url' does not look like a valid URL: '{vendor_url}'.",
+                   'vendor_url')
+        pricing_source = data.get('pricing_source')
+        if pricing_source:
+            sources = pricing_source if isinstance(pricing_source, list) else [pricing_source]
+            for src in sources:
+                if not _is_valid_url(src):
+                    _warning(
+                        warnings, 'pricing-source-not-url',
+                        f"'pricing_source' does not look like a valid URL: '{src}'. "
+                        f"Please provide a direct link to the pricing page wherever possible; "
+                        f"maintainers may approve exceptions where no URL is available.",
+                        'pricing_source',
+                    )
+
+    def _values(self):
+        import datetime
+        return [
+            None, '', 'Call us', '$5 per u/m', '€7 per u/m', '$0', 'not a url', 'https://x.example',
+            ['https://a.example', 'nope'], [], 12, True, '2024-13-01', '2024-02-29', datetime.date(2024, 1, 2),
+            '150%', '???', {'nested': 1},
+        ]
+
+    def _documents(self):
+        """Corpus documents, then every one-field edit of a few of them."""
+        import glob
+        import yaml
+        vendors_dir = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+        documents = []
+        for path in sorted(glob.glob(os.path.join(vendors_dir, '*.y*ml'))):
+            with open(path) as f:
+                documents.append(yaml.safe_load(f))
+        edits = []
+        for document in documents[:4]:
+            for field in self.FIELDS:
+                edits.append({k: v for k, v in document.items() if k != field})
+                for value in self._values():
+                    edits.append(dict(document, **{field: value}))
+        return documents + edits
+
+    @staticmethod
+    def _dicts(diagnostics):
+        return [d.to_dict() for d in diagnostics]
+
+    def test_matches_hand_written_checks(self):
+        for i, document in enumerate(self._documents()):
+            warnings, errors = [], []
+            validate_schema(document, warnings, errors)
+            expected_warnings, expected_errors = [], []
+            self._reference_validate_schema(document, expected_warnings, expected_errors)
+            with self.subTest(document=i):
+                self.assertEqual(self._dicts(errors), self._dicts(expected_errors))
+                self.assertEqual(self._dicts(warnings), self._dicts(expected_warnings))
+
+    def test_rules_read_only_their_declared_fields(self):
+        from scripts.validate_pricing import KNOWN_FIELDS, compile_rules, current_rules
+
+        def outcome(rule, data):
+            warnings, errors = [], []
+            rule.check(data, warnings, errors)
+            return self._dicts(warnings), self._dicts(errors)
+
+        documents = self._documents()[::23]
+        for rule in compile_rules(current_rules()).rules:
+            # The unknown-field check reads the names of unknown fields, not known fields' values
+            others = sorted(KNOWN_FIELDS) if rule.reads is None else [f for f in self.FIELDS if f not in rule.reads]
+            for i, document in enumerate(documents):
+                before = outcome(rule, document)
+                for field in others:
+                    edits = [dict(document, **{field: value}) for value in self._values()[::3]]
+                    if rule.reads is not None:
+                        edits.append({k: v for k, v in document.items() if k != field})
+                    for edit in edits:
+                        self.assertEqual(outcome(rule, edit), before, (rule.name, i, field))
+
+    def test_incremental_matches_full_validation(self):
+        import random
+        import yaml
+        from scripts.validate_pricing import IncrementalValidator, Validator
+        rng = random.Random(25)
+        documents = self._documents()
+        full = Validator()
+        incremental = IncrementalValidator()
+        data = dict(documents[0])
+        for step in range(400):
+            field = rng.choice(self.FIELDS)
+            if rng.random() < 0.2:
+                data.pop(field, None)
+            else:
+                data[field] = rng.choice(self._values())
+            if step % 50 == 25:
+                document = "name: [\n"
+            elif step % 10 == 0:
+                document = yaml.safe_dump(data)
+            else:
+                document = data
+            expected = full.validate(document)
+            result = incremental.validate(document)
+            with self.subTest(step=step):
+                self.assertEqual((result.valid, self._dicts(result.errors), self._dicts(result.warnings)),
+                                 (expected.valid, self._dicts(expected.errors), self._dicts(expected.warnings)))
+
+    def test_only_affected_rules_rerun(self):
+        from scripts.validate_pricing import IncrementalValidator, compile_rules, current_rules
+        rule_count = len(compile_rules(current_rules()).rules)
+        data = {
+            'name': 'Foo', 'base_pricing': '$10 per u/m', 'sso_pricing': '$20 per u/m', 'percent_increase': '100%',
+            'vendor_url': 'https://foo.example.com', 'pricing_source': 'https://foo.example.com/pricing',
+            'updated_at': '2024-01-15',
+        }
+        validator = IncrementalValidator()
+        self.assertTrue(validator.validate(data).valid)
+        self.assertEqual(validator.rules_run, rule_count)
+
+        data['sso_pricing'] = '$30 per u/m'
+        result = validator.validate(data)
+        # required:sso_pricing and prices
+        self.assertEqual(validator.rules_run, 2)
+        self.assertEqual([e.code for e in result.errors], ['percent-mismatch'])
+
+        data['vender_url'] = 'https://foo.example.com'
+        result = validator.validate(data)
+        self.assertEqual(validator.rules_run, 1)
+        self.assertEqual([w.code for w in result.warnings], ['unknown-field'])
+        self.assertEqual([e.code for e in result.errors], ['percent-mismatch'])
+
+        # A caller that knows what changed skips the comparison
+        data['updated_at'] = 'yesterday'
+        result = validator.validate(data, changed={'updated_at'})
+        self.assertEqual(validator.rules_run, 2)
+        self.assertEqual([e.code for e in result.errors], ['invalid-date', 'percent-mismatch'])
+
+        # An unparseable version starts the next one over
+        self.assertEqual([e.code for e in validator.validate("name: [\n").errors], ['yaml-invalid'])
+        validator.validate(data)
+        self.assertEqual(validator.rules_run, rule_count)
+
 
 if __name__ == '__main__':
     unittest.main()
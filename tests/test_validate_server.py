@@ -0,0 +1,194 @@
+import unittest
+import sys
+import os
+import io
+import json
+import socket
+import asyncio
+import tempfile
+import threading
+import http.client
+import contextlib
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.corpus import generate_documents
+from scripts.validate_pricing import main as validate_main
+from scripts.validate_server import ValidationServer
+
+VENDORS_DIR = os.path.join(os.path.dirname(__file__), '..', '_vendors')
+
+
+class _ServerThread:
+    """Runs a ValidationServer on its own event loop in a background thread."""
+
+    def __init__(self, socket_path=None, **options):
+        self.server = ValidationServer(**options)
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start('127.0.0.1', 0, socket_path))
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(30)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(30)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(30)
+        self.loop.close()
+
+
+def _cli_output(paths, output_format):
+    out = io.StringIO()
+    argv = ['validate_pricing.py', *paths, '--jobs', '1', '--format', output_format]
+    with contextlib.redirect_stdout(out), patch('sys.argv', argv):
+        try:
+            validate_main()
+            code = 0
+        except SystemExit as e:
+            code = e.code
+    return out.getvalue(), code
+
+
+class TestValidationServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.running = _ServerThread(jobs=1, batch_size=8, max_body=256 * 1024)
+        cls.host, cls.port = cls.running.server.address[:2]
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.paths = sorted(os.path.join(VENDORS_DIR, f) for f in os.listdir(VENDORS_DIR))[:5]
+        for filename, content in generate_documents(30, seed=3):
+            path = os.path.join(cls.tmpdir.name, filename)
+            with open(path, 'w') as f:
+                f.write(content)
+            cls.paths.append(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.running.stop()
+        cls.tmpdir.cleanup()
+
+    def request(self, method, target, body=None, headers=None, connection=None):
+        connection = connection or http.client.HTTPConnection(self.host, self.port, timeout=30)
+        connection.request(method, target, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+
+    def test_single_document_matches_cli(self):
+        for path in self.paths:
+            with open(path, 'rb') as f:
+                body = f.read()
+            expected, code = _cli_output([path], 'text')
+            with self.subTest(path=os.path.basename(path)):
+                status, headers, payload = self.request('POST', f'/validate?path={path}&format=text', body)
+                self.assertEqual(status, 200)
+                self.assertEqual(payload.decode('utf-8'), expected)
+                self.assertEqual(headers['X-Exit-Code'], str(code))
+
+    def test_documents_batch_matches_cli(self):
+        documents = []
+        for path in self.paths:
+            with open(path, encoding='utf-8') as f:
+                documents.append({'path': path, 'content': f.read()})
+        expected, code = _cli_output(self.paths, 'jsonl')
+        status, headers, payload = self.request(
+            'POST', '/validate?format=jsonl', json.dumps({'documents': documents}),
+            {'Content-Type': 'application/json'},
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(payload.decode('utf-8'), expected)
+        self.assertEqual(headers['X-Exit-Code'], str(code))
+
+    def test_json_results(self):
+        body = b"name: Foo\nbase_pricing: $10 per u/m\nsso_pricing: $25 per u/m\n"
+        status, headers, payload = self.request('POST', '/validate?path=foo.yml', body)
+        self.assertEqual(status, 200)
+        result = json.loads(payload)
+        self.assertEqual(result['exit_code'], 1)
+        self.assertEqual(result['summary']['files_with_errors'], 1)
+        [document] = result['results']
+        self.assertEqual(document['path'], 'foo.yml')
+        self.assertFalse(document['valid'])
+        self.assertIn('missing-percent-increase', [e['code'] for e in document['errors']])
+
+    def test_documents_are_batched(self):
+        documents = [{'path': f'vendor-{i}.yml', 'content': f'name: Vendor {i}\n'} for i in range(20)]
+        before = self.running.server.stats['batches']
+        status, _, payload = self.request(
+            'POST', '/validate', json.dumps({'documents': documents}), {'Content-Type': 'application/json'},
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual([r['path'] for r in json.loads(payload)['results']], [d['path'] for d in documents])
+        # 20 documents in batches of at most 8
+        self.assertEqual(self.running.server.stats['batches'] - before, 3)
+
+    def test_concurrent_connections(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with open(self.paths[0], 'rb') as f:
+            body = f.read()
+        expected = self.request('POST', '/validate?path=a.yml', body)[2]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: self.request('POST', '/validate?path=a.yml', body), range(32)))
+        self.assertEqual({(status, payload) for status, _, payload in responses}, {(200, expected)})
+
+    def test_keep_alive(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        for _ in range(3):
+            status, headers, _ = self.request('GET', '/health', connection=connection)
+            self.assertEqual(status, 200)
+            self.assertEqual(headers['Connection'], 'keep-alive')
+        connection.close()
+
+    def test_bad_requests(self):
+        json_headers = {'Content-Type': 'application/json'}
+        cases = [
+            ('GET', '/validate', None, {}, 405),
+            ('POST', '/nope', b'', {}, 404),
+            ('POST', '/validate?format=xml', b'name: Foo\n', {}, 400),
+            ('POST', '/validate', b'{"documents": []}', json_headers, 400),
+            ('POST', '/validate', b'not json', json_headers, 400),
+            ('POST', '/validate', json.dumps({'documents': [{'path': 'a', 'content': 'x'}] * 2}), json_headers, 400),
+            ('POST', '/validate', b'x' * (256 * 1024 + 1), {}, 413),
+        ]
+        for method, target, body, headers, expected in cases:
+            with self.subTest(target=target, status=expected):
+                status, response_headers, payload = self.request(method, target, body, headers)
+                self.assertEqual(status, expected)
+                self.assertIn('error', json.loads(payload))
+                self.assertEqual(response_headers['Connection'], 'close')
+
+
+class TestUnixSocket(unittest.TestCase):
+
+    def test_validate_over_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            socket_path = os.path.join(tmpdir, 'validate.sock')
+            running = _ServerThread(socket_path=socket_path, jobs=1)
+            try:
+                body = b"name: Foo\n"
+                request = (f"POST /validate?format=jsonl HTTP/1.1\r\nHost: localhost\r\n"
+                           f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('latin-1') + body
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(socket_path)
+                    client.sendall(request)
+                    response = b''
+                    while chunk := client.recv(65536):
+                        response += chunk
+            finally:
+                running.stop()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK'))
+        records = [json.loads(line) for line in payload.decode('utf-8').splitlines()]
+        self.assertEqual(records[-1]['type'], 'summary')
+        self.assertEqual({r['code'] for r in records[:-1]}, {'missing-field'})
+
+
+if __name__ == '__main__':
+    unittest.main()